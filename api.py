@@ -0,0 +1,281 @@
+# api.py
+# API HTTP JSON de cotización, sin Streamlit (solo biblioteca estándar + motor.py).
+#   python api.py [--catalogo dinoe.xlsx] [--host 127.0.0.1] [--puerto 8000] [--workers 4]
+#
+# POST /quote  {"lat": .., "lon": .., "radio_km": 3, "top": 3, "carrito": {"producto": cantidad}, "vial": false}
+#   → {"id": "...", "tiendas": [{"ferreteria", "lat", "lon", "dist_km", "total", "detalle",
+#                                "faltantes", "asociado_info", "pdf"[, "minutos"]}, ...]}
+#   "vial": true → radio y distancias por calles, con minutos en auto (si el worker tiene DINO_GRAFO)
+# GET  /quote/{id}.pdf[?tienda=N]  PDF de la tienda N (0 = la más barata) de esa cotización; 409 si el
+#   catálogo cambió desde que se cotizó (el PDF no coincidiría con los totales: volver a cotizar)
+# GET  /health
+# GET  /metrics   tiempos por tramo y contadores del worker que atiende (texto de Prometheus)
+# Con DINO_METRICAS_LOG=ruta.jsonl cada request deja una línea JSON con su desglose (ver metricas.py).
+#
+# El id de cotización es la propia solicitud comprimida, con la versión del catálogo: cualquier worker
+# con esa versión puede rehacer la cotización (y su PDF) sin estado compartido. Cada worker carga el
+# catálogo una vez al arrancar y lo recarga en segundo plano si cambia el archivo (cada request usa
+# una sola versión).
+import argparse
+import base64
+import json
+import math
+import multiprocessing as mp
+import os
+import re
+import socket
+import sys
+import traceback
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from catalogo import CatalogoError
+from metricas import METRICAS, TIPO_PROMETHEUS, contar, corrida
+from motor import Cotizador, GestorCatalogo
+
+MAX_CUERPO = 256 * 1024
+MAX_RADIO_KM = 50
+MAX_TOP = 50
+RE_PDF = re.compile(r"^/quote/([A-Za-z0-9_\-]+)\.pdf$")
+LARGO_VERSION = 16  # caracteres del sha256 del catálogo que van en el id
+
+class SolicitudInvalida(ValueError):
+    pass
+
+def _entero(v) -> int:
+    """int sin truncar: 2, 2.0 y "2" valen; 1.7, true, NaN y "1.7" son ValueError."""
+    if isinstance(v, bool) or (isinstance(v, float) and not v.is_integer()):
+        raise ValueError(v)
+    return int(v)
+
+def validar(d) -> dict:
+    """Solicitud normalizada {lat, lon, radio_km, top, carrito} o SolicitudInvalida."""
+    if not isinstance(d, dict):
+        raise SolicitudInvalida("se esperaba un objeto JSON")
+    try:
+        lat, lon = float(d["lat"]), float(d["lon"])
+        radio = float(d.get("radio_km", 3))
+        top = _entero(d.get("top", 3))
+    except KeyError as e:
+        raise SolicitudInvalida(f"falta el campo {e.args[0]!r}")
+    except (TypeError, ValueError):
+        raise SolicitudInvalida("lat, lon y radio_km deben ser numéricos y top entero")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise SolicitudInvalida("lat/lon fuera de rango")
+    if not (0 < radio <= MAX_RADIO_KM):
+        raise SolicitudInvalida(f"radio_km debe estar en (0, {MAX_RADIO_KM}]")
+    if not (1 <= top <= MAX_TOP):
+        raise SolicitudInvalida(f"top debe estar en [1, {MAX_TOP}]")
+    carrito = d.get("carrito")
+    if not isinstance(carrito, dict) or not carrito:
+        raise SolicitudInvalida("carrito debe ser un objeto {producto: cantidad} no vacío")
+    try:
+        carrito = {str(p): n for p, n in ((p, _entero(c)) for p, c in carrito.items()) if n > 0}
+    except (TypeError, ValueError):
+        raise SolicitudInvalida("las cantidades del carrito deben ser enteras")
+    sol = {"lat": lat, "lon": lon, "radio_km": radio, "top": top, "carrito": carrito}
+    if d.get("vial"):
+        sol["vial"] = True  # solo si se pide: los ids de cotizaciones en línea recta no cambian
+    return sol
+
+def _version(motor: Cotizador) -> str:
+    return (motor.version or "")[:LARGO_VERSION]
+
+def id_cotizacion(sol: dict, version: str) -> str:
+    crudo = json.dumps({**sol, "catalogo": version}, sort_keys=True, ensure_ascii=False,
+                       separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(zlib.compress(crudo, 9)).decode("ascii").rstrip("=")
+
+def leer_id(qid: str):
+    """(solicitud, versión del catálogo con que se cotizó) o SolicitudInvalida."""
+    try:
+        d = json.loads(zlib.decompress(base64.urlsafe_b64decode(qid + "=" * (-len(qid) % 4))))
+        return validar(d), str(d["catalogo"])
+    except SolicitudInvalida:
+        raise
+    except Exception:
+        raise SolicitudInvalida("id de cotización inválido")
+
+def _limpio(v):
+    # NaN → null y escalares numpy → Python, para que el JSON sea estándar
+    if isinstance(v, dict):
+        return {str(k): _limpio(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_limpio(x) for x in v]
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and not math.isfinite(v):
+        return None
+    return v
+
+def cotizacion_json(motor: Cotizador, sol: dict) -> dict:
+    qid = id_cotizacion(sol, _version(motor))
+    ranking = motor.cotizar(sol["lat"], sol["lon"], sol["radio_km"], sol["carrito"], top=sol["top"],
+                            vial=sol.get("vial", False))
+    tiendas = [{
+        "ferreteria": f["ferreteria"], "lat": f["lat"], "lon": f["lon"], "dist_km": f["dist"],
+        "total": f["total"], "detalle": f["detalle"], "faltantes": f["faltantes"],
+        "asociado_info": f["asociado_info"], "pdf": f"/quote/{qid}.pdf?tienda={i}",
+        **({"minutos": f["minutos"]} if "minutos" in f else {}),
+    } for i, f in enumerate(ranking)]
+    return _limpio({"id": qid, "tiendas": tiendas})
+
+class Manejador(BaseHTTPRequestHandler):
+    server_version = "DinoCotizador/1.0"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # cabeceras y cuerpo van en writes separados: sin esto, +40 ms (delayed ACK)
+
+    @property
+    def motor(self) -> Cotizador:
+        return self.server.gestor.actual()
+
+    def log_message(self, fmt, *args):
+        if self.server.registro:
+            super().log_message(fmt, *args)
+
+    def _responder(self, codigo, cuerpo: bytes, tipo="application/json; charset=utf-8", extra=None):
+        self._respondido = True
+        contar("http_respuestas", codigo=codigo)
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for k, v in (extra or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _json(self, codigo, obj):
+        self._responder(codigo, json.dumps(obj, ensure_ascii=False, allow_nan=False).encode("utf-8"))
+
+    def _error(self, codigo, mensaje):
+        self._json(codigo, {"error": mensaje})
+
+    def _atender(self, manejar):
+        """Corre el manejador; ante una excepción inesperada responde 500 en JSON (si todavía no
+        empezó otra respuesta) en vez de cortar la conexión sin cuerpo."""
+        self._respondido = False
+        try:
+            manejar()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # el cliente ya no está
+        except Exception:
+            traceback.print_exc()
+            self.close_connection = True  # puede haber quedado cuerpo sin leer
+            if not self._respondido:
+                self._error(500, "error interno del servidor")
+
+    def do_GET(self):
+        self._atender(self._get)
+
+    def do_POST(self):
+        self._atender(self._post)
+
+    def _get(self):
+        url = urlsplit(self.path)
+        motor = self.motor
+        if url.path == "/health":
+            return self._json(200, {"ok": True, "pid": os.getpid(), "tiendas": len(motor),
+                                    "productos": len(motor.matriz.productos),
+                                    "catalogo": motor.version, "recargas": self.server.gestor.version - 1})
+        if url.path == "/metrics":
+            return self._responder(200, METRICAS.texto_prometheus().encode("utf-8"), TIPO_PROMETHEUS)
+        m = RE_PDF.match(url.path)
+        if not m:
+            return self._error(404, "ruta no encontrada")
+        try:
+            sol, version = leer_id(m.group(1))
+            tienda = int(parse_qs(url.query).get("tienda", ["0"])[0])
+        except (SolicitudInvalida, ValueError) as e:
+            return self._error(400, str(e) or "tienda inválida")
+        if version != _version(motor):
+            # recotizar daría otros precios que los de la respuesta de POST /quote
+            return self._error(409, "el catálogo cambió desde esta cotización: volver a cotizar")
+        with corrida("api.pdf"):
+            ranking = motor.cotizar(sol["lat"], sol["lon"], sol["radio_km"], sol["carrito"], top=sol["top"],
+                                    vial=sol.get("vial", False))
+            if not (0 <= tienda < len(ranking)):
+                return self._error(404, "la cotización no tiene esa tienda")
+            ferre = ranking[tienda]
+            pdf = motor.pdf(ferre, {"lat": sol["lat"], "lon": sol["lon"]})
+        nombre = re.sub(r"[^\w\-]+", "_", str(ferre["ferreteria"])).strip("_") or "ferreteria"
+        self._responder(200, pdf, "application/pdf",
+                        {"Content-Disposition": f'inline; filename="cotizacion_{nombre}.pdf"'})
+
+    def _post(self):
+        if urlsplit(self.path).path != "/quote":
+            return self._error(404, "ruta no encontrada")
+        try:
+            largo = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            return self._error(400, "Content-Length inválido")
+        if largo > MAX_CUERPO:
+            self.close_connection = True
+            return self._error(413, "cuerpo demasiado grande")
+        try:
+            sol = validar(json.loads(self.rfile.read(largo) or b"null"))
+        except json.JSONDecodeError:
+            return self._error(400, "JSON inválido")
+        except SolicitudInvalida as e:
+            return self._error(400, str(e))
+        with corrida("api.quote"):
+            respuesta = cotizacion_json(self.motor, sol)
+        self._json(200, respuesta)
+
+class Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, gestor: GestorCatalogo, sock: socket.socket, registro=False):
+        super().__init__(sock.getsockname()[:2], Manejador, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.gestor = gestor
+        self.registro = registro
+
+def _worker(sock, catalogo, registro, recarga_s):
+    # Cada worker tiene su propio catálogo; todos aceptan conexiones del mismo socket (pre-fork).
+    try:
+        gestor = GestorCatalogo(catalogo, intervalo_s=recarga_s)
+    except CatalogoError as e:
+        print(f"[{os.getpid()}] Error de catálogo: {e}", file=sys.stderr)
+        sys.exit(1)
+    srv = Servidor(gestor, sock, registro)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="API HTTP de cotización.")
+    ap.add_argument("--catalogo", default=os.environ.get("DINO_CATALOGO", "dinoe.xlsx"))
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--puerto", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--registro", action="store_true", help="una línea por request en stderr")
+    ap.add_argument("--recarga", type=float, default=5.0, help="segundos entre revisiones del archivo del catálogo")
+    a = ap.parse_args(argv)
+
+    sock = socket.create_server((a.host, a.puerto), backlog=256)
+    print(f"Escuchando en http://{a.host}:{a.puerto} con {a.workers} worker(s)")
+    if a.workers <= 1:
+        _worker(sock, a.catalogo, a.registro, a.recarga)
+        return 0
+    ctx = mp.get_context("fork")
+    procs = [ctx.Process(target=_worker, args=(sock, a.catalogo, a.registro, a.recarga), daemon=True)
+             for _ in range(a.workers)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in procs:
+            p.terminate()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
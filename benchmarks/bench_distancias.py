@@ -0,0 +1,42 @@
+# benchmarks/bench_distancias.py
+# Compara el cálculo por fila con geodesic contra el motor vectorizado de geo.py.
+#   python benchmarks/bench_distancias.py
+import time
+
+from datos import CENTRO_LIMA, base_sintetica
+
+from geopy.distance import geodesic
+import numpy as np
+from catalogo import Catalogo
+from geo import IndiceTiendas, filas_en_radio
+
+def por_fila(df, lat, lon, radio_km):
+    df = df.dropna(subset=["latitud", "longitud"]).copy()
+    df["distancia"] = df.apply(lambda r: geodesic((lat, lon), (r["latitud"], r["longitud"])).kilometers, axis=1)
+    return df[df["distancia"] <= radio_km].copy()
+
+def por_indice(indice, catalogo, lat, lon, radio_km):
+    ids, dist = indice.en_radio(lat, lon, radio_km)
+    filas, n = indice.filas_de(ids)
+    out = catalogo.precios.take(filas)
+    out["distancia"] = np.repeat(dist, n)
+    return out
+
+def medir(fn, *args, repeticiones=3):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter(); out = fn(*args); mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, out
+
+if __name__ == "__main__":
+    lat, lon = CENTRO_LIMA
+    for n_tiendas in (100, 500, 2000):
+        df = base_sintetica(n_tiendas=n_tiendas, n_productos=30)
+        t_old, a = medir(por_fila, df, lat, lon, 5)
+        t_new, b = medir(filas_en_radio, df, lat, lon, 5)
+        catalogo = Catalogo.desde_base(df)
+        indice = IndiceTiendas.desde_catalogo(catalogo)
+        t_idx, c = medir(por_indice, indice, catalogo, lat, lon, 5)
+        assert sorted(a.index) == sorted(b.index) and len(a) == len(c)
+        print(f"{n_tiendas:>5} tiendas / {len(df):>6} filas | por fila {t_old*1000:9.1f} ms"
+              f" | vectorizado {t_new*1000:7.2f} ms | índice {t_idx*1000:6.2f} ms | x{t_old/t_idx:,.0f}")
@@ -0,0 +1,58 @@
+# benchmarks/bench_grilla.py
+# Rerun de la pantalla de productos con 100 / 1.000 / 10.000 productos: toda la grilla vs. paginada.
+# Mide tiempo del rerun, widgets creados y bytes de los mensajes que van al navegador.
+#   python benchmarks/bench_grilla.py [--por-pagina 18] [--max-completa 1000]
+# La grilla completa crece peor que lineal (1.000 productos ≈ 6 s por rerun aquí); por encima de
+# --max-completa solo se mide la paginada.
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from datos import catalogo_csv
+
+import streamlit.testing.v1.local_script_runner as lsr
+from streamlit.testing.v1 import AppTest
+
+APP = str(Path(__file__).resolve().parents[1] / "streamlit_app.py")
+
+# AppTest arma el árbol de elementos a partir de los ForwardMsg del rerun: se cuentan sus bytes al pasar.
+_bytes = [0]
+_parse = lsr.parse_tree_from_messages
+def _parse_midiendo(msgs):
+    _bytes[0] = sum(m.ByteSize() for m in msgs)
+    return _parse(msgs)
+lsr.parse_tree_from_messages = _parse_midiendo
+
+def medir(ruta, por_pagina, repeticiones=3):
+    os.environ["DINO_CATALOGO"] = str(ruta)
+    os.environ["DINO_PRODUCTOS_POR_PAGINA"] = str(por_pagina)
+    at = AppTest.from_file(APP, default_timeout=600)
+    at.session_state["paso"] = "productos"
+    at.session_state["por_pagina"] = por_pagina
+    at.run()  # primera corrida: carga el catálogo y arma los índices
+    assert not at.exception, at.exception
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter(); at.run(); tiempos.append(time.perf_counter() - t0)
+    return min(tiempos), len(at.number_input), _bytes[0]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--por-pagina", type=int, default=18)
+    ap.add_argument("--max-completa", type=int, default=1_000)
+    a = ap.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (100, 1_000, 10_000):
+            ruta = catalogo_csv(Path(tmp) / f"catalogo_{n}.csv", n_productos=n)
+            for etiqueta, por_pagina in (("toda la grilla", n), (f"paginada ({a.por_pagina})", a.por_pagina)):
+                if por_pagina == n and n > a.max_completa:
+                    print(f"{n:>6} productos | {etiqueta:<16} | omitida (--max-completa {a.max_completa})")
+                    continue
+                seg, widgets, nbytes = medir(ruta, por_pagina, repeticiones=1 if por_pagina == n else 3)
+                print(f"{n:>6} productos | {etiqueta:<16} | rerun {seg * 1000:8.1f} ms"
+                      f" | {widgets:>6} number_input | {nbytes / 1024:9.1f} KiB")
+
+if __name__ == "__main__":
+    main()
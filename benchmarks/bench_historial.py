@@ -0,0 +1,89 @@
+# benchmarks/bench_historial.py
+# Historial de precios (historial.py) con muchas cargas simuladas: una por día, con una fracción de
+# precios que cambia, algunas altas y bajas y, cada tanto, una tienda que remarca todo. Mide el
+# registro de cada carga, lo que ocupa en disco frente a guardar el catálogo entero cada vez, y las
+# consultas: serie de un producto en un radio a 90 días, mayores cambios y cambios por tienda.
+#   python benchmarks/bench_historial.py [--tiendas 2000] [--productos 1000] [--cargas 365]   (≈ 100M precios-día)
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from datos import CENTRO_LIMA, base_sintetica
+
+from catalogo import Catalogo
+from historial import HistorialPrecios
+
+def medir(fn, repeticiones=5):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter(); out = fn(); tiempos.append(time.perf_counter() - t0)
+    return statistics.median(tiempos), out
+
+def du_mb(carpeta: Path):
+    return sum(p.stat().st_size for p in carpeta.rglob("*") if p.is_file()) / 2**20
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tiendas", type=int, default=2_000)
+    ap.add_argument("--productos", type=int, default=1_000)
+    ap.add_argument("--cobertura", type=float, default=0.15)
+    ap.add_argument("--cargas", type=int, default=365, help="una por día, hacia atrás desde hoy")
+    ap.add_argument("--cambian", type=float, default=0.02, help="fracción de precios que cambia por carga")
+    a = ap.parse_args(argv)
+    rng = np.random.default_rng(0)
+
+    cat = Catalogo.desde_base(base_sintetica(n_tiendas=a.tiendas, n_productos=a.productos, cobertura=a.cobertura))
+    base = cat.precios[["tienda", "producto", "Precio"]].copy()
+    filas = len(base)
+    print(f"{len(cat.tiendas):,} tiendas, {len(cat.productos):,} productos, {filas:,} precios por carga,"
+          f" {a.cargas} cargas (≈ {filas * a.cargas / 1e6:,.0f} M precios-día)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        h = HistorialPrecios(Path(tmp) / "historial")
+        hoy = time.time()
+        precio = base["Precio"].to_numpy().copy()
+        oferta = np.ones(filas, dtype=bool)
+        t_registro = []
+        for k in range(a.cargas):
+            if k:
+                cambia = rng.random(filas) < a.cambian
+                precio[cambia] = np.round(precio[cambia] * rng.uniform(0.9, 1.12, cambia.sum()), 2)
+                oferta ^= rng.random(filas) < a.cambian / 10  # altas y bajas
+                if k % 30 == 0:  # una tienda remarca todo un 15 %
+                    t = base["tienda"].to_numpy() == rng.integers(len(cat.tiendas))
+                    precio[t] = np.round(precio[t] * 1.15, 2)
+            precios = base[oferta].assign(Precio=precio[oferta]).reset_index(drop=True)
+            carga = Catalogo(cat.tiendas, cat.productos, precios)
+            t0 = time.perf_counter()
+            h.registrar(carga, f"carga{k}", ts=hoy - (a.cargas - k) * 86400)
+            t_registro.append(time.perf_counter() - t0)
+        mb = du_mb(h.carpeta)
+        completo_mb = filas * (4 + 4 + 8) / 2**20 * a.cargas
+        print(f"registrar: primera {t_registro[0] * 1e3:.0f} ms, siguientes {statistics.median(t_registro[1:]) * 1e3:.0f} ms (mediana)")
+        print(f"disco: {mb:,.1f} MB ({sum(s.meta['filas'] for s in h.cargas()):,} filas en segmentos);"
+              f" el catálogo entero en cada carga serían {completo_mb:,.0f} MB (x{completo_mb / mb:,.0f})")
+
+        h = HistorialPrecios(h.carpeta)  # como un proceso que recién abre el historial
+        t_frio, _ = medir(lambda: h.cargas(), repeticiones=1)
+        productos = [cat.productos[i] for i in rng.integers(len(cat.productos), size=20)]
+        lat, lon = CENTRO_LIMA
+        t_serie, _ = medir(lambda: [h.serie(p, lat, lon, 5, dias=90) for p in productos])
+        t_todas, df = medir(lambda: [h.serie(p, dias=90) for p in productos])
+        t_cambios, _ = medir(lambda: h.cambios(cargas=1))
+        t_semana, _ = medir(lambda: h.cambios(cargas=7))
+        t_tiendas, por_tienda = medir(lambda: h.cambios_por_tienda(cargas=1))
+        t_replay, _ = medir(lambda: h._ultimo(h.cargas()[:-1]), repeticiones=1)
+        print(f"listar cargas (en frío): {t_frio * 1e3:.1f} ms")
+        print(f"serie 90 días, radio 5 km: {t_serie / len(productos) * 1e3:.2f} ms;"
+              f" todas las tiendas: {t_todas / len(productos) * 1e3:.2f} ms ({len(df[-1]):,} filas)")
+        print(f"mayores cambios: última carga {t_cambios * 1e3:.1f} ms, última semana {t_semana * 1e3:.1f} ms;"
+              f" por tienda {t_tiendas * 1e3:.1f} ms")
+        print(f"rehacer los vigentes desde los {a.cargas - 1} segmentos: {t_replay * 1e3:.0f} ms")
+        print(por_tienda.head(3).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
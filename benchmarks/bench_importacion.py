@@ -0,0 +1,61 @@
+# benchmarks/bench_importacion.py
+# Costo de importar la app (arranque en frío de cada host) según `python -X importtime`, con presupuesto.
+#   python benchmarks/bench_importacion.py [--presupuesto-ms 1200] [--repeticiones 3]
+# Sale con código 1 si el import supera el presupuesto o si carga algún módulo de MODULOS_DIFERIDOS.
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+# Se cargan recién en la pantalla que los usa (mapa, resultados, descarga del PDF).
+MODULOS_DIFERIDOS = ("folium", "streamlit_folium", "geopy", "reportlab", "branca")
+RE_LINEA = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+def medir(modulo):
+    """{módulo: (self_us, acumulado_us, profundidad)} de un import en un proceso nuevo."""
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                       cwd=RAIZ, capture_output=True, text=True)
+    if r.returncode:
+        raise RuntimeError(r.stderr[-2000:])
+    tiempos = {}
+    for linea in r.stderr.splitlines():
+        m = RE_LINEA.match(linea)
+        if m:
+            tiempos[m.group(4)] = (int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2)
+    return tiempos
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modulo", default="streamlit_app")
+    ap.add_argument("--presupuesto-ms", type=float, default=1200.0)
+    ap.add_argument("--repeticiones", type=int, default=3, help="se queda con la corrida más rápida")
+    ap.add_argument("--top", type=int, default=12)
+    a = ap.parse_args(argv)
+
+    corridas = [medir(a.modulo) for _ in range(a.repeticiones)]
+    tiempos = min(corridas, key=lambda t: t[a.modulo][1])
+    total_ms = tiempos[a.modulo][1] / 1000
+
+    print(f"import {a.modulo}: {total_ms:,.1f} ms (presupuesto {a.presupuesto_ms:,.0f} ms), "
+          f"{len(tiempos)} módulos")
+    # los hijos directos de la app son los que se pueden diferir
+    hijos = sorted(((n, t) for n, t in tiempos.items() if t[2] == 1), key=lambda x: -x[1][1])
+    for nombre, (propio, acum, _) in hijos[:a.top]:
+        print(f"  {acum / 1000:9.1f} ms  {nombre}")
+    print(f"  {tiempos[a.modulo][0] / 1000:9.1f} ms  (cuerpo de {a.modulo})")
+
+    fallas = []
+    cargados = sorted({n for n in tiempos if n.split(".")[0] in MODULOS_DIFERIDOS})
+    if cargados:
+        fallas.append("se importan al arrancar: " + ", ".join(sorted({n.split('.')[0] for n in cargados})))
+    if total_ms > a.presupuesto_ms:
+        fallas.append(f"{total_ms:,.1f} ms > presupuesto de {a.presupuesto_ms:,.0f} ms")
+    for f in fallas:
+        print(f"FALLA: {f}")
+    return 1 if fallas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
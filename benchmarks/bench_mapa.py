@@ -0,0 +1,37 @@
+# benchmarks/bench_mapa.py
+# Tiempo de armar + renderizar el mapa de tiendas: un folium.Marker por tienda vs. la capa precalculada.
+#   python benchmarks/bench_mapa.py
+import time
+
+from datos import CENTRO_LIMA, base_sintetica
+
+import folium
+from folium.plugins import MarkerCluster
+from catalogo import Catalogo
+from geo import IndiceTiendas
+from mapa import CapaTiendas, callback_marcador, datos_capa_tiendas, mapa_base, popup_tienda
+
+def por_marcador(tiendas, lat, lon):
+    m = mapa_base(lat, lon, 15)
+    cluster = MarkerCluster().add_to(m)
+    for _, r in tiendas.iterrows():
+        folium.Marker([r["latitud"], r["longitud"]],
+                      popup=folium.Popup(popup_tienda(r["Ferreteria"], r["latitud"], r["longitud"], {}), max_width=320),
+                      icon=folium.Icon(color="blue", icon="shopping-cart")).add_to(cluster)
+    return m.get_root().render()
+
+def con_capa(datos_json, lat, lon):
+    m = mapa_base(lat, lon, 15)
+    CapaTiendas(datos_json, callback_marcador()).add_to(m)
+    return m.get_root().render()
+
+if __name__ == "__main__":
+    lat, lon = CENTRO_LIMA
+    for n in (100, 1_000, 10_000):
+        indice = IndiceTiendas.desde_catalogo(Catalogo.desde_base(base_sintetica(n_tiendas=n, n_productos=3)))
+        t0 = time.perf_counter(); html_a = por_marcador(indice.tiendas, lat, lon); t_old = time.perf_counter() - t0
+        t0 = time.perf_counter(); datos = datos_capa_tiendas(indice); t_datos = time.perf_counter() - t0
+        t0 = time.perf_counter(); html_b = con_capa(datos, lat, lon); t_new = time.perf_counter() - t0
+        print(f"{n:>6} tiendas | por marcador {t_old*1000:8.1f} ms ({len(html_a)/1e6:5.2f} MB)"
+              f" | capa (por rerun) {t_new*1000:6.1f} ms ({len(html_b)/1e6:5.2f} MB)"
+              f" | payload una vez {t_datos*1000:6.1f} ms")
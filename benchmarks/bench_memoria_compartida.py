@@ -0,0 +1,101 @@
+# benchmarks/bench_memoria_compartida.py
+# Memoria por proceso con N procesos de la app vivos a la vez: cada uno carga su catálogo (snapshot)
+# vs. todos adjuntados al publicador de compartido.py. Solo Linux (lee /proc/self/smaps_rollup).
+#   python benchmarks/bench_memoria_compartida.py [--procesos 4] [--tiendas 1000] [--productos 1000]
+#   python benchmarks/bench_memoria_compartida.py --catalogo dinoe.xlsx
+# RSS cuenta entera cada página compartida en cada proceso; PSS la reparte entre quienes la mapean,
+# así la suma de PSS es la memoria real del conjunto.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from datos import catalogo_csv
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+def memoria_mb() -> dict:
+    campos = {}
+    for archivo, claves in (("/proc/self/status", ("VmRSS", "RssAnon", "RssFile", "RssShmem")),
+                            ("/proc/self/smaps_rollup", ("Pss",))):
+        with open(archivo) as f:
+            for linea in f:
+                k, _, v = linea.partition(":")
+                if k in claves:
+                    campos[k] = int(v.split()[0]) / 1024
+    return campos
+
+def hijo(catalogo, cargar):
+    sys.path.insert(0, str(RAIZ))
+    from motor import Cotizador
+    if cargar:
+        m = Cotizador.desde_archivo(catalogo)
+        m.cotizar(m.indice.lats[0], m.indice.lons[0], 10, {m.matriz.productos[0]: 1})
+        modo = "compartido" if m.compartido is not None else "local"
+    else:
+        modo = "solo imports"
+    print(modo, flush=True)
+    sys.stdin.readline()  # se mide cuando todos cargaron, así las páginas compartidas se reparten
+    print(json.dumps({"modo": modo, **memoria_mb()}), flush=True)
+    sys.stdin.read()
+
+def medir(catalogo, n, cargar, env):
+    procs = [subprocess.Popen([sys.executable, __file__, "--hijo", str(catalogo)] + ([] if cargar else ["--vacio"]),
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=env)
+             for _ in range(n)]
+    for p in procs:
+        p.stdout.readline()
+    for p in procs:
+        p.stdin.write("\n"); p.stdin.flush()
+    filas = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.stdin.close(); p.wait()
+    return filas
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--procesos", type=int, default=4)
+    ap.add_argument("--tiendas", type=int, default=1_000)
+    ap.add_argument("--productos", type=int, default=1_000)
+    ap.add_argument("--catalogo", help="catálogo real en vez del sintético (xlsx o csv)")
+    ap.add_argument("--hijo", help=argparse.SUPPRESS)
+    ap.add_argument("--vacio", action="store_true", help=argparse.SUPPRESS)
+    a = ap.parse_args(argv)
+    if a.hijo:
+        return hijo(a.hijo, not a.vacio)
+
+    with tempfile.TemporaryDirectory() as tmp, \
+         tempfile.TemporaryDirectory(dir="/dev/shm" if os.path.isdir("/dev/shm") else None) as shm:
+        if a.catalogo:
+            catalogo = Path(a.catalogo).resolve()
+        else:
+            catalogo = catalogo_csv(Path(tmp) / "catalogo.csv", n_tiendas=a.tiendas, n_productos=a.productos,
+                                    cobertura=0.5)
+        sys.path.insert(0, str(RAIZ))
+        from catalogo import compilar
+        compilar(catalogo)  # el modo local arranca del snapshot (columnas numéricas ya mapeadas)
+        env = dict(os.environ, DINO_COMPARTIDO_DIR=shm)
+
+        resultados = {"solo imports": medir(catalogo, 1, False, env),
+                      "local": medir(catalogo, a.procesos, True, env)}
+        pub = subprocess.Popen([sys.executable, str(RAIZ / "compartido.py"), str(catalogo), "--intervalo", "3600"],
+                               stdout=subprocess.PIPE, text=True, env=env)
+        t0 = time.perf_counter()
+        pub.stdout.readline()
+        publicado = time.perf_counter() - t0
+        resultados["compartido"] = medir(catalogo, a.procesos, True, env)
+        pub.terminate(); pub.wait()
+
+    print(f"catálogo: {catalogo.name}  procesos: {a.procesos}  (publicación: {publicado:.1f} s)")
+    print(f"{'modo':<13} | {'RSS':>8} | {'anónima':>8} | {'archivo':>8} | {'shmem':>8} | {'PSS':>8} | {'PSS total':>9}")
+    for modo, filas in resultados.items():
+        prom = {k: sum(f[k] for f in filas) / len(filas) for k in ("VmRSS", "RssAnon", "RssFile", "RssShmem", "Pss")}
+        print(f"{modo:<13} | {prom['VmRSS']:6.0f}MB | {prom['RssAnon']:6.0f}MB | {prom['RssFile']:6.0f}MB |"
+              f" {prom['RssShmem']:6.0f}MB | {prom['Pss']:6.0f}MB | {sum(f['Pss'] for f in filas):7.0f}MB")
+
+if __name__ == "__main__":
+    main()
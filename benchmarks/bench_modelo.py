@@ -0,0 +1,67 @@
+# benchmarks/bench_modelo.py
+# Memoria del catálogo en tablas planas (lo que devuelven los lectores: nombre de tienda, producto y
+# coordenadas repetidos en cada fila) vs. el modelo normalizado de catalogo.Catalogo.
+#   python benchmarks/bench_modelo.py [--tiendas 2000] [--productos 1000] [--cobertura 0.5]   (≈ 1M filas)
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from datos import base_sintetica
+
+from catalogo import Catalogo, armar_base, normalizar_serie
+
+def mb(*dfs):
+    return sum(df.memory_usage(deep=True).sum() for df in dfs) / 2**20
+
+def tablas_planas(n_tiendas, n_productos, cobertura):
+    """(base, precios_df, info_lookup) como los arma leer_libro: texto por fila y la unión con coordenadas."""
+    b = base_sintetica(n_tiendas=n_tiendas, n_productos=n_productos, cobertura=cobertura)
+    num = b["Producto"].str[-4:].astype(int)
+    precios_df = pd.DataFrame({
+        "Ferreteria": b["Ferreteria"], "Categoria": "Cat " + (num % 12).astype(str),
+        "Producto": b["Producto"], "Marca": "Marca " + (num % 7).astype(str), "Precio": b["Precio"],
+    })
+    precios_df["__JOIN_KEY__"] = normalizar_serie(precios_df["Ferreteria"])
+    coords = b[["Ferreteria", "latitud", "longitud"]].drop_duplicates().rename(columns={"Ferreteria": "Nombre del Asociado"})
+    coords["__JOIN_KEY__"] = normalizar_serie(coords["Nombre del Asociado"])
+    info = pd.DataFrame({
+        "Nombre del Asociado": coords["Nombre del Asociado"], "Dirección tienda": "Av. Principal 123",
+        "Cta de abono para la venta": "BCP 191-0000000-0-00", "Persona de contacto": "Contacto",
+        "Número de Contacto": "999999999", "Número o Código Yape / Plin": "999999999",
+        "__JOIN_KEY__": coords["__JOIN_KEY__"],
+    })
+    base, info_lookup, _ = armar_base(precios_df, coords, info)
+    return base, precios_df, info_lookup
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tiendas", type=int, default=2_000)
+    ap.add_argument("--productos", type=int, default=1_000)
+    ap.add_argument("--cobertura", type=float, default=0.5)
+    a = ap.parse_args(argv)
+
+    base, precios_df, info_lookup = tablas_planas(a.tiendas, a.productos, a.cobertura)
+    texto = [c for c in precios_df.columns if c != "Precio"]
+    cat_base = base.astype({c: "category" for c in base.columns if c in texto})
+    cat_precios = precios_df.astype({c: "category" for c in texto})
+    info_mb = sys.getsizeof(info_lookup) / 2**20 + sum(sys.getsizeof(v) + sum(map(sys.getsizeof, v.values()))
+                                                       for v in info_lookup.values()) / 2**20
+
+    t0 = time.perf_counter()
+    cat = Catalogo.desde_base(base, info_lookup)
+    t_modelo = time.perf_counter() - t0
+    productos_mb = (sys.getsizeof(cat.productos) + sum(map(sys.getsizeof, cat.productos))) / 2**20
+    modelo = mb(cat.tiendas, cat.precios) + productos_mb + cat.inicio.nbytes / 2**20
+
+    n = len(base)
+    print(f"{n:,} filas, {len(cat.tiendas):,} tiendas, {len(cat.productos):,} productos (normalizar: {t_modelo:.1f} s)")
+    for nombre, total in (("planas, texto (Excel)", mb(base, precios_df) + info_mb),
+                          ("planas, categóricas (CSV)", mb(cat_base, cat_precios) + info_mb),
+                          ("modelo normalizado", modelo)):
+        print(f"  {nombre:<26} {total:8.1f} MB  ({total * 2**20 / n:6.1f} B/fila)")
+    print(f"  de eso, precios del modelo {mb(cat.precios):8.1f} MB  ({dict(cat.precios.dtypes.astype(str))})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/bench_reparto.py
+# Reparto de un carrito entre K tiendas: búsqueda exacta vs. heurística en catálogos de cientos de tiendas.
+#   python benchmarks/bench_reparto.py [--max-exacto 5000000]
+import argparse
+import time
+
+import numpy as np
+
+from datos import CENTRO_LIMA, base_sintetica
+
+from catalogo import Catalogo
+from geo import IndiceTiendas
+from precios import MatrizPrecios
+from reparto import repartir
+
+def carritos(matriz, n_items, n, rng):
+    return [{matriz.productos[j]: int(rng.integers(1, 10))
+             for j in rng.choice(len(matriz.productos), n_items, replace=False)} for _ in range(n)]
+
+def correr(matriz, ids, dist, cs, k, max_combinaciones):
+    t0 = time.perf_counter()
+    rs = [repartir(matriz, ids, dist, c, k, costo_visita=5.0, costo_km=1.0, max_combinaciones=max_combinaciones)
+          for c in cs]
+    return (time.perf_counter() - t0) / len(cs), rs
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--max-exacto", type=int, default=5_000_000, help="combinaciones máximas para la referencia exacta")
+    ap.add_argument("--carritos", type=int, default=5)
+    a = ap.parse_args(argv)
+    rng = np.random.default_rng(0)
+    lat, lon = CENTRO_LIMA
+    print(f"{'tiendas':>7} {'ítems':>5} {'K':>2} | {'exacto':>10} | {'heurística':>10} | brecha media / máx")
+    for n_tiendas in (100, 300, 1_000):
+        base = base_sintetica(n_tiendas=n_tiendas, n_productos=200, cobertura=0.4, dispersion_km=3)
+        catalogo = Catalogo.desde_base(base)
+        indice = IndiceTiendas.desde_catalogo(catalogo)
+        matriz = MatrizPrecios.desde_catalogo(catalogo)
+        ids, dist = indice.en_radio(lat, lon, 15)
+        for n_items in (5, 10, 20):
+            cs = carritos(matriz, n_items, a.carritos, rng)
+            for k in (2, 3):
+                t_h, heur = correr(matriz, ids, dist, cs, k, max_combinaciones=0)
+                t_e, exac = correr(matriz, ids, dist, cs, k, max_combinaciones=a.max_exacto)
+                if not all(r["exacto"] for r in exac):
+                    print(f"{len(ids):>7} {n_items:>5} {k:>2} | {'(omitido)':>10} | {t_h * 1000:8.1f}ms |")
+                    continue
+                brechas = [((h["importe"] + h["penalizacion"]) / (e["importe"] + e["penalizacion"]) - 1) * 100
+                           if len(h["faltantes"]) == len(e["faltantes"]) else np.inf
+                           for h, e in zip(heur, exac)]
+                print(f"{len(ids):>7} {n_items:>5} {k:>2} | {t_e * 1000:8.1f}ms | {t_h * 1000:8.1f}ms |"
+                      f" {np.mean(brechas):5.2f} % / {np.max(brechas):5.2f} %")
+
+if __name__ == "__main__":
+    main()
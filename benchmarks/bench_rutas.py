@@ -0,0 +1,65 @@
+# benchmarks/bench_rutas.py
+# Ranking por distancia por calles: compilar el grafo, ajustar las tiendas, la primera consulta desde
+# un punto (Dijkstra) vs. las siguientes desde la misma cuadra (cache por nodo de origen), y cuánto
+# cambia la tienda ganadora respecto de la línea recta. Damero sintético con jirones de un sentido.
+#   python benchmarks/bench_rutas.py [--calles 150] [--tiendas 1000] [--osm lima.osm]
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from datos import CENTRO_LIMA, base_sintetica, osm_grilla
+
+from catalogo import Catalogo
+from geo import haversine_km
+from motor import Cotizador
+from rutas import GrafoVial, compilar_grafo
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calles", type=int, default=150, help="calles por lado del damero (cuadras de 100 m)")
+    ap.add_argument("--tiendas", type=int, default=1_000)
+    ap.add_argument("--consultas", type=int, default=50)
+    ap.add_argument("--osm", help="extracto real en vez del damero")
+    a = ap.parse_args(argv)
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        osm = Path(a.osm) if a.osm else osm_grilla(Path(tmp) / "grilla.osm", n_calles=a.calles)
+        t0 = time.perf_counter()
+        grafo = GrafoVial.cargar(compilar_grafo(osm, Path(tmp) / "grilla.grafo.npz"))
+        t_compilar = time.perf_counter() - t0
+    print(f"grafo: {len(grafo):,} nodos, {len(grafo.destino):,} aristas (compilar + cargar {t_compilar:.1f} s)")
+
+    base = base_sintetica(n_tiendas=a.tiendas, n_productos=200, cobertura=0.3, dispersion_km=a.calles / 40)
+    catalogo = Catalogo.desde_base(base)
+    t0 = time.perf_counter()
+    motor = Cotizador(catalogo, grafo=grafo)
+    print(f"tiendas: {len(motor):,}, {int((motor.rutas.nodo >= 0).sum()):,} en el grafo"
+          f" (ajuste {time.perf_counter() - t0:.2f} s)")
+
+    lat0, lon0 = CENTRO_LIMA
+    puntos = [(lat0 + rng.normal(0, 0.02), lon0 + rng.normal(0, 0.02)) for _ in range(a.consultas)]
+    carritos = [{motor.matriz.productos[j]: 1 for j in rng.choice(len(motor.matriz.productos), 5, replace=False)}
+                for _ in puntos]
+    print(f"{'radio':>5} | {'recta':>8} | {'calles, 1ª':>10} | {'calles, cache':>13} | {'otra ganadora':>13} | km calle / recta")
+    for radio in (1, 3, 5):
+        motor.rutas._cache.clear()
+        t_recta, t_frio, t_cache, cambia, razon = [], [], [], 0, []
+        for (lat, lon), c in zip(puntos, carritos):
+            t0 = time.perf_counter(); recta = motor.cotizar(lat, lon, radio, c, top=1); t_recta.append(time.perf_counter() - t0)
+            t0 = time.perf_counter(); vial = motor.cotizar(lat, lon, radio, c, top=1, vial=True); t_frio.append(time.perf_counter() - t0)
+            # otro usuario en la misma cuadra (a ~10 m)
+            t0 = time.perf_counter(); motor.cotizar(lat + 1e-4, lon, radio, c, top=1, vial=True); t_cache.append(time.perf_counter() - t0)
+            if recta and vial:
+                cambia += recta[0]["ferreteria"] != vial[0]["ferreteria"]
+            ids, km, _ = motor.en_radio_vial(lat, lon, radio)
+            if len(ids):
+                razon.append(np.median(km / np.maximum(haversine_km(lat, lon, motor.indice.lats[ids], motor.indice.lons[ids]), 0.05)))
+        ms = lambda t: f"{np.median(t) * 1e3:6.2f}ms"
+        print(f"{radio:>4}k | {ms(t_recta):>8} | {ms(t_frio):>10} | {ms(t_cache):>13} | {cambia:>6}/{len(puntos):<6} | {np.median(razon):.2f}")
+
+if __name__ == "__main__":
+    main()
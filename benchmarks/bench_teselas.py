@@ -0,0 +1,58 @@
+# benchmarks/bench_teselas.py
+# Tiendas cercanas por celda geohash precalculada (geo.TeselasTiendas) vs. la rejilla de IndiceTiendas:
+# cuánto cuesta armar la tabla, cuánto ocupa, y candidatos / tiempo por consulta según el radio.
+# Verifica de paso que las dos den las mismas tiendas.
+#   python benchmarks/bench_teselas.py [--tiendas 3000] [--consultas 300]
+import argparse
+import time
+
+import numpy as np
+
+from datos import CENTRO_LIMA, base_sintetica
+
+from catalogo import Catalogo
+from geo import IndiceTiendas, TeselasTiendas
+
+def por_consulta(fn, puntos, radio):
+    t0 = time.perf_counter()
+    for lat, lon in puntos:
+        fn(lat, lon, radio)
+    return (time.perf_counter() - t0) / len(puntos)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tiendas", type=int, default=3_000)
+    ap.add_argument("--consultas", type=int, default=300)
+    ap.add_argument("--dispersion", type=float, default=20, help="km alrededor de Lima")
+    a = ap.parse_args(argv)
+    rng = np.random.default_rng(0)
+
+    base = base_sintetica(n_tiendas=a.tiendas, n_productos=5, cobertura=0.5, dispersion_km=a.dispersion)
+    catalogo = Catalogo.desde_base(base)
+    t0 = time.perf_counter()
+    teselas = TeselasTiendas.desde_tiendas(catalogo.tiendas)
+    t_armar = time.perf_counter() - t0
+    mb = sum(arr.nbytes for arr in teselas.arreglos().values()) / 2**20
+    print(f"{len(catalogo.tiendas):,} tiendas: {len(teselas):,} celdas, {len(teselas.tiendas):,} entradas,"
+          f" {mb:.1f} MB (armar {t_armar * 1e3:.0f} ms)")
+
+    rejilla = IndiceTiendas(catalogo.tiendas, catalogo.inicio)
+    tabla = IndiceTiendas(catalogo.tiendas, catalogo.inicio, teselas=teselas)
+    lat0, lon0 = CENTRO_LIMA
+    d = a.dispersion / 111.32
+    puntos = [(lat0 + rng.uniform(-d, d), lon0 + rng.uniform(-d, d)) for _ in range(a.consultas)]
+    print(f"{'radio':>5} | {'cand. rejilla':>13} | {'cand. teselas':>13} | {'rejilla':>9} | {'teselas':>9} | en_radio rejilla / teselas")
+    for radio in (1, 3, 5, 10, 15):
+        for lat, lon in puntos:
+            ia, _ = rejilla.en_radio(lat, lon, radio)
+            ib, _ = tabla.en_radio(lat, lon, radio)
+            assert np.array_equal(np.sort(ia), np.sort(ib)), (lat, lon, radio)
+        ca = np.mean([len(rejilla._candidatos(lat, lon, radio)) for lat, lon in puntos])
+        cb = np.mean([len(tabla._candidatos(lat, lon, radio)) for lat, lon in puntos])
+        us = lambda s: f"{s * 1e6:7.1f}us"
+        print(f"{radio:>4}k | {ca:>13.0f} | {cb:>13.0f} | {us(por_consulta(rejilla._candidatos, puntos, radio)):>9} |"
+              f" {us(por_consulta(tabla._candidatos, puntos, radio)):>9} | {us(por_consulta(rejilla.en_radio, puntos, radio))}"
+              f" / {us(por_consulta(tabla.en_radio, puntos, radio))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/carga_api.py
+# Prueba de carga de api.py: N requests POST /quote (y opcionalmente el PDF) con C clientes en paralelo.
+#   python api.py --workers 4 &
+#   python benchmarks/carga_api.py [--url http://127.0.0.1:8000] [--n 2000] [--concurrencia 16]
+#                                  [--carritos carritos.csv | --catalogo dinoe.xlsx] [--pdf 0.1]
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from lote import leer_carritos
+
+def carritos_del_catalogo(path, n, semilla=0):
+    """Carritos al azar sobre tiendas reales del catálogo (3-8 productos, centro cerca de una tienda)."""
+    from motor import Cotizador
+    motor = Cotizador.desde_archivo(path)
+    rng = random.Random(semilla)
+    tiendas = motor.indice.tiendas
+    productos = motor.matriz.productos
+    out = []
+    for i in range(n):
+        t = tiendas.iloc[rng.randrange(len(tiendas))]
+        elegidos = rng.sample(productos, min(len(productos), rng.randint(3, 8)))
+        out.append({"cotizacion": str(i), "lat": float(t["latitud"]) + rng.uniform(-0.01, 0.01),
+                    "lon": float(t["longitud"]) + rng.uniform(-0.01, 0.01), "radio_km": 3.0,
+                    "carrito": {p: rng.randint(1, 10) for p in elegidos}})
+    return out
+
+def cliente(url, trabajos, pdf_frac, lat_quote, lat_pdf, errores, lock, semilla):
+    u = urlsplit(url)
+    con = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=30)
+    rng = random.Random(semilla)
+    while True:
+        with lock:
+            if not trabajos:
+                break
+            c = trabajos.pop()
+        cuerpo = json.dumps({"lat": c["lat"], "lon": c["lon"], "radio_km": c["radio_km"],
+                             "top": 3, "carrito": c["carrito"]}).encode("utf-8")
+        try:
+            t0 = time.perf_counter()
+            con.request("POST", "/quote", cuerpo, {"Content-Type": "application/json"})
+            r = con.getresponse(); data = r.read()
+            lat_quote.append(time.perf_counter() - t0)
+            if r.status != 200:
+                errores.append(r.status); continue
+            tiendas = json.loads(data)["tiendas"]
+            if tiendas and rng.random() < pdf_frac:
+                t0 = time.perf_counter()
+                con.request("GET", tiendas[0]["pdf"])
+                r = con.getresponse(); r.read()
+                lat_pdf.append(time.perf_counter() - t0)
+                if r.status != 200:
+                    errores.append(r.status)
+        except (OSError, http.client.HTTPException) as e:
+            errores.append(type(e).__name__)
+            con.close()
+            con = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=30)
+    con.close()
+
+def resumen(nombre, lat):
+    if not lat:
+        return
+    ms = np.array(lat) * 1000
+    print(f"  {nombre:<8} n={len(ms):>6}  p50 {np.percentile(ms, 50):7.1f} ms  p90 {np.percentile(ms, 90):7.1f} ms"
+          f"  p99 {np.percentile(ms, 99):7.1f} ms  máx {ms.max():7.1f} ms")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--n", type=int, default=2000)
+    ap.add_argument("--concurrencia", type=int, default=16)
+    ap.add_argument("--carritos", help="CSV/JSONL en el formato de lote.py")
+    ap.add_argument("--catalogo", default="dinoe.xlsx")
+    ap.add_argument("--pdf", type=float, default=0.0, help="fracción de cotizaciones que además piden el PDF")
+    a = ap.parse_args()
+
+    base = leer_carritos(a.carritos, 3.0) if a.carritos else carritos_del_catalogo(a.catalogo, min(a.n, 500))
+    trabajos = [base[i % len(base)] for i in range(a.n)]
+    lat_quote, lat_pdf, errores, lock = [], [], [], threading.Lock()
+    hilos = [threading.Thread(target=cliente, args=(a.url, trabajos, a.pdf, lat_quote, lat_pdf, errores, lock, i))
+             for i in range(a.concurrencia)]
+    t0 = time.perf_counter()
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+    total = time.perf_counter() - t0
+
+    print(f"{a.n} cotizaciones, {a.concurrencia} clientes, {total:.2f} s → {a.n / total:,.1f} req/s"
+          f"  (errores: {len(errores)})")
+    resumen("quote", lat_quote)
+    resumen("pdf", lat_pdf)
@@ -0,0 +1,202 @@
+# benchmarks/datos.py
+# Catálogos sintéticos para los benchmarks.
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+CENTRO_LIMA = (-12.0675, -77.0333)
+
+def base_sintetica(n_tiendas=300, n_productos=40, cobertura=0.6, semilla=0, centro=CENTRO_LIMA, dispersion_km=20):
+    """DataFrame con la forma de `base_df`: una fila por (tienda, producto) con precio."""
+    rng = np.random.default_rng(semilla)
+    deg = dispersion_km / 111.0
+    lats = centro[0] + rng.normal(0, deg, n_tiendas)
+    lons = centro[1] + rng.normal(0, deg, n_tiendas)
+    tienda, prod = np.nonzero(rng.random((n_tiendas, n_productos)) < cobertura)
+    return pd.DataFrame({
+        "Ferreteria": [f"FERRETERIA {i:05d}" for i in tienda],
+        "Producto": [f"Producto {j:04d}" for j in prod],
+        "Precio": np.round(rng.uniform(5, 80, len(tienda)), 2),
+        "latitud": lats[tienda],
+        "longitud": lons[tienda],
+    })
+
+def catalogo_csv(ruta, n_tiendas=3, n_productos=100, cobertura=1.0, **kw):
+    """Escribe `base_sintetica` como CSV WKT (formato de catalogo.leer_csv_wkt), con categoría y marca."""
+    df = base_sintetica(n_tiendas=n_tiendas, n_productos=n_productos, cobertura=cobertura, **kw)
+    df["WKT"] = "POINT (" + df["longitud"].astype(str) + " " + df["latitud"].astype(str) + ")"
+    df["Categoria"] = "Cat " + (df["Producto"].str[-4:].astype(int) % 12).astype(str)
+    df["Marca"] = "Marca " + (df["Producto"].str[-4:].astype(int) % 7).astype(str)
+    df.rename(columns={"Ferreteria": "Nombre Cliente"}) \
+      .drop(columns=["latitud", "longitud"]).to_csv(ruta, index=False)
+    return Path(ruta)
+
+# ===========================
+# CATÁLOGO REALISTA (Perú)
+# ===========================
+# Ciudad, lat, lon, peso (≈ población urbana, millones) y dispersión de las tiendas en km.
+CIUDADES_PERU = [
+    ("Lima", -12.0464, -77.0428, 10.0, 18), ("Arequipa", -16.4090, -71.5375, 1.1, 6),
+    ("Trujillo", -8.1116, -79.0288, 1.0, 6), ("Chiclayo", -6.7714, -79.8409, 0.6, 5),
+    ("Piura", -5.1945, -80.6328, 0.5, 5), ("Iquitos", -3.7437, -73.2516, 0.45, 4),
+    ("Cusco", -13.5319, -71.9675, 0.45, 4), ("Huancayo", -12.0651, -75.2049, 0.4, 4),
+    ("Chimbote", -9.0745, -78.5936, 0.4, 4), ("Pucallpa", -8.3791, -74.5539, 0.35, 4),
+    ("Tacna", -18.0066, -70.2463, 0.3, 4), ("Ica", -14.0678, -75.7286, 0.3, 4),
+    ("Juliaca", -15.5000, -70.1333, 0.3, 4), ("Cajamarca", -7.1638, -78.5003, 0.25, 3),
+    ("Ayacucho", -13.1588, -74.2239, 0.2, 3),
+]
+
+# categoría → (marcas, variantes, rango de precio en soles)
+CATEGORIAS = {
+    "Cemento": (["Pacasmayo", "Mochica", "Sol", "Andino", "Inka"],
+                ["Extraforte", "Fortimax", "Tipo I", "MS", "GU", "Antisalitre"], (24, 40)),
+    "Fierro": (["Aceros Arequipa", "Sider"], ['barra 1/4"', 'barra 3/8"', 'barra 1/2"', 'barra 5/8"', 'barra 3/4"', 'barra 1"'], (6, 95)),
+    "Ladrillo": (["Pirámide", "Lark", "Maxx"], ["King Kong 18H", "Techo 12H", "Techo 15x30", "Pandereta"], (0.6, 3.5)),
+    "Tubería": (["Pavco", "Nicoll", "Matusita"], ['agua 1/2"', 'agua 3/4"', 'desagüe 2"', 'desagüe 4"', 'luz 3/4"'], (4, 45)),
+    "Clavos": (["Prodac", "Inkafer"], ['2"', '2 1/2"', '3"', '4"', "calamina", "para madera 3/8"], (4, 9)),
+    "Pintura": (["CPP", "Vencedor", "Tekno", "American Colors"], ["látex blanco", "látex gris", "esmalte negro", "anticorrosivo"], (18, 140)),
+    "Eléctrico": (["Indeco", "Celsa", "Bticino"], ["cable 14 AWG", "cable 12 AWG", "tomacorriente doble", "interruptor simple"], (3, 320)),
+    "Herramientas": (["Truper", "Stanley", "Bellota"], ["martillo", "alicate", "wincha 5 m", "pico", "pala"], (12, 90)),
+    "Calaminas": (["Calaminon", "Eternit"], ["galvanizada 0.22", "galvanizada 0.30", "fibrocemento 1.83"], (18, 65)),
+}
+PRESENTACIONES = ["", " x 1 kg", " x 5 kg", " x 25 und", " x 100 und", " x 3 m", " x 6 m", " bolsa 42.5 kg", " galón", " balde"]
+
+APELLIDOS = ["Quispe", "Flores", "Sánchez", "Rodríguez", "García", "Rojas", "Huamán", "Chávez", "Ramos",
+             "Torres", "Mamani", "Vásquez", "Castillo", "Díaz", "Mendoza", "Gutiérrez", "Cruz", "Espinoza",
+             "Ñahui", "Peña", "Cárdenas", "Salazar", "Ccori", "Paredes", "Inga", "Valdivia"]
+PREFIJOS = ["Ferretería", "Comercial", "Distribuidora", "Multiservicios", "Inversiones", "Ferretero"]
+SUFIJOS = ["", "", " S.A.C.", " E.I.R.L.", " S.R.L."]
+
+def _productos(n, rng):
+    """(nombre, categoría, marca, precio base) de `n` productos distintos."""
+    combos = [(c, m, v, p) for c, (marcas, variantes, _) in CATEGORIAS.items()
+              for m in marcas for v in variantes for p in PRESENTACIONES]
+    orden = rng.permutation(len(combos))
+    out = []
+    for k in range(n):
+        cat, marca, var, pres = combos[orden[k % len(combos)]]
+        lo, hi = CATEGORIAS[cat][2]
+        nombre = f"{cat} {marca} {var}{pres}" + (f" mod. {k // len(combos)}" if k >= len(combos) else "")
+        out.append((nombre, cat, marca, round(float(np.exp(rng.uniform(np.log(lo), np.log(hi)))), 1)))
+    return out
+
+def catalogo_peru(n_tiendas=300, n_productos=500, cobertura=0.15, semilla=0, bloque=500):
+    """Catálogo sintético con la forma de dinoe.xlsx: dict de DataFrames "productos", "coordenadas"
+    e "informacion" (mismas columnas que las hojas del libro).
+
+    Las tiendas se reparten entre ciudades del Perú según su población, agrupadas alrededor del
+    centro. Cada tienda vende un subconjunto: las tiendas grandes y los productos populares
+    (Zipf) aparecen más, con `cobertura` como fracción media. Los precios varían ±6 % entre tiendas.
+    """
+    rng = np.random.default_rng(semilla)
+    pesos = np.array([c[3] for c in CIUDADES_PERU]); pesos /= pesos.sum()
+    ciudad = rng.choice(len(CIUDADES_PERU), n_tiendas, p=pesos)
+    disp = np.array([c[4] for c in CIUDADES_PERU])[ciudad] / 111.0
+    lats = np.array([c[1] for c in CIUDADES_PERU])[ciudad] + rng.normal(0, 1, n_tiendas) * disp
+    lons = np.array([c[2] for c in CIUDADES_PERU])[ciudad] + rng.normal(0, 1, n_tiendas) * disp / np.cos(np.radians(lats))
+    nombres = [f"{PREFIJOS[rng.integers(len(PREFIJOS))]} {APELLIDOS[rng.integers(len(APELLIDOS))]} "
+               f"{CIUDADES_PERU[c][0]} {i:05d}{SUFIJOS[rng.integers(len(SUFIJOS))]}" for i, c in enumerate(ciudad)]
+
+    productos = _productos(n_productos, rng)
+    base = np.array([p[3] for p in productos])
+    popular = 1.0 / np.arange(1, n_productos + 1) ** 0.8
+    popular = rng.permutation(popular / popular.mean())
+    tamano = rng.lognormal(0, 0.5, n_tiendas); tamano /= tamano.mean()
+
+    partes = []
+    for ini in range(0, n_tiendas, bloque):  # por bloques de tiendas: la matriz de azar no crece con N
+        fin = min(ini + bloque, n_tiendas)
+        prob = np.minimum(1.0, cobertura * np.outer(tamano[ini:fin], popular))
+        t, p = np.nonzero(rng.random((fin - ini, n_productos)) < prob)
+        partes.append((t + ini, p))
+    tienda = np.concatenate([t for t, _ in partes]); prod = np.concatenate([p for _, p in partes])
+    precio = np.round(base[prod] * rng.normal(1, 0.06, len(prod)), 1)
+
+    nombres_arr = np.array(nombres, dtype=object)
+    hoja_precios = pd.DataFrame({
+        "Ferreteria": nombres_arr[tienda],
+        "Categoría": np.array([p[1] for p in productos], dtype=object)[prod],
+        "Producto": np.array([p[0] for p in productos], dtype=object)[prod],
+        "Marca": np.array([p[2] for p in productos], dtype=object)[prod],
+        "Precio Cliente Final en Soles": precio,
+    })
+    hoja_coords = pd.DataFrame({"Nombre del Asociado": nombres,
+                                "Coordenadas": [f"{a:.10f},{b:.10f}" for a, b in zip(lats, lons)]})
+    con_info = rng.random(n_tiendas) < 0.9  # algunas sin ficha, como en el libro real
+    telefonos = rng.integers(900_000_000, 999_999_999, n_tiendas)
+    hoja_info = pd.DataFrame({
+        "Nombre del Asociado:": nombres_arr[con_info],
+        "Dirección tienda:": [f"{['Av.', 'Jr.', 'Calle'][i % 3]} {APELLIDOS[i % len(APELLIDOS)]} {100 + i % 900}"
+                              f" - {CIUDADES_PERU[ciudad[i]][0]}" for i in np.flatnonzero(con_info)],
+        "Cta de abono para la venta:": [f"BCP 191-{t % 10_000_000:07d}-0-{t % 100:02d}" for t in telefonos[con_info]],
+        "Persona de contacto": [f"{APELLIDOS[(i * 7) % len(APELLIDOS)]} {APELLIDOS[(i * 11) % len(APELLIDOS)]}"
+                                for i in np.flatnonzero(con_info)],
+        "Número de Contacto:": telefonos[con_info],
+        "Número o Código Yape / Plin:": telefonos[con_info].astype(float),
+    })
+    return {"productos": hoja_precios, "coordenadas": hoja_coords, "informacion": hoja_info}
+
+def escribir_libro(cat: dict, ruta) -> Path:
+    """Libro Excel con las tres hojas (como dinoe.xlsx). Excel admite hasta 1.048.575 filas por hoja."""
+    with pd.ExcelWriter(ruta, engine="openpyxl") as w:
+        for hoja, df in cat.items():
+            df.to_excel(w, sheet_name=hoja, index=False)
+    return Path(ruta)
+
+def escribir_csv_wkt(cat: dict, ruta) -> Path:
+    """El mismo catálogo como CSV WKT (formato de pruebadino.csv, sin ficha del asociado)."""
+    p = cat["productos"]
+    coords = cat["coordenadas"].set_index("Nombre del Asociado")["Coordenadas"].str.split(",", expand=True).astype(float)
+    lat, lon = coords[0].reindex(p["Ferreteria"]).to_numpy(), coords[1].reindex(p["Ferreteria"]).to_numpy()
+    pd.DataFrame({
+        "WKT": [f"POINT ({b} {a})" for a, b in zip(lat, lon)],
+        "Nombre Grupo Clientes": p["Ferreteria"].str.split(" ").str[1],
+        "Nombre Cliente": p["Ferreteria"],
+        "Producto": p["Producto"], "Precio": p["Precio Cliente Final en Soles"],
+        "Categoria": p["Categoría"], "Marca": p["Marca"],
+    }).to_csv(ruta, index=False)
+    return Path(ruta)
+
+# ===========================
+# RED VIAL (OSM)
+# ===========================
+def osm_grilla(ruta, centro=CENTRO_LIMA, n_calles=60, paso_m=100, semilla=0) -> Path:
+    """Extracto .osm de un damero de n_calles × n_calles cuadras: una avenida de doble sentido cada
+    5 calles y el resto jirones de un solo sentido alternado; más una calle suelta (otra componente)."""
+    rng = np.random.default_rng(semilla)
+    dlat = paso_m / 1000 / 111.32
+    dlon = dlat / np.cos(np.radians(centro[0]))
+    lat0 = centro[0] - dlat * n_calles / 2
+    lon0 = centro[1] - dlon * n_calles / 2
+    nid = lambda i, j: 1 + i * n_calles + j
+    lineas = ['<?xml version="1.0" encoding="UTF-8"?>', '<osm version="0.6" generator="datos.py">']
+    for i in range(n_calles):
+        for j in range(n_calles):
+            la = lat0 + i * dlat + rng.normal(0, dlat * 0.05)
+            lo = lon0 + j * dlon + rng.normal(0, dlon * 0.05)
+            lineas.append(f'  <node id="{nid(i, j)}" lat="{la:.7f}" lon="{lo:.7f}"/>')
+    suelta = n_calles * n_calles + 1
+    for k in range(3):
+        lineas.append(f'  <node id="{suelta + k}" lat="{lat0 - 10 * dlat:.7f}" lon="{lon0 + k * dlon:.7f}"/>')
+    way = 1
+    for eje in ("fila", "columna"):
+        for i in range(n_calles):
+            refs = [nid(i, j) if eje == "fila" else nid(j, i) for j in range(n_calles)]
+            avenida = i % 5 == 0
+            tags = {"highway": "primary" if avenida else "residential", "name": f"{eje} {i}"}
+            if not avenida:
+                tags["oneway"] = "yes" if i % 2 else "-1"
+            lineas.append(f'  <way id="{way}">' + "".join(f'<nd ref="{r}"/>' for r in refs)
+                          + "".join(f'<tag k="{k}" v="{v}"/>' for k, v in tags.items()) + "</way>")
+            way += 1
+    lineas.append(f'  <way id="{way}">' + "".join(f'<nd ref="{suelta + k}"/>' for k in range(3))
+                  + '<tag k="highway" v="residential"/></way>')
+    lineas.append(f'  <way id="{way + 1}"><nd ref="{nid(0, 0)}"/><nd ref="{nid(0, 1)}"/>'
+                  '<tag k="waterway" v="canal"/></way>')
+    lineas.append("</osm>")
+    Path(ruta).write_text("\n".join(lineas), encoding="utf-8")
+    return Path(ruta)
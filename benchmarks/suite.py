@@ -0,0 +1,176 @@
+# benchmarks/suite.py
+# Tiempo y memoria pico de cada etapa de la cotización (leer la fuente, snapshot, índices, radio,
+# ranking, reparto, mapa, PDF) sobre catálogos sintéticos de varios tamaños con tiendas en ciudades
+# del Perú. Deja un reporte JSON/CSV para comparar versiones (por defecto en reportes_benchmarks/, que
+# no se versiona).
+#   python benchmarks/suite.py [--tamanos chico,mediano] [--json reporte.json] [--csv reporte.csv]
+#   python benchmarks/suite.py --comparar antes.json despues.json
+# La memoria pico es la de tracemalloc (Python + NumPy + pandas), medida en una pasada aparte
+# para no inflar los tiempos; no ve lo que reserva Arrow por fuera.
+import argparse
+import csv
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from datos import catalogo_peru, escribir_csv_wkt, escribir_libro
+
+from catalogo import cargar_catalogo, compilar, leer_fuente
+from mapa import CapaTiendas, callback_marcador, datos_capa_tiendas, mapa_base
+from motor import Cotizador
+from proforma import pdf_proforma_bytes
+
+RAIZ = Path(__file__).resolve().parents[1]
+REPORTES = RAIZ / "reportes_benchmarks"
+
+TAMANOS = {
+    "chico": dict(n_tiendas=60, n_productos=400, cobertura=0.25),        # ≈ 6 mil filas
+    "mediano": dict(n_tiendas=600, n_productos=2_000, cobertura=0.12),   # ≈ 140 mil
+    "grande": dict(n_tiendas=3_000, n_productos=4_000, cobertura=0.08),  # ≈ 1 millón
+}
+MAX_FILAS_LIBRO = 200_000  # más que esto en xlsx tarda minutos (y Excel corta en 1.048.575)
+RADIO_KM = 5
+ITEMS_CARRITO = 6
+COLUMNAS = ["tamano", "filas", "tiendas", "productos", "etapa", "llamadas", "seg_mediana", "seg_p90", "pico_mb"]
+
+def medir(fn, llamadas=1, repeticiones=3, memoria=True) -> dict:
+    """Tiempo por llamada de fn(i), i = 0..llamadas-1, en `repeticiones` pasadas; pico de una pasada."""
+    tiempos = []
+    for _ in range(repeticiones):
+        for i in range(llamadas):
+            t0 = time.perf_counter()
+            fn(i)
+            tiempos.append(time.perf_counter() - t0)
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        for i in range(llamadas):
+            fn(i)
+        pico = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return {"llamadas": len(tiempos), "seg_mediana": statistics.median(tiempos),
+            "seg_p90": float(np.quantile(tiempos, 0.9)), "pico_mb": pico}
+
+def consultas(motor: Cotizador, n, semilla=1):
+    """Puntos cerca de tiendas al azar y carritos con productos que se venden ahí."""
+    rng = np.random.default_rng(semilla)
+    t = rng.integers(len(motor.indice), size=n)
+    lats = motor.indice.lats[t] + rng.normal(0, 0.01, n)
+    lons = motor.indice.lons[t] + rng.normal(0, 0.01, n)
+    matriz = motor.matriz
+    carritos = []
+    for i in t:
+        vende = np.flatnonzero(~np.isnan(matriz.precios[i]))
+        elegidos = rng.choice(vende, size=min(ITEMS_CARRITO, len(vende)), replace=False)
+        carritos.append({matriz.productos[j]: int(rng.integers(1, 20)) for j in elegidos})
+    return lats.tolist(), lons.tolist(), carritos
+
+def etapas(nombre, params, tmp: Path, repeticiones, memoria):
+    cat = catalogo_peru(**params)
+    filas = len(cat["productos"])
+    libro = escribir_libro(cat, tmp / f"{nombre}.xlsx") if filas <= MAX_FILAS_LIBRO else None
+    fuente = escribir_csv_wkt(cat, tmp / f"{nombre}.csv")
+    del cat
+
+    def fila(etapa, r):
+        return {"tamano": nombre, "filas": filas, "tiendas": params["n_tiendas"],
+                "productos": params["n_productos"], "etapa": etapa, **r}
+
+    if libro is not None:
+        yield fila("leer_libro", medir(lambda i: leer_fuente(libro), repeticiones=1, memoria=memoria))
+    yield fila("leer_csv", medir(lambda i: leer_fuente(fuente), repeticiones=repeticiones, memoria=memoria))
+    yield fila("compilar_snapshot", medir(lambda i: compilar(fuente), repeticiones=repeticiones, memoria=memoria))
+    yield fila("abrir_snapshot", medir(lambda i: cargar_catalogo(fuente), repeticiones=repeticiones, memoria=memoria))
+    catalogo = cargar_catalogo(fuente)
+    yield fila("indices", medir(lambda i: Cotizador(catalogo), repeticiones=repeticiones, memoria=memoria))
+
+    motor = Cotizador(catalogo)
+    n = 100
+    lats, lons, carritos = consultas(motor, n)
+    yield fila("en_radio", medir(lambda i: motor.en_radio(lats[i], lons[i], RADIO_KM),
+                                 llamadas=n, repeticiones=repeticiones, memoria=memoria))
+    yield fila("cotizar", medir(lambda i: motor.cotizar(lats[i], lons[i], RADIO_KM, carritos[i], top=10),
+                                llamadas=n, repeticiones=repeticiones, memoria=memoria))
+    yield fila("repartir", medir(lambda i: motor.repartir(lats[i], lons[i], RADIO_KM, carritos[i], k=2),
+                                 llamadas=n // 5, repeticiones=repeticiones, memoria=memoria))
+
+    def mapa(i):
+        m = mapa_base(lats[i], lons[i], 13)
+        CapaTiendas(datos_capa_tiendas(motor.indice), callback_marcador()).add_to(m)
+        return m.get_root().render()
+    yield fila("mapa", medir(mapa, repeticiones=repeticiones, memoria=memoria))
+
+    fichas = [r[0] for r in (motor.cotizar(lats[i], lons[i], RADIO_KM, carritos[i], top=1) for i in range(n)) if r][:10]
+    if not fichas:  # ninguna consulta con tiendas en el radio: no hay proforma que medir
+        return
+    yield fila("pdf", medir(lambda i: pdf_proforma_bytes(fichas[i], {"lat": lats[i], "lon": lons[i]}),
+                            llamadas=len(fichas), repeticiones=repeticiones, memoria=memoria))
+
+def metadatos() -> dict:
+    try:
+        commit = subprocess.run(["git", "-C", str(RAIZ), "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"fecha": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit, "python": platform.python_version(),
+            "numpy": np.__version__, "pandas": pd.__version__, "plataforma": platform.platform(),
+            "procesador": platform.processor() or platform.machine()}
+
+def comparar(antes: Path, despues: Path, umbral=1.2):
+    """Cociente después/antes del tiempo mediano y del pico por (tamaño, etapa); marca las regresiones."""
+    a, d = (json.loads(Path(p).read_text(encoding="utf-8")) for p in (antes, despues))
+    previos = {(r["tamano"], r["etapa"]): r for r in a["resultados"]}
+    print(f"antes: {a['meta'].get('commit')}  después: {d['meta'].get('commit')}")
+    print(f"{'tamaño':<8} {'etapa':<18} | {'antes':>10} | {'después':>10} | {'×tiempo':>7} | {'×memoria':>8}")
+    for r in d["resultados"]:
+        p = previos.get((r["tamano"], r["etapa"]))
+        if p is None:
+            continue
+        rt = r["seg_mediana"] / p["seg_mediana"] if p["seg_mediana"] else float("nan")
+        rm = r["pico_mb"] / p["pico_mb"] if r["pico_mb"] and p["pico_mb"] else float("nan")
+        marca = "  <- más lento" if rt > umbral else ""
+        print(f"{r['tamano']:<8} {r['etapa']:<18} | {p['seg_mediana'] * 1e3:8.2f}ms | {r['seg_mediana'] * 1e3:8.2f}ms |"
+              f" {rt:6.2f}x | {rm:7.2f}x{marca}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tamanos", default="chico,mediano", help=f"de {', '.join(TAMANOS)}")
+    ap.add_argument("--repeticiones", type=int, default=3)
+    ap.add_argument("--sin-memoria", action="store_true", help="no medir el pico (la pasada con tracemalloc es lenta)")
+    ap.add_argument("--json", help=f"por defecto {REPORTES.relative_to(RAIZ)}/<fecha>.json")
+    ap.add_argument("--csv")
+    ap.add_argument("--comparar", nargs=2, metavar=("ANTES", "DESPUES"))
+    a = ap.parse_args(argv)
+    if a.comparar:
+        return comparar(*a.comparar)
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for nombre in a.tamanos.split(","):
+            for r in etapas(nombre, TAMANOS[nombre], Path(tmp), a.repeticiones, not a.sin_memoria):
+                resultados.append(r)
+                pico = f"{r['pico_mb']:8.1f}MB" if r["pico_mb"] is not None else ""
+                print(f"{nombre:<8} {r['filas']:>9,} filas  {r['etapa']:<18} {r['seg_mediana'] * 1e3:10.2f} ms"
+                      f"  (p90 {r['seg_p90'] * 1e3:.2f})  {pico}", flush=True)
+
+    if a.json is None:
+        REPORTES.mkdir(exist_ok=True)
+        a.json = REPORTES / time.strftime("%Y%m%d-%H%M%S.json")
+    Path(a.json).write_text(json.dumps({"meta": metadatos(), "resultados": resultados}, indent=1), encoding="utf-8")
+    if a.csv:
+        with open(a.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=COLUMNAS)
+            w.writeheader()
+            w.writerows(resultados)
+    print(f"reporte: {a.json}" + (f", {a.csv}" if a.csv else ""))
+
+if __name__ == "__main__":
+    main()
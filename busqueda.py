@@ -0,0 +1,167 @@
+# busqueda.py
+# Índice de búsqueda del catálogo: facetas categoría → marca → producto y un índice invertido
+# (tokens + trigramas) sin tildes, con coincidencia exacta, por prefijo, por infijo y con errores de tipeo.
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from catalogo import normalize_name
+
+RE_TOKEN = re.compile(r"[A-Z0-9]+(?:[./][A-Z0-9]+)*")
+
+# Puntaje de un token de la consulta según cómo coincide con un término del producto.
+PUNTAJE = {"exacto": 1.0, "prefijo": 0.8, "infijo": 0.6, "tipeo": 0.5}
+
+def tokens(texto) -> list:
+    """Tokens normalizados ("Fierro A.A barra 5/8" → FIERRO, A.A, BARRA, 5/8) más las partes de
+    los compuestos (A, 5, 8), para que "clavo 3" encuentre "Clavo 3/8"."""
+    out = []
+    for t in RE_TOKEN.findall(normalize_name(texto)):
+        out.append(t)
+        if "." in t or "/" in t:
+            out.extend(p for p in re.split(r"[./]", t) if p)
+    return out
+
+def trigramas(termino: str) -> set:
+    return {termino[i:i + 3] for i in range(len(termino) - 2)}
+
+def max_errores(termino: str) -> int:
+    return 0 if len(termino) < 4 else 1 if len(termino) < 8 else 2
+
+def distancia_edicion(a: str, b: str, tope: int) -> int:
+    """Levenshtein con transposiciones adyacentes; devuelve tope + 1 apenas se pasa del tope."""
+    if abs(len(a) - len(b)) > tope:
+        return tope + 1
+    previa2 = None
+    previa = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        fila = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            costo = a[i - 1] != b[j - 1]
+            fila[j] = min(previa[j] + 1, fila[j - 1] + 1, previa[j - 1] + costo)
+            if previa2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                fila[j] = min(fila[j], previa2[j - 2] + 1)
+        if min(fila) > tope:
+            return tope + 1
+        previa2, previa = previa, fila
+    return previa[-1]
+
+class IndiceCatalogo:
+    """Se arma una vez por carga de datos; las consultas no recorren los precios.
+
+    Los productos se numeran en orden alfabético, así cualquier subconjunto ordenado por id
+    sale ya ordenado por nombre (el orden de la grilla sin búsqueda).
+    """
+
+    def __init__(self, productos: list, pares: pd.DataFrame):
+        self.productos = productos
+        # facetas: (categoría | None, marca | None) → ids de producto, None = "todas"
+        self._facetas = {}
+        for clave, g in [((None, None), pares)] + \
+                        [((c, None), g) for c, g in pares.groupby("Categoria", sort=False)] + \
+                        [((None, m), g) for m, g in pares.groupby("Marca", sort=False)] + \
+                        [((c, m), g) for (c, m), g in pares.groupby(["Categoria", "Marca"], sort=False)]:
+            self._facetas[clave] = np.unique(g["pid"].to_numpy())
+        self.categorias = sorted(pares["Categoria"].dropna().unique().tolist())
+        self._marcas = {None: sorted(pares["Marca"].dropna().unique().tolist())}
+        for c, g in pares.groupby("Categoria", sort=False):
+            self._marcas[c] = sorted(g["Marca"].dropna().unique().tolist())
+
+        # término → ids de producto; vocabulario ordenado para prefijos; trigramas → términos
+        postings = defaultdict(set)
+        for pid, nombre in enumerate(productos):
+            for t in tokens(nombre):
+                postings[t].add(pid)
+        self.vocabulario = sorted(postings)
+        self._postings = [np.array(sorted(postings[t])) for t in self.vocabulario]
+        self._termino_id = {t: i for i, t in enumerate(self.vocabulario)}
+        tri = defaultdict(list)
+        for i, t in enumerate(self.vocabulario):
+            for g in trigramas(t):
+                tri[g].append(i)
+        self._trigramas = {g: np.array(v) for g, v in tri.items()}
+
+    @classmethod
+    def desde_catalogo(cls, catalogo):
+        """Con los ids de producto del catálogo (ya en orden alfabético)."""
+        p = catalogo.precios
+        # un par (producto, categoría, marca) por combinación: el catálogo repite cada producto en cada tienda
+        pares = p[["producto"] + [c for c in ("Categoria", "Marca") if c in p]].drop_duplicates()
+        pares = pares.rename(columns={"producto": "pid"})
+        for c in ("Categoria", "Marca"):
+            # etiquetas en texto tal cual, NaN = sin categoría/marca
+            pares[c] = pares[c].astype(object) if c in pares else None
+        return cls(catalogo.productos, pares)
+
+    def marcas(self, categoria=None) -> list:
+        return self._marcas.get(categoria, [])
+
+    def _ids(self, categoria=None, marca=None):
+        return self._facetas.get((categoria, marca), np.array([], dtype=np.int64))
+
+    def productos_de(self, categoria=None, marca=None) -> list:
+        return [self.productos[i] for i in self._ids(categoria, marca)]
+
+    def _coincidencias(self, q: str) -> dict:
+        """término_id → puntaje para un token de la consulta."""
+        out = {}
+        i = self._termino_id.get(q)
+        if i is not None:
+            out[i] = PUNTAJE["exacto"]
+        ini = bisect_left(self.vocabulario, q)
+        for j in range(ini, len(self.vocabulario)):
+            if not self.vocabulario[j].startswith(q):
+                break
+            out.setdefault(j, PUNTAJE["prefijo"])
+        grams = trigramas(q)
+        if grams:
+            listas = [self._trigramas.get(g) for g in grams]
+            if all(l is not None for l in listas):
+                comunes = listas[0]
+                for l in listas[1:]:
+                    comunes = np.intersect1d(comunes, l, assume_unique=True)
+                for j in comunes.tolist():
+                    if q in self.vocabulario[j]:
+                        out.setdefault(j, PUNTAJE["infijo"])
+            tope = max_errores(q)
+            if tope and not out:
+                # candidatos: términos que comparten algún trigrama; se verifican con la distancia
+                vistos = set()
+                for l in listas:
+                    if l is not None:
+                        vistos.update(l.tolist())
+                for j in vistos:
+                    termino = self.vocabulario[j]
+                    # contra el término entero o un prefijo suyo ("cemnt" → CEMENTO)
+                    d = min(distancia_edicion(q, termino[:k], tope)
+                            for k in range(max(1, len(q) - tope), min(len(termino), len(q) + tope) + 1))
+                    if d <= tope:
+                        out[j] = PUNTAJE["tipeo"] - 0.1 * d
+        return out
+
+    def buscar(self, consulta: str, categoria=None, marca=None, limite=None) -> list:
+        """Productos de la faceta que coinciden con todos los tokens de la consulta, del mejor al peor.
+
+        Sin consulta devuelve la faceta completa en orden alfabético.
+        """
+        ids = self._ids(categoria, marca)
+        qs = list(dict.fromkeys(RE_TOKEN.findall(normalize_name(consulta or ""))))
+        if not qs:
+            return [self.productos[i] for i in ids[:limite]]
+        puntaje = np.zeros(len(self.productos))
+        vivos = np.zeros(len(self.productos), dtype=bool); vivos[ids] = True
+        for q in qs:
+            mejor = np.zeros(len(self.productos))
+            for j, p in self._coincidencias(q).items():
+                post = self._postings[j]
+                mejor[post] = np.maximum(mejor[post], p)
+            vivos &= mejor > 0
+            puntaje += mejor
+        cand = np.flatnonzero(vivos)
+        largo = np.array([len(self.productos[i]) for i in cand])
+        # mejor puntaje primero; a igual puntaje, nombres más cortos (más específicos) y luego alfabético
+        orden = np.lexsort((cand, largo, -puntaje[cand]))
+        return [self.productos[i] for i in cand[orden][:limite]]
@@ -0,0 +1,499 @@
+# catalogo.py
+# Lectura del catálogo (dinoe.xlsx o CSV WKT), modelo normalizado (tiendas / productos / precios por id)
+# y snapshot columnar para no re-parsear el Excel en cada arranque.
+#   python catalogo.py dinoe.xlsx      → compila dinoe.snapshot/
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from geo import TeselasTiendas
+from metricas import medido
+
+SNAPSHOT_VERSION = 3
+
+class CatalogoError(Exception):
+    def __init__(self, mensaje, hojas=None):
+        super().__init__(mensaje)
+        self.hojas = hojas or {}
+
+# ===========================
+# HELPERS
+# ===========================
+def _sin_marcas(s: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+
+# Latin-1 + Latin Extended: tabla de traducción precalculada (mismo resultado que NFD sin marcas).
+_SIN_TILDES = {i: _sin_marcas(chr(i)) for i in range(0x250) if _sin_marcas(chr(i)) != chr(i)}
+
+def quitar_tildes(s: str) -> str:
+    if s.isascii():
+        return s
+    if max(s) < "\u0250":
+        return s.translate(_SIN_TILDES)
+    return _sin_marcas(s)
+
+def normalize_name(s: str) -> str:
+    if pd.isna(s):
+        return ""
+    s = str(s).strip()
+    s = quitar_tildes(s)
+    s = " ".join(s.split())
+    return s.upper()
+
+def normalizar_serie(s: pd.Series) -> pd.Series:
+    """`s.apply(normalize_name)` normalizando cada valor distinto una sola vez."""
+    codigos, unicos = pd.factorize(s, use_na_sentinel=True)
+    tabla = np.array([normalize_name(u) for u in unicos] + [""], dtype=object)
+    return pd.Series(tabla[codigos], index=s.index, name=s.name)
+
+def parse_pares(s: pd.Series) -> pd.DataFrame:
+    """Columnas latitud/longitud desde textos "lat,lon" (NaN si no se pueden leer ambos)."""
+    partes = s.astype("string").str.replace(" ", "", regex=False).str.strip() \
+        .str.extract(r"^([^,]*),([^,]*)")
+    lat = pd.to_numeric(partes[0], errors="coerce").astype(float)
+    lon = pd.to_numeric(partes[1], errors="coerce").astype(float)
+    malo = lat.isna() | lon.isna()
+    return pd.DataFrame({"latitud": lat.mask(malo), "longitud": lon.mask(malo)}, index=s.index)
+
+def _norm_header(s: str) -> str:
+    if s is None: return ""
+    s = quitar_tildes(str(s))
+    s = re.sub(r"[:;,\.\-–—]+", " ", s)
+    s = " ".join(s.strip().upper().split())
+    return s
+
+def resolve_col(df: pd.DataFrame, aliases: list[str]) -> str | None:
+    norm_cols = {_norm_header(c): c for c in df.columns}
+    for a in aliases:
+        a_norm = _norm_header(a)
+        if a_norm in norm_cols:
+            return norm_cols[a_norm]
+    for a in aliases:
+        a_norm = _norm_header(a)
+        for nc, real in norm_cols.items():
+            if a_norm in nc:
+                return real
+    return None
+
+# ===========================
+# LECTURA EXCEL
+# ===========================
+def leer_libro(path):
+    """(base, precios_df, coords_df, info_df, info_lookup, avisos) a partir del Excel."""
+    xls = pd.ExcelFile(path)
+    frames = {sh: pd.read_excel(xls, sh) for sh in xls.sheet_names}
+    hojas = {sh: list(df.columns) for sh, df in frames.items()}
+    avisos = []
+
+    # PRECIOS
+    precios_df = None
+    for sh, df in frames.items():
+        cols_lc = {c.lower().strip(): c for c in df.columns}
+        def pick(*names):
+            for n in names:
+                if n.lower() in cols_lc: return cols_lc[n.lower()]
+            return None
+        col_f    = pick("Ferreteria", "Ferretería", "ferreteria")
+        col_prod = pick("Producto", "producto")
+        col_prec = pick("Precio Cliente Final en Soles", "Precio Cliente Final", "Precio", "precio")
+        if col_f and col_prod and col_prec:
+            col_cat  = pick("Categoría", "Categoria", "categoria")
+            col_marc = pick("Marca", "marca")
+            rename_map = {col_f:"Ferreteria", col_prod:"Producto", col_prec:"Precio"}
+            if col_cat:  rename_map[col_cat]  = "Categoria"
+            if col_marc: rename_map[col_marc] = "Marca"
+            precios_df = df.rename(columns=rename_map).copy()
+            precios_df["Precio"] = pd.to_numeric(precios_df["Precio"], errors="coerce")
+            precios_df["__JOIN_KEY__"] = normalizar_serie(precios_df["Ferreteria"])
+            break
+
+    # COORDENADAS
+    coords_df = None
+    for sh, df in frames.items():
+        cols = {c.strip(): c for c in df.columns}
+        if any(k in cols for k in ["Nombre del Asociado", "nombre del asociado"]) and \
+           any(k in cols for k in ["Coordenadas", "coordenadas"]):
+            col_name  = next(cols[k] for k in ["Nombre del Asociado", "nombre del asociado"] if k in cols)
+            col_coord = next(cols[k] for k in ["Coordenadas", "coordenadas"] if k in cols)
+            tmp = df[[col_name, col_coord]].copy().rename(columns={
+                col_name: "Nombre del Asociado",
+                col_coord: "Coordenadas"
+            })
+            tmp[["latitud","longitud"]] = parse_pares(tmp["Coordenadas"])
+            tmp["__JOIN_KEY__"] = normalizar_serie(tmp["Nombre del Asociado"])
+            coords_df = tmp[["Nombre del Asociado","latitud","longitud","__JOIN_KEY__"]].dropna(subset=["latitud","longitud"])
+            break
+
+    # INFORMACIÓN ASOCIADO
+    info_df = None
+    A_NOMBRE   = ["Nombre del Asociado", "Nombre del Asociado:"]
+    A_DIR      = ["Dirección tienda", "Direccion tienda", "Dirección tienda:", "Direccion tienda:"]
+    A_CTA      = ["Cta de abono para la venta", "Cuenta de abono para la venta", "Cta de abono para la venta:"]
+    A_CONTACTO = ["Persona de contacto", "Persona de contacto:"]
+    A_NUM      = ["Número de Contacto", "Numero de Contacto", "Celular", "Telefono", "Número de Contacto:"]
+    A_YAPE     = ["Número o Código Yape / Plin", "Numero o Codigo Yape / Plin", "Yape", "Plin", "Yape / Plin", "Número o Código Yape / Plin:"]
+
+    for sh, df in frames.items():
+        c_nombre = resolve_col(df, A_NOMBRE)
+        c_dir    = resolve_col(df, A_DIR)
+        c_cta    = resolve_col(df, A_CTA)
+        c_pers   = resolve_col(df, A_CONTACTO)
+        c_num    = resolve_col(df, A_NUM)
+        c_yape   = resolve_col(df, A_YAPE)
+        needed_cols = [c_nombre, c_dir, c_cta, c_pers, c_num, c_yape]
+        if all(c is not None for c in needed_cols):
+            info_df = df.rename(columns={
+                c_nombre: "Nombre del Asociado",
+                c_dir:    "Dirección tienda",
+                c_cta:    "Cta de abono para la venta",
+                c_pers:   "Persona de contacto",
+                c_num:    "Número de Contacto",
+                c_yape:   "Número o Código Yape / Plin",
+            })[[
+                "Nombre del Asociado",
+                "Dirección tienda",
+                "Cta de abono para la venta",
+                "Persona de contacto",
+                "Número de Contacto",
+                "Número o Código Yape / Plin",
+            ]].copy()
+            info_df["__JOIN_KEY__"] = normalizar_serie(info_df["Nombre del Asociado"])
+            break
+
+    if precios_df is None:
+        raise CatalogoError("No encontré la hoja de PRECIOS (Ferreteria, Producto, Precio...).", hojas)
+    if coords_df is None:
+        raise CatalogoError("No encontré la hoja de COORDENADAS (Nombre del Asociado, Coordenadas).", hojas)
+    if info_df is None:
+        avisos.append("No encontré la hoja de INFORMACIÓN del asociado. La cotización saldrá sin ficha del asociado.")
+
+    base, info_lookup, mas_avisos = armar_base(precios_df, coords_df, info_df)
+    return base, precios_df, coords_df, (info_df if info_df is not None else pd.DataFrame()), info_lookup, avisos + mas_avisos
+
+def armar_base(precios_df, coords_df, info_df):
+    """Une precios con coordenadas y arma `info_lookup` por __JOIN_KEY__."""
+    avisos = []
+    base = precios_df.merge(
+        coords_df[["__JOIN_KEY__","latitud","longitud"]],
+        left_on="__JOIN_KEY__", right_on="__JOIN_KEY__", how="left"
+    ).drop(columns=["__JOIN_KEY__"])
+
+    faltan = base["latitud"].isna().sum()
+    if faltan > 0:
+        avisos.append(f"{faltan} registros no obtuvieron coordenadas. Verifica que 'Ferreteria' ≡ 'Nombre del Asociado'.")
+
+    info_lookup = {}
+    if info_df is not None and not info_df.empty:
+        registros = info_df.drop(columns="__JOIN_KEY__").to_dict("records")
+        info_lookup = {
+            k: {
+                "Nombre del Asociado": r.get("Nombre del Asociado",""),
+                "Dirección tienda": r.get("Dirección tienda",""),
+                "Cta de abono para la venta": r.get("Cta de abono para la venta",""),
+                "Persona de contacto": r.get("Persona de contacto",""),
+                "Número de Contacto": str(r.get("Número de Contacto","")),
+                "Número o Código Yape / Plin": str(r.get("Número o Código Yape / Plin","")),
+            }
+            for k, r in zip(info_df["__JOIN_KEY__"], registros)
+        }
+    return base, info_lookup, avisos
+
+# ===========================
+# LECTURA CSV WKT (por bloques)
+# ===========================
+# WKT,Nombre Grupo Clientes,Nombre Cliente,Producto,Precio — un punto "POINT (lon lat)" por fila.
+RE_POINT = r"POINT\s*\(\s*([-+\d.eE]+)\s+([-+\d.eE]+)\s*\)"
+C_WKT      = ["WKT", "Geometria", "Geometría"]
+C_CLIENTE  = ["Nombre Cliente", "Ferreteria", "Ferretería", "Nombre del Asociado"]
+C_GRUPO    = ["Nombre Grupo Clientes", "Grupo"]
+C_PRODUCTO = ["Producto"]
+C_PRECIO   = ["Precio Cliente Final en Soles", "Precio"]
+C_CATEG    = ["Categoría", "Categoria"]
+C_MARCA    = ["Marca"]
+
+def _concat_categorias(partes: list[pd.DataFrame]) -> pd.DataFrame:
+    if not partes:
+        return pd.DataFrame()
+    out = {}
+    for col in partes[0].columns:
+        if isinstance(partes[0][col].dtype, pd.CategoricalDtype):
+            out[col] = pd.api.types.union_categoricals([p[col] for p in partes])
+        else:
+            out[col] = np.concatenate([p[col].to_numpy() for p in partes])
+    return pd.DataFrame(out)
+
+def leer_csv_wkt(path, chunksize=100_000):
+    """Mismo resultado que `leer_libro` para un CSV con geometría WKT, leído por bloques.
+
+    Cada bloque se parsea con una sola extracción de regex y sus textos pasan a categóricos,
+    así la memoria pico queda acotada al bloque más las tablas ya compactadas.
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        cabecera = f.readline()
+    sep = csv.Sniffer().sniff(cabecera, delimiters=",;\t|").delimiter
+    cols = pd.read_csv(path, sep=sep, nrows=0, encoding="utf-8-sig")
+    c = {k: resolve_col(cols, a) for k, a in [
+        ("wkt", C_WKT), ("cliente", C_CLIENTE), ("grupo", C_GRUPO), ("producto", C_PRODUCTO),
+        ("precio", C_PRECIO), ("categoria", C_CATEG), ("marca", C_MARCA)]}
+    if not (c["wkt"] and c["cliente"] and c["producto"] and c["precio"]):
+        raise CatalogoError("El CSV no tiene las columnas WKT, Nombre Cliente, Producto y Precio.",
+                            {Path(path).name: list(cols.columns)})
+    nombres = {c["cliente"]: "Ferreteria", c["producto"]: "Producto", c["precio"]: "Precio",
+               c["grupo"]: "Grupo", c["categoria"]: "Categoria", c["marca"]: "Marca"}
+    nombres.pop(None, None)
+
+    partes, tiendas = [], set()
+    for bloque in pd.read_csv(path, sep=sep, chunksize=chunksize, encoding="utf-8-sig",
+                              usecols=[c["wkt"], *nombres], dtype=str):
+        punto = bloque[c["wkt"]].str.extract(RE_POINT)
+        bloque = bloque.drop(columns=c["wkt"]).rename(columns=nombres)
+        bloque["Precio"] = pd.to_numeric(bloque["Precio"], errors="coerce").astype(float)
+        bloque["__JOIN_KEY__"] = normalizar_serie(bloque["Ferreteria"])
+        bloque["latitud"] = pd.to_numeric(punto[1], errors="coerce")
+        bloque["longitud"] = pd.to_numeric(punto[0], errors="coerce")
+        for col in bloque.columns:
+            if col not in ("Precio", "latitud", "longitud"):
+                bloque[col] = bloque[col].astype("category")
+        unicas = bloque[["Ferreteria", "latitud", "longitud", "__JOIN_KEY__"]].dropna().drop_duplicates()
+        tiendas.update(unicas.itertuples(index=False, name=None))
+        partes.append(bloque)
+
+    todo = _concat_categorias(partes)
+    if todo.empty:
+        raise CatalogoError("El CSV no tiene filas.", {Path(path).name: list(cols.columns)})
+    precios_df = todo.drop(columns=["latitud", "longitud"])
+    base = todo.drop(columns=["__JOIN_KEY__"])
+    coords_df = pd.DataFrame(sorted(tiendas, key=lambda t: (str(t[0]), t[1], t[2])),
+                             columns=["Nombre del Asociado", "latitud", "longitud", "__JOIN_KEY__"]) \
+        .drop_duplicates().reset_index(drop=True)
+    avisos = ["El CSV no trae información del asociado. La cotización saldrá sin ficha del asociado."]
+    faltan = base["latitud"].isna().sum()
+    if faltan > 0:
+        avisos.append(f"{faltan} registros no tienen un POINT válido en la columna WKT.")
+    return base, precios_df, coords_df, pd.DataFrame(), {}, avisos
+
+# ===========================
+# FUENTES
+# ===========================
+FUENTES = {".xlsx": leer_libro, ".xlsm": leer_libro, ".xls": leer_libro, ".csv": leer_csv_wkt}
+
+@medido("catalogo.leer_fuente")
+def leer_fuente(path) -> "Catalogo":
+    lector = FUENTES.get(Path(path).suffix.lower())
+    if lector is None:
+        raise CatalogoError(f"Formato de catálogo no soportado: {Path(path).name}")
+    base, _, _, _, info_lookup, avisos = lector(path)
+    cat = Catalogo.desde_base(base, info_lookup, avisos)
+    cat.teselas = TeselasTiendas.desde_tiendas(cat.tiendas)
+    return cat
+
+# ===========================
+# MODELO NORMALIZADO
+# ===========================
+# Los lectores devuelven `base` (una fila por precio, con el nombre de la tienda, del producto y las
+# coordenadas repetidos en cada fila). El resto del código trabaja con el modelo: cada tienda y cada
+# producto una vez, y los precios como ids enteros.
+CAMPOS_INFO = ["Nombre del Asociado", "Dirección tienda", "Cta de abono para la venta",
+               "Persona de contacto", "Número de Contacto", "Número o Código Yape / Plin"]
+
+def _ids_texto(s: pd.Series):
+    """(ids int32, valores): cada valor distinto como texto, numerados en orden alfabético; NaN → -1."""
+    s = s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")
+    if not len(s.cat.categories):
+        return np.full(len(s), -1, dtype=np.int32), []
+    # por categoría (no por fila): dos categorías pueden dar el mismo texto (1 y "1")
+    id_categoria, valores = pd.factorize(s.cat.categories.astype(str), sort=True)
+    codigos = s.cat.codes.to_numpy()
+    return np.where(codigos >= 0, id_categoria[codigos], -1).astype(np.int32), list(valores)
+
+def fichas_asociado(tiendas: pd.DataFrame) -> list:
+    """Ficha del asociado de cada tienda de `tiendas` (dict con CAMPOS_INFO, o {} si no tiene)."""
+    if "con_info" not in tiendas:
+        return [{} for _ in range(len(tiendas))]
+    campos = [tiendas[c].tolist() for c in CAMPOS_INFO]
+    return [dict(zip(CAMPOS_INFO, vals)) if ok else {} for ok, *vals in zip(tiendas["con_info"].tolist(), *campos)]
+
+class Catalogo:
+    """Catálogo en memoria, normalizado.
+
+    - `tiendas`: una fila por tienda con coordenadas (su id es la posición), en orden por
+      (Ferreteria, latitud, longitud): nombre, latitud/longitud y la ficha del asociado
+      (CAMPOS_INFO + `con_info`). Las coordenadas quedan en float64: son una vez por tienda, y en
+      float32 una tienda en Perú se movería hasta ~1 m (cambian distancias y desempates).
+    - `productos`: nombres en orden alfabético (id = posición).
+    - `precios`: una fila por precio publicado, ordenadas por tienda: `tienda` (int32, -1 si la
+      tienda no tiene coordenadas), `producto` (int32), `Precio` y, si vienen en la fuente,
+      `Categoria` y `Marca` categóricas. Los precios de la tienda i son `precios[inicio[i]:inicio[i + 1]]`.
+    - `teselas`: geo.TeselasTiendas de las tiendas (tiendas cercanas por celda geohash); se arma
+      al cargar si no vino del snapshot.
+    """
+
+    def __init__(self, tiendas: pd.DataFrame, productos: list, precios: pd.DataFrame, avisos=(), teselas=None):
+        self.tiendas = tiendas
+        self.productos = list(productos)
+        self.precios = precios
+        self.avisos = list(avisos)
+        self.inicio = np.searchsorted(precios["tienda"].to_numpy(), np.arange(len(tiendas) + 1))
+        self.teselas = teselas
+
+    @classmethod
+    def desde_base(cls, base: pd.DataFrame, info_lookup=None, avisos=()):
+        """Normaliza la salida de los lectores: `base` con Ferreteria, Producto, Precio, latitud,
+        longitud (y opcionalmente Categoria, Marca) e `info_lookup` por nombre normalizado."""
+        nombre, nombres = _ids_texto(base["Ferreteria"])
+        producto, productos = _ids_texto(base["Producto"])
+        lat = pd.to_numeric(base["latitud"], errors="coerce").to_numpy(dtype=float)
+        lon = pd.to_numeric(base["longitud"], errors="coerce").to_numpy(dtype=float)
+
+        # una tienda por (nombre, latitud, longitud): el mismo asociado en dos puntos son dos tiendas
+        con_tienda = (nombre >= 0) & ~np.isnan(lat) & ~np.isnan(lon)
+        claves = pd.DataFrame({"n": nombre[con_tienda], "lat": lat[con_tienda], "lon": lon[con_tienda]})
+        unicas = claves.drop_duplicates().sort_values(["n", "lat", "lon"], ignore_index=True)
+        tienda = np.full(len(base), -1, dtype=np.int32)
+        tienda[con_tienda] = pd.MultiIndex.from_frame(unicas).get_indexer(pd.MultiIndex.from_frame(claves))
+
+        tiendas = pd.DataFrame({
+            "Ferreteria": np.array(nombres, dtype=object)[unicas["n"].to_numpy()],
+            "latitud": unicas["lat"].to_numpy(),
+            "longitud": unicas["lon"].to_numpy(),
+        })
+        fichas = [(info_lookup or {}).get(normalize_name(n)) for n in tiendas["Ferreteria"]]
+        tiendas["con_info"] = np.array([f is not None for f in fichas], dtype=bool)
+        for c in CAMPOS_INFO:
+            tiendas[c] = pd.Series([f.get(c) if f else None for f in fichas], dtype=object)
+
+        ok = producto >= 0
+        precios = pd.DataFrame({
+            "tienda": tienda[ok], "producto": producto[ok],
+            "Precio": pd.to_numeric(base["Precio"], errors="coerce").to_numpy(dtype=float)[ok],
+        })
+        for c in ("Categoria", "Marca"):
+            if c in base:
+                ids, valores = _ids_texto(base[c])
+                precios[c] = pd.Categorical.from_codes(ids[ok], categories=valores)
+        # estable: con (tienda, producto) repetidos sigue ganando la última fila de la fuente
+        orden = np.argsort(precios["tienda"].to_numpy(), kind="stable")
+        return cls(tiendas, productos, precios.take(orden).reset_index(drop=True), avisos)
+
+# ===========================
+# SNAPSHOT COLUMNAR
+# ===========================
+# <ruta>.snapshot/manifest.json + un .npy por columna del modelo (y por arreglo de las teselas). Las
+# columnas numéricas y los códigos de las categóricas se abren con mmap; las de texto se guardan
+# como códigos int32 + tabla de strings en el manifest.
+TABLAS = ("tiendas", "precios")
+
+def ruta_snapshot(path) -> Path:
+    return Path(path).with_suffix(".snapshot")
+
+def hash_archivo(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _valor_json(v):
+    if isinstance(v, (np.integer, np.floating, np.bool_)):
+        v = v.item()
+    return v if isinstance(v, (str, int, float, bool)) else str(v)
+
+def _guardar_tabla(df: pd.DataFrame, carpeta: Path, nombre: str):
+    columnas = []
+    for k, col in enumerate(df.columns):
+        s = df[col]
+        archivo = f"{nombre}.{k}.npy"
+        meta = {"nombre": col, "archivo": archivo, "dtype": str(s.dtype)}
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            np.save(carpeta / archivo, s.cat.codes.to_numpy())
+            meta["categorias"] = [_valor_json(v) for v in s.cat.categories]
+        elif pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+            np.save(carpeta / archivo, s.to_numpy())
+        else:
+            codigos, cats = pd.factorize(s, use_na_sentinel=True)
+            np.save(carpeta / archivo, codigos.astype(np.int32))
+            meta["categorias"] = [_valor_json(v) for v in cats]
+        columnas.append(meta)
+    np.save(carpeta / f"{nombre}.indice.npy", df.index.to_numpy(dtype=np.int64))
+    return {"filas": len(df), "columnas": columnas, "indice": f"{nombre}.indice.npy"}
+
+def _abrir_tabla(meta, carpeta: Path) -> pd.DataFrame:
+    datos = {}
+    for c in meta["columnas"]:
+        arr = np.load(carpeta / c["archivo"], mmap_mode="r")
+        if c["dtype"] == "category":
+            datos[c["nombre"]] = pd.Series(pd.Categorical.from_codes(arr, categories=c["categorias"]), copy=False)
+        elif "categorias" in c:
+            cats = np.array(c["categorias"] + [np.nan], dtype=object)
+            s = pd.Series(cats[arr], dtype=object)
+            if c["dtype"] != "object":
+                try: s = s.astype(c["dtype"])
+                except (TypeError, ValueError): pass
+            datos[c["nombre"]] = s
+        else:
+            datos[c["nombre"]] = pd.Series(arr, copy=False)
+    if not datos:
+        return pd.DataFrame()
+    df = pd.DataFrame(datos, copy=False)
+    return df.set_axis(pd.Index(np.load(carpeta / meta["indice"])))
+
+def compilar(path, destino=None):
+    """Parsea la fuente y escribe el snapshot (reemplazo atómico de la carpeta)."""
+    destino = Path(destino) if destino else ruta_snapshot(path)
+    fuente_sha = hash_archivo(path)
+    cat = leer_fuente(path)
+    tmp = destino.with_name(destino.name + f".tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True); tmp.mkdir(parents=True)
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "fuente_sha256": fuente_sha,
+        "tablas": {n: _guardar_tabla(getattr(cat, n), tmp, n) for n in TABLAS},
+        "productos": [_valor_json(p) for p in cat.productos],
+        "avisos": cat.avisos,
+        "teselas": cat.teselas.guardar(tmp),
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    viejo = destino.with_name(destino.name + f".old{os.getpid()}")
+    if destino.exists(): destino.rename(viejo)
+    tmp.rename(destino)
+    shutil.rmtree(viejo, ignore_errors=True)
+    return destino
+
+@medido("catalogo.snapshot")
+def abrir_snapshot(path, destino=None):
+    """Catálogo desde el snapshot, o None si no existe o no corresponde a la fuente actual."""
+    destino = Path(destino) if destino else ruta_snapshot(path)
+    try:
+        manifest = json.loads((destino / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != SNAPSHOT_VERSION or manifest.get("fuente_sha256") != hash_archivo(path):
+        return None
+    tiendas, precios = (_abrir_tabla(manifest["tablas"][n], destino) for n in TABLAS)
+    return Catalogo(tiendas, manifest["productos"], precios, manifest["avisos"],
+                    TeselasTiendas.abrir(manifest["teselas"], destino))
+
+def cargar_catalogo(path) -> Catalogo:
+    """Snapshot si está al día; si no, la fuente (y se intenta regenerar el snapshot)."""
+    cat = abrir_snapshot(path)
+    if cat is not None:
+        return cat
+    try:
+        compilar(path)
+        cat = abrir_snapshot(path)
+    except OSError:
+        cat = None
+    return cat if cat is not None else leer_fuente(path)
+
+if __name__ == "__main__":
+    for p in sys.argv[1:] or ["dinoe.xlsx"]:
+        print(f"{p} → {compilar(p)}")
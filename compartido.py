@@ -0,0 +1,224 @@
+# compartido.py
+# Catálogo compartido entre procesos de la misma máquina (varios servidores de Streamlit, workers
+# de la API): un publicador carga el catálogo una vez y lo deja en un archivo de memoria (tmpfs);
+# los demás lo mapean en solo lectura, sin copiar columnas ni la matriz de precios.
+#   python compartido.py dinoe.xlsx      → publica y sigue la fuente hasta Ctrl+C / SIGTERM
+import argparse
+import json
+import mmap
+import os
+import signal
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from catalogo import TABLAS, Catalogo, _valor_json, cargar_catalogo, hash_archivo
+from geo import TeselasTiendas
+from precios import MatrizPrecios
+
+COMPARTIDO_VERSION = 3
+FIRMA = b"DINOCAT1"
+CABECERA = struct.Struct("<8sQQ")  # firma, posición y largo del manifest (JSON, al final)
+ALINEACION = 64
+
+def directorio_compartido() -> Path:
+    """DINO_COMPARTIDO_DIR, o /dev/shm (RAM) si existe, o el temporal del sistema."""
+    d = os.environ.get("DINO_COMPARTIDO_DIR")
+    if d:
+        return Path(d)
+    return Path("/dev/shm") if os.path.isdir("/dev/shm") else Path(tempfile.gettempdir())
+
+def ruta_compartida(version: str) -> Path:
+    # por contenido: un proceso solo se adjunta a la versión exacta de la fuente que ve en disco
+    return directorio_compartido() / f"dino-{version[:24]}.catalogo"
+
+# ===========================
+# ESCRITURA
+# ===========================
+class _Distribucion:
+    """Posiciones (alineadas) de los arreglos dentro del archivo; la cabecera ocupa el primer bloque."""
+
+    def __init__(self):
+        self.arreglos = []
+        self.fin = ALINEACION
+
+    def agregar(self, arr) -> dict:
+        arr = np.ascontiguousarray(arr)
+        pos = -(-self.fin // ALINEACION) * ALINEACION
+        self.arreglos.append((pos, arr))
+        self.fin = pos + arr.nbytes
+        return {"pos": pos, "dtype": arr.dtype.str, "forma": list(arr.shape)}
+
+def _compartible(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas de texto → categóricas: códigos en el archivo, una tabla de strings por proceso."""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        numerica = pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s)
+        out[col] = s if numerica or isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")
+    return pd.DataFrame(out, index=df.index) if out else df
+
+def _tabla(df: pd.DataFrame, dist: _Distribucion) -> dict:
+    columnas = []
+    for col in df.columns:
+        s = df[col]
+        meta = {"nombre": _valor_json(col)}
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            meta["codigos"] = dist.agregar(s.cat.codes.to_numpy())
+            meta["categorias"] = [_valor_json(v) for v in s.cat.categories]
+        else:
+            meta["valores"] = dist.agregar(s.to_numpy())
+        columnas.append(meta)
+    return {"columnas": columnas, "indice": dist.agregar(df.index.to_numpy(dtype=np.int64))}
+
+def publicar(path, version=None) -> Path:
+    """Carga el catálogo (snapshot si está al día) y lo escribe en el directorio compartido,
+    con la matriz de precios ya armada. Reemplazo atómico: nadie ve un archivo a medio escribir."""
+    version = version or hash_archivo(path)
+    cat = cargar_catalogo(path)
+    matriz = MatrizPrecios.desde_catalogo(cat)
+    dist = _Distribucion()
+    manifest = {
+        "version": COMPARTIDO_VERSION,
+        "fuente_sha256": version,
+        "tablas": {n: _tabla(_compartible(getattr(cat, n)), dist) for n in TABLAS},
+        "productos": [_valor_json(p) for p in cat.productos],
+        "matriz": dist.agregar(matriz.precios),
+        "teselas": {"precision": cat.teselas.precision, "radio_km": cat.teselas.radio_km,
+                    **{n: dist.agregar(arr) for n, arr in cat.teselas.arreglos().items()}},
+        "avisos": cat.avisos,
+    }
+    datos = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+    destino = ruta_compartida(version)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_name(destino.name + f".tmp{os.getpid()}")
+    with open(tmp, "wb") as f:
+        f.write(CABECERA.pack(FIRMA, dist.fin, len(datos)))
+        for pos, arr in dist.arreglos:
+            f.seek(pos)
+            arr.tofile(f)
+        f.seek(dist.fin)
+        f.write(datos)
+    os.replace(tmp, destino)
+    return destino
+
+# ===========================
+# LECTURA
+# ===========================
+def _vista(buf, meta) -> np.ndarray:
+    forma = meta["forma"]
+    n = int(np.prod(forma, dtype=np.int64))
+    return np.frombuffer(buf, dtype=np.dtype(meta["dtype"]), count=n, offset=meta["pos"]).reshape(forma)
+
+def _abrir_tabla(meta, buf) -> pd.DataFrame:
+    indice = pd.Index(_vista(buf, meta["indice"]), copy=False)
+    datos = {}
+    for c in meta["columnas"]:
+        if "categorias" in c:
+            valores = pd.Categorical.from_codes(_vista(buf, c["codigos"]), categories=pd.Index(c["categorias"]))
+        else:
+            valores = _vista(buf, c["valores"])
+        datos[c["nombre"]] = pd.Series(valores, index=indice, copy=False)
+    return pd.DataFrame(datos, copy=False) if datos else pd.DataFrame(index=indice)
+
+class CatalogoCompartido:
+    """Catálogo mapeado desde el archivo de un publicador.
+
+    Las columnas numéricas, los códigos de las categóricas y la matriz de precios son vistas de
+    solo lectura sobre el mapeo (las páginas las comparten todos los procesos); cada proceso solo
+    arma las tablas de strings, una entrada por valor distinto. El mapeo vive mientras viva
+    alguna de esas vistas, aunque el publicador ya haya borrado el archivo.
+    """
+
+    def __init__(self, buf, manifest, ruta: Path):
+        self.ruta = ruta
+        self.version = manifest["fuente_sha256"]
+        tiendas, precios = (_abrir_tabla(manifest["tablas"][n], buf) for n in TABLAS)
+        t = manifest["teselas"]
+        teselas = TeselasTiendas(*(_vista(buf, t[n]) for n in ("celdas", "inicio", "tiendas", "cotas")),
+                                 precision=t["precision"], radio_km=t["radio_km"])
+        self._catalogo = Catalogo(tiendas, manifest["productos"], precios, manifest["avisos"], teselas)
+        self._precios = _vista(buf, manifest["matriz"])
+
+    def catalogo(self) -> Catalogo:
+        return self._catalogo
+
+    def matriz(self, indice):
+        """MatrizPrecios sobre el mapeo, o None si no corresponde a `indice`."""
+        if self._precios.shape != (len(indice), len(self._catalogo.productos)):
+            return None
+        return MatrizPrecios(self._precios, self._catalogo.productos)
+
+def adjuntar(version: str, espera_s=0.0):
+    """El catálogo publicado para `version` (sha256 de la fuente), esperándolo hasta `espera_s`;
+    None si no hay publicador para esa versión."""
+    ruta = ruta_compartida(version)
+    limite = time.monotonic() + espera_s
+    while True:
+        try:
+            with open(ruta, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            break
+        except (FileNotFoundError, ValueError):  # ValueError: archivo vacío
+            if time.monotonic() >= limite:
+                return None
+            time.sleep(0.2)
+    firma, pos, largo = CABECERA.unpack_from(buf, 0)
+    if firma != FIRMA:
+        return None
+    manifest = json.loads(buf[pos:pos + largo].decode("utf-8"))
+    if manifest.get("version") != COMPARTIDO_VERSION or manifest.get("fuente_sha256") != version:
+        return None
+    return CatalogoCompartido(buf, manifest, ruta)
+
+# ===========================
+# PUBLICADOR
+# ===========================
+def _publicar_y_abrir(path, version):
+    publicar(path, version)
+    cat = adjuntar(version)
+    if cat is None:
+        raise RuntimeError(f"No se pudo abrir lo publicado en {ruta_compartida(version)}")
+    return cat
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+
+def main(argv=None):
+    from motor import GestorCatalogo  # motor importa este módulo
+
+    ap = argparse.ArgumentParser(description="Publica el catálogo en memoria compartida para los procesos de la app.")
+    ap.add_argument("catalogo", nargs="?", default=os.environ.get("DINO_CATALOGO", "dinoe.xlsx"))
+    ap.add_argument("--intervalo", type=float, default=5.0, help="segundos entre revisiones de la fuente")
+    a = ap.parse_args(argv)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # que el finally borre el archivo
+
+    # misma recarga que la app: espera a que la fuente quede quieta y solo republica si cambió el sha
+    gestor = GestorCatalogo(a.catalogo, intervalo_s=a.intervalo, cargar=_publicar_y_abrir)
+    actual = gestor.actual()
+    print(f"Catálogo publicado en {actual.ruta}", flush=True)
+    try:
+        while True:
+            time.sleep(a.intervalo)
+            nuevo = gestor.actual()
+            if nuevo is not actual:
+                # quien ya lo mapeó lo sigue usando; los que recargan se adjuntan al nuevo
+                _borrar(actual.ruta)
+                actual = nuevo
+                print(f"Catálogo publicado en {actual.ruta}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gestor.detener()
+        _borrar(actual.ruta)
+
+if __name__ == "__main__":
+    main()
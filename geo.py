@@ -0,0 +1,306 @@
+# geo.py
+# Distancias vectorizadas (NumPy) para búsquedas por radio.
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+R_TIERRA_KM = 6371.0088
+# Haversine (esfera) vs. geodésica WGS84: el error relativo no pasa de ~0.5 %.
+# Las tiendas cuya distancia cae en esa banda alrededor del radio se recalculan exactas.
+TOLERANCIA_REL = 0.006
+
+def haversine_km(lat, lon, lats, lons):
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2 = np.radians(np.asarray(lats, dtype=float))
+    lon2 = np.radians(np.asarray(lons, dtype=float))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * R_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def distancias_km(lat, lon, lats, lons, radio_km=None):
+    """Distancias desde (lat, lon) a cada punto. Con `radio_km`, refina con geodesic los puntos cercanos al borde."""
+    d = haversine_km(lat, lon, lats, lons)
+    if radio_km is not None and len(d):
+        borde = np.flatnonzero(np.abs(d - radio_km) <= radio_km * TOLERANCIA_REL)
+        if len(borde):
+            from geopy.distance import geodesic  # ~0.1 s de import; solo hace falta en el borde
+        for i in borde:
+            d[i] = geodesic((lat, lon), (lats[i], lons[i])).kilometers
+    return d
+
+def filas_en_radio(df: pd.DataFrame, lat, lon, radio_km):
+    """Filas de `df` (con latitud/longitud) a <= radio_km, con columna `distancia`.
+
+    La distancia se calcula una vez por coordenada única de tienda y se difunde a sus filas.
+    """
+    df = df.dropna(subset=["latitud", "longitud"])
+    if df.empty:
+        return df.assign(distancia=pd.Series(dtype=float))
+    pares = df[["latitud", "longitud"]].to_numpy(dtype=float)
+    unicos, inversa = np.unique(pares, axis=0, return_inverse=True)
+    d = distancias_km(lat, lon, unicos[:, 0], unicos[:, 1], radio_km)[inversa.ravel()]
+    dentro = d <= radio_km
+    out = df[dentro].copy()
+    out["distancia"] = d[dentro]
+    return out
+
+# ===========================
+# ÍNDICE ESPACIAL (rejilla)
+# ===========================
+KM_POR_GRADO = 111.32
+
+class IndiceTiendas:
+    """Índice de rejilla sobre `Catalogo.tiendas` (ids = posición en esa tabla).
+
+    Las tiendas quedan ordenadas por celda, así una consulta por radio solo mira las celdas
+    que toca el círculo. Con `teselas` (TeselasTiendas del mismo catálogo), los radios hasta el
+    de la tabla salen de una sola celda ya resuelta. `filas_de` devuelve las filas de
+    `Catalogo.precios` de cada tienda.
+    """
+
+    def __init__(self, tiendas: pd.DataFrame, inicio: np.ndarray, celda_deg=0.05, teselas=None):
+        self.tiendas = tiendas.reset_index(drop=True)
+        self.teselas = teselas
+        self.lats = self.tiendas["latitud"].to_numpy(dtype=float)
+        self.lons = self.tiendas["longitud"].to_numpy(dtype=float)
+        self.inicio = inicio        # precios[inicio[i]:inicio[i+1]] son los de la tienda i
+        self.celda_deg = celda_deg
+        claves = self._clave(np.floor(self.lats / celda_deg), np.floor(self.lons / celda_deg))
+        self._orden = np.argsort(claves, kind="stable")
+        self._celdas, self._celda_inicio = np.unique(claves[self._orden], return_index=True)
+        self._celda_inicio = np.append(self._celda_inicio, len(self._orden))
+
+    @classmethod
+    def desde_catalogo(cls, catalogo, celda_deg=0.05):
+        return cls(catalogo.tiendas, catalogo.inicio, celda_deg, catalogo.teselas)
+
+    def __len__(self):
+        return len(self.tiendas)
+
+    @staticmethod
+    def _clave(i, j):
+        return (np.asarray(i, dtype=np.int64) << 32) + (np.asarray(j, dtype=np.int64) & 0xFFFFFFFF)
+
+    def _candidatos(self, lat, lon, radio_km):
+        if self.teselas is not None:
+            cand = self.teselas.candidatos(lat, lon, radio_km)
+            if cand is not None:
+                return cand
+        radio_km = radio_km * (1 + TOLERANCIA_REL)
+        dlat = radio_km / KM_POR_GRADO
+        dlon = radio_km / (KM_POR_GRADO * max(np.cos(np.radians(lat)), 0.01))
+        c = self.celda_deg
+        ii = np.arange(np.floor((lat - dlat) / c), np.floor((lat + dlat) / c) + 1)
+        jj = np.arange(np.floor((lon - dlon) / c), np.floor((lon + dlon) / c) + 1)
+        if len(ii) * len(jj) > len(self._celdas):
+            return np.arange(len(self))
+        claves = self._clave(*(g.ravel() for g in np.meshgrid(ii, jj, indexing="ij")))
+        pos = np.searchsorted(self._celdas, claves)
+        pos = pos[(pos < len(self._celdas)) & (self._celdas[np.minimum(pos, len(self._celdas) - 1)] == claves)]
+        if not len(pos):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self._orden[self._celda_inicio[p]:self._celda_inicio[p + 1]] for p in pos])
+
+    def en_radio(self, lat, lon, radio_km):
+        """(ids, distancias) de las tiendas a <= radio_km, ordenadas por distancia."""
+        cand = self._candidatos(lat, lon, radio_km)
+        d = distancias_km(lat, lon, self.lats[cand], self.lons[cand], radio_km)
+        dentro = d <= radio_km
+        cand, d = cand[dentro], d[dentro]
+        orden = np.argsort(d, kind="stable")
+        return cand[orden], d[orden]
+
+    def k_cercanas(self, lat, lon, k):
+        """(ids, distancias) de las k tiendas más cercanas."""
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        radio = self.celda_deg * KM_POR_GRADO
+        while True:
+            ids, d = self.en_radio(lat, lon, radio)
+            if len(ids) >= k:
+                return ids[:k], d[:k]
+            radio *= 2
+
+    def filas_de(self, ids):
+        """Posiciones en `Catalogo.precios` de las tiendas `ids` y cuántas filas aporta cada una."""
+        ids = np.asarray(ids, dtype=np.int64)
+        n = self.inicio[ids + 1] - self.inicio[ids]
+        # inicio de cada tienda repetido + desplazamiento dentro de ella
+        desde = np.repeat(self.inicio[ids] - (np.cumsum(n) - n), n)
+        return desde + np.arange(n.sum(), dtype=np.int64), n
+
+class DistanciasOrdenadas:
+    """Tiendas alrededor de un punto fijo, ordenadas por distancia hasta `radio_max`.
+
+    Cambiar de radio es una búsqueda binaria sobre la lista ya ordenada; solo las tiendas en la
+    banda de tolerancia del nuevo radio se recalculan con geodesic (y quedan memorizadas), así
+    `corte(r)` da lo mismo que `IndiceTiendas.en_radio(lat, lon, r)`.
+    """
+
+    def __init__(self, indice: IndiceTiendas, lat, lon, radio_max):
+        self.indice, self.lat, self.lon, self.radio_max = indice, lat, lon, radio_max
+        cand = indice._candidatos(lat, lon, radio_max)
+        d = haversine_km(lat, lon, indice.lats[cand], indice.lons[cand])
+        cerca = d <= radio_max * (1 + TOLERANCIA_REL)
+        orden = np.argsort(d[cerca], kind="stable")
+        self.ids = cand[cerca][orden]
+        self.dist = d[cerca][orden]
+        self._exactas = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _geodesica(self, pos):
+        faltan = [p for p in pos.tolist() if p not in self._exactas]
+        if faltan:
+            from geopy.distance import geodesic
+            for p in faltan:
+                t = self.ids[p]
+                self._exactas[p] = geodesic((self.lat, self.lon), (self.indice.lats[t], self.indice.lons[t])).kilometers
+        return np.array([self._exactas[p] for p in pos.tolist()], dtype=float)
+
+    def corte(self, radio_km):
+        """(ids, distancias, posiciones en `self.ids`) de las tiendas a <= radio_km, por distancia."""
+        if radio_km > self.radio_max:
+            raise ValueError(f"radio {radio_km} km mayor que el precalculado ({self.radio_max} km)")
+        lo = np.searchsorted(self.dist, radio_km - radio_km * TOLERANCIA_REL, side="left")
+        hi = np.searchsorted(self.dist, radio_km + radio_km * TOLERANCIA_REL, side="right")
+        banda = np.arange(lo, hi)
+        d_banda = self._geodesica(banda)
+        dentro = d_banda <= radio_km
+        pos = np.concatenate([np.arange(lo), banda[dentro]])
+        d = np.concatenate([self.dist[:lo], d_banda[dentro]])
+        orden = np.argsort(d, kind="stable")
+        return self.ids[pos[orden]], d[orden], pos[orden]
+
+# ===========================
+# TESELAS (geohash)
+# ===========================
+TESELA_PRECISION = 5     # geohash de 5 caracteres: celdas de ~4.9 × 4.9 km
+TESELA_RADIO_KM = 15     # el tope del slider de radio (motor.RADIO_MAX_KM)
+HOLGURA_TESELA = 0.02    # las cotas se achican un 2 %: cubre haversine vs. geodésica y el borde curvo de la celda
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def _bits_geohash(precision):
+    """(bits de longitud, bits de latitud); el geohash alterna empezando por la longitud."""
+    total = 5 * precision
+    return (total + 1) // 2, total // 2
+
+def _celda_ij(lats, lons, precision):
+    bits_lon, bits_lat = _bits_geohash(precision)
+    i = np.floor((np.asarray(lats, dtype=float) + 90) / 180 * (1 << bits_lat)).astype(np.int64)
+    j = np.floor((np.asarray(lons, dtype=float) + 180) / 360 * (1 << bits_lon)).astype(np.int64)
+    return np.clip(i, 0, (1 << bits_lat) - 1), j % (1 << bits_lon)
+
+def _codigo_geohash(i, j, precision):
+    """Entero del geohash de la celda (i, j): bits de j e i intercalados, el más significativo primero."""
+    bits_lon, bits_lat = _bits_geohash(precision)
+    codigo = np.zeros(np.shape(i), dtype=np.int64)
+    for k in range(bits_lon + bits_lat):
+        if k % 2 == 0:
+            bit = (np.asarray(j) >> (bits_lon - 1 - k // 2)) & 1
+        else:
+            bit = (np.asarray(i) >> (bits_lat - 1 - k // 2)) & 1
+        codigo = (codigo << 1) | bit
+    return codigo
+
+def _codigo_punto(lat, lon, precision) -> int:
+    """_codigo_geohash de un solo punto, con enteros de Python (la consulta no paga NumPy por bit)."""
+    bits_lon, bits_lat = _bits_geohash(precision)
+    i = min(max(int(np.floor((lat + 90) / 180 * (1 << bits_lat))), 0), (1 << bits_lat) - 1)
+    j = int(np.floor((lon + 180) / 360 * (1 << bits_lon))) % (1 << bits_lon)
+    codigo = 0
+    for k in range(bits_lon + bits_lat):
+        bit = (j >> (bits_lon - 1 - k // 2)) if k % 2 == 0 else (i >> (bits_lat - 1 - k // 2))
+        codigo = (codigo << 1) | (bit & 1)
+    return codigo
+
+def geohash(lat, lon, precision=TESELA_PRECISION) -> str:
+    codigo = _codigo_punto(lat, lon, precision)
+    return "".join(GEOHASH_BASE32[(codigo >> (5 * (precision - 1 - k))) & 31] for k in range(precision))
+
+class TeselasTiendas:
+    """Tabla precalculada celda geohash → tiendas a <= radio_km de algún punto de la celda.
+
+    Por celda, las tiendas van ordenadas por la cota inferior de su distancia a la celda: una
+    consulta por radio r ubica la celda del punto, corta la lista donde la cota pasa r y solo
+    calcula distancias exactas para esas. Solo se guardan celdas con alguna tienda cerca; una
+    celda ausente es "ninguna tienda a <= radio_km". Se arma con cada carga del catálogo y viaja
+    en el snapshot (y en el catálogo compartido) como cuatro arreglos.
+    """
+
+    def __init__(self, celdas, inicio, tiendas, cotas, precision=TESELA_PRECISION, radio_km=TESELA_RADIO_KM):
+        self.celdas = celdas      # códigos geohash ordenados (int64)
+        self.inicio = inicio      # tiendas[inicio[k]:inicio[k + 1]] son las de celdas[k]
+        self.tiendas = tiendas    # ids (int32)
+        self.cotas = cotas        # km (float32), cota inferior ya con la holgura
+        self.precision = precision
+        self.radio_km = radio_km
+
+    @classmethod
+    def construir(cls, lats, lons, precision=TESELA_PRECISION, radio_km=TESELA_RADIO_KM, bloque=20_000):
+        bits_lon, bits_lat = _bits_geohash(precision)
+        alto, ancho = 180 / (1 << bits_lat), 360 / (1 << bits_lon)
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        ids = np.flatnonzero(~np.isnan(lats) & ~np.isnan(lons))
+        partes = []
+        if len(ids):
+            # ventana de celdas alrededor de cada tienda, para la latitud más alejada del ecuador
+            lat_max = min(np.abs(lats[ids]).max() + radio_km / KM_POR_GRADO, 89.0)
+            ki = int(np.ceil(radio_km / (alto * KM_POR_GRADO)))
+            kj = int(np.ceil(radio_km / (ancho * KM_POR_GRADO * np.cos(np.radians(lat_max)))))
+            di, dj = (g.ravel() for g in np.meshgrid(np.arange(-ki, ki + 1), np.arange(-kj, kj + 1), indexing="ij"))
+            for ini in range(0, len(ids), bloque):
+                t = ids[ini:ini + bloque]
+                i0, j0 = _celda_ij(lats[t], lons[t], precision)
+                i = i0[:, None] + di[None, :]
+                j = j0[:, None] + dj[None, :]
+                # punto de la celda más cercano a la tienda (la tienda recortada a la caja de la celda)
+                la = np.clip(lats[t][:, None], i * alto - 90, (i + 1) * alto - 90)
+                lo = np.clip(lons[t][:, None], j * ancho - 180, (j + 1) * ancho - 180)
+                cota = haversine_km(lats[t][:, None], lons[t][:, None], la, lo) * (1 - HOLGURA_TESELA)
+                ok = (cota <= radio_km) & (i >= 0) & (i < (1 << bits_lat))
+                codigo = _codigo_geohash(i[ok], j[ok] % (1 << bits_lon), precision)
+                partes.append((codigo, np.broadcast_to(t[:, None], i.shape)[ok], cota[ok]))
+        codigo = np.concatenate([p[0] for p in partes]) if partes else np.empty(0, dtype=np.int64)
+        tienda = np.concatenate([p[1] for p in partes]) if partes else np.empty(0, dtype=np.int64)
+        cota = np.concatenate([p[2] for p in partes]) if partes else np.empty(0)
+        orden = np.lexsort((tienda, cota, codigo))
+        celdas, inicio = np.unique(codigo[orden], return_index=True)
+        return cls(celdas, np.append(inicio, len(orden)).astype(np.int64), tienda[orden].astype(np.int32),
+                   cota[orden].astype(np.float32), precision, radio_km)
+
+    @classmethod
+    def desde_tiendas(cls, tiendas: pd.DataFrame, **kw):
+        return cls.construir(tiendas["latitud"].to_numpy(dtype=float), tiendas["longitud"].to_numpy(dtype=float), **kw)
+
+    def __len__(self):
+        return len(self.celdas)
+
+    def candidatos(self, lat, lon, radio_km):
+        """Ids (en orden) de las tiendas que pueden estar a <= radio_km de (lat, lon); None si el
+        radio supera el de la tabla."""
+        if radio_km > self.radio_km:
+            return None
+        codigo = _codigo_punto(lat, lon, self.precision)
+        k = int(np.searchsorted(self.celdas, codigo))
+        if k >= len(self.celdas) or self.celdas[k] != codigo:
+            return np.empty(0, dtype=np.int64)
+        a, b = int(self.inicio[k]), int(self.inicio[k + 1])
+        fin = a + int(np.searchsorted(self.cotas[a:b], radio_km, side="right"))
+        return np.sort(self.tiendas[a:fin]).astype(np.int64)
+
+    def arreglos(self) -> dict:
+        return {"celdas": self.celdas, "inicio": self.inicio, "tiendas": self.tiendas, "cotas": self.cotas}
+
+    def guardar(self, carpeta: Path) -> dict:
+        """Escribe los arreglos como .npy en `carpeta` (se abren con mmap); devuelve su entrada de manifest."""
+        for nombre, arr in self.arreglos().items():
+            np.save(Path(carpeta) / f"teselas.{nombre}.npy", arr)
+        return {"precision": self.precision, "radio_km": self.radio_km, "celdas": len(self.celdas)}
+
+    @classmethod
+    def abrir(cls, meta: dict, carpeta: Path):
+        arr = {n: np.load(Path(carpeta) / f"teselas.{n}.npy", mmap_mode="r") for n in ("celdas", "inicio", "tiendas", "cotas")}
+        return cls(**arr, precision=meta["precision"], radio_km=meta["radio_km"])
@@ -0,0 +1,225 @@
+# geocodificacion.py
+# Geocodificación con cache persistente (SQLite, compartido entre procesos) y límite de 1 req/s.
+# geopy se importa con el primer request real: un acierto de cache no lo carga.
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from catalogo import normalize_name
+from metricas import contar, tramo
+
+USER_AGENT = "dino_pacasmayo_app"
+
+class CacheGeocodificacion:
+    """Cache clave → resultado con TTL y desalojo LRU (por último acceso).
+
+    Las búsquedas se guardan por texto normalizado y las inversas por (lat, lon) redondeados,
+    así dos clics a pocos metros reutilizan la misma dirección. Varios procesos pueden abrir
+    el mismo archivo; la tabla `limite` guarda el turno del próximo request al geocodificador.
+    """
+
+    def __init__(self, ruta="geocache.sqlite3", ttl_s=30 * 86400, ttl_negativo_s=86400,
+                 max_entradas=50_000, decimales=4):
+        self.ruta = str(ruta)
+        self.ttl_s = ttl_s
+        self.ttl_negativo_s = ttl_negativo_s
+        self.max_entradas = max_entradas
+        self.decimales = decimales
+        self._local = threading.local()
+        with self._con() as con:
+            con.execute("CREATE TABLE IF NOT EXISTS geocache (clave TEXT PRIMARY KEY, valor TEXT, "
+                        "vence REAL NOT NULL, usado REAL NOT NULL)")
+            con.execute("CREATE INDEX IF NOT EXISTS geocache_usado ON geocache (usado)")
+            con.execute("CREATE TABLE IF NOT EXISTS limite (id INTEGER PRIMARY KEY, proximo REAL NOT NULL)")
+            con.execute("INSERT OR IGNORE INTO limite VALUES (1, 0)")
+
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.ruta, timeout=30, isolation_level=None, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    def clave_busqueda(self, q: str) -> str:
+        return "q:" + normalize_name(q)
+
+    def clave_inversa(self, lat, lon) -> str:
+        return f"r:{round(float(lat), self.decimales)},{round(float(lon), self.decimales)}"
+
+    def obtener(self, clave):
+        """(encontrado, valor). `valor` es None para resultados negativos cacheados."""
+        ahora = time.time()
+        con = self._con()
+        fila = con.execute("SELECT valor, vence FROM geocache WHERE clave = ?", (clave,)).fetchone()
+        if fila is None:
+            return False, None
+        if fila[1] < ahora:
+            con.execute("DELETE FROM geocache WHERE clave = ?", (clave,))
+            return False, None
+        con.execute("UPDATE geocache SET usado = ? WHERE clave = ?", (ahora, clave))
+        return True, (json.loads(fila[0]) if fila[0] is not None else None)
+
+    def guardar(self, clave, valor):
+        ahora = time.time()
+        vence = ahora + (self.ttl_s if valor is not None else self.ttl_negativo_s)
+        con = self._con()
+        con.execute("INSERT OR REPLACE INTO geocache VALUES (?, ?, ?, ?)",
+                    (clave, json.dumps(valor, ensure_ascii=False) if valor is not None else None, vence, ahora))
+        self._podar(con, ahora)
+
+    def _podar(self, con, ahora):
+        con.execute("DELETE FROM geocache WHERE vence < ?", (ahora,))
+        sobran = con.execute("SELECT COUNT(*) FROM geocache").fetchone()[0] - self.max_entradas
+        if sobran > 0:
+            con.execute("DELETE FROM geocache WHERE clave IN "
+                        "(SELECT clave FROM geocache ORDER BY usado LIMIT ?)", (sobran,))
+
+    def reservar_turno(self, intervalo_s) -> float:
+        """Reserva el próximo hueco libre (compartido entre procesos) y devuelve cuánto esperar."""
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            proximo = con.execute("SELECT proximo FROM limite WHERE id = 1").fetchone()[0]
+            ahora = time.time()
+            turno = max(ahora, proximo)
+            con.execute("UPDATE limite SET proximo = ? WHERE id = 1", (turno + intervalo_s,))
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        return turno - ahora
+
+class ResolvedorGeocodificacion:
+    """Búsqueda directa e inversa sobre un geocodificador tipo geopy (Nominatim por defecto).
+
+    Todo request real pasa por `cache.reservar_turno`, que respeta la política de Nominatim
+    (1 req/s) sumando todos los procesos que comparten el archivo del cache.
+    """
+
+    def __init__(self, geocoder=None, cache: CacheGeocodificacion | None = None, intervalo_s=1.0, timeout_s=8):
+        self._geocoder = geocoder
+        self.cache = cache or CacheGeocodificacion()
+        self.intervalo_s = intervalo_s
+        self.timeout_s = timeout_s
+
+    @property
+    def geocoder(self):
+        if self._geocoder is None:
+            from geopy.geocoders import Nominatim
+            self._geocoder = Nominatim(user_agent=USER_AGENT, timeout=10)
+        return self._geocoder
+
+    def _esperar_turno(self):
+        espera = self.cache.reservar_turno(self.intervalo_s)
+        if espera > 0:
+            time.sleep(espera)
+
+    def buscar(self, q):
+        if not q or not q.strip(): return None
+        q = q.strip()
+        clave = self.cache.clave_busqueda(q)
+        hit, valor = self.cache.obtener(clave)
+        contar("geo_cache", tipo="buscar", resultado="acierto" if hit else "fallo")
+        if hit:
+            return valor
+        fallo = False
+        for query in [q, f"{q}, Lima, Perú", f"{q}, Perú"]:
+            try:
+                self._esperar_turno()
+                with tramo("geo.nominatim"):
+                    loc = self.geocoder.geocode(query, timeout=self.timeout_s)
+            except Exception:
+                fallo = True
+                continue
+            if loc:
+                valor = {"lat": loc.latitude, "lon": loc.longitude, "direccion": loc.address}
+                self.cache.guardar(clave, valor)
+                return valor
+        if not fallo:
+            self.cache.guardar(clave, None)
+        return None
+
+    def inverso(self, lat, lon):
+        clave = self.cache.clave_inversa(lat, lon)
+        hit, valor = self.cache.obtener(clave)
+        contar("geo_cache", tipo="inverso", resultado="acierto" if hit and valor else "fallo")
+        if hit and valor:
+            return {"lat": lat, "lon": lon, "direccion": valor["direccion"]}
+        try:
+            self._esperar_turno()
+            with tramo("geo.nominatim"):
+                loc = self.geocoder.reverse((lat, lon), timeout=self.timeout_s)
+            if loc:
+                self.cache.guardar(clave, {"direccion": loc.address})
+                return {"lat": lat, "lon": lon, "direccion": loc.address}
+        except Exception:
+            pass
+        return {"lat": lat, "lon": lon, "direccion": f"{lat:.6f}, {lon:.6f}"}
+
+    def buscar_lote(self, consultas):
+        """Resuelve varias direcciones; repetidas o ya cacheadas no consumen turno."""
+        vistos = {}
+        for q in consultas:
+            clave = self.cache.clave_busqueda(q or "")
+            if clave not in vistos:
+                vistos[clave] = self.buscar(q)
+        return [vistos[self.cache.clave_busqueda(q or "")] for q in consultas]
+
+class TareasGeo:
+    """Pool de hilos para geocodificar sin bloquear la página.
+
+    Cada `canal` (p. ej. la sesión) tiene a lo sumo una solicitud vigente: una nueva cancela
+    la anterior si aún no empezó y, si ya está en vuelo, su resultado se descarta.
+    """
+
+    def __init__(self, max_hilos=4):
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="geo")
+        self._vigentes = {}
+        self._lock = threading.Lock()
+
+    def enviar(self, canal, fn, *args):
+        cancelado = threading.Event()
+        def tarea():
+            if cancelado.is_set():
+                raise CancelledError()
+            return fn(*args)
+        with self._lock:
+            previo = self._vigentes.get(canal)
+            if previo is not None:
+                previo[1].set(); previo[0].cancel()
+            fut = self._pool.submit(tarea)
+            self._vigentes[canal] = (fut, cancelado)
+        return fut
+
+    def pendiente(self, canal) -> bool:
+        with self._lock:
+            return canal in self._vigentes
+
+    def recoger(self, canal, timeout=0):
+        """(listo, valor) de la solicitud vigente del canal; una vez lista se olvida."""
+        with self._lock:
+            par = self._vigentes.get(canal)
+        if par is None:
+            return False, None
+        try:
+            valor = par[0].result(timeout=timeout)
+        except FutureTimeout:
+            return False, None
+        except Exception:
+            valor = None
+        with self._lock:
+            if self._vigentes.get(canal) is par:
+                del self._vigentes[canal]
+            else:
+                return False, None
+        return True, valor
+
+    def cancelar(self, canal):
+        with self._lock:
+            par = self._vigentes.pop(canal, None)
+        if par is not None:
+            par[1].set(); par[0].cancel()
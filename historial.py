@@ -0,0 +1,363 @@
+# historial.py
+# Historial de precios entre cargas del catálogo. Cada carga deja un segmento con los precios que
+# cambiaron respecto de la anterior (nuevo, distinto o retirado), así el historial crece con los
+# cambios y no con el catálogo entero. Solo se agrega: un segmento escrito no se toca más.
+#   <carpeta>/tiendas.jsonl, productos.jsonl   ids estables (una línea por tienda / producto visto)
+#   <carpeta>/fecha=AAAA-MM-DD/<hora>-<sha>/    un segmento por carga: producto, tienda, precio,
+#                                              anterior (.npy, ordenados por producto y tienda, mmap)
+#   <carpeta>/ultimo/                          precios vigentes tras la última carga (se rehace
+#                                              desde los segmentos si falta o quedó atrás)
+#   python historial.py registrar dinoe.xlsx
+#   python historial.py serie "Cemento Sol 42.5kg" --lat -12.05 --lon -77.04 --radio 5 --dias 90
+#   python historial.py cambios [--cargas 1] [--por-tienda]
+# La app y la API registran cada carga si está DINO_HISTORIAL (ver motor.py).
+import argparse
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+from geo import distancias_km
+
+HISTORIAL_VERSION = 1
+COLUMNAS = {"producto": np.int32, "tienda": np.int32, "precio": np.float64, "anterior": np.float64}
+COLUMNAS_SERIE = ["ts", "fecha", "tienda", "Ferreteria", "latitud", "longitud", "Precio"]
+COLUMNAS_CAMBIOS = ["tienda", "Ferreteria", "Producto", "anterior", "Precio", "cambio", "cambio_rel"]
+
+def _clave(producto, tienda) -> np.ndarray:
+    """(producto, tienda) en un int64 que ordena por producto y después por tienda."""
+    return (np.asarray(producto, dtype=np.int64) << 32) | np.asarray(tienda, dtype=np.int64)
+
+def _alinear(claves, valores, todas) -> np.ndarray:
+    out = np.full(len(todas), np.nan)
+    out[np.searchsorted(todas, claves)] = valores
+    return out
+
+class _Diccionario:
+    """Valor → id estable, en un .jsonl que solo crece (id = número de línea)."""
+
+    def __init__(self, ruta: Path):
+        self.ruta = ruta
+        self.valores = []
+        self.ids = {}
+        self._leido = 0
+
+    def leer(self):
+        try:
+            with open(self.ruta, "rb") as f:
+                f.seek(self._leido)
+                datos = f.read()
+        except FileNotFoundError:
+            return self
+        fin = datos.rfind(b"\n") + 1  # una línea a medio escribir se lee la próxima vez
+        for linea in datos[:fin].splitlines():
+            v = json.loads(linea)
+            v = tuple(v) if isinstance(v, list) else v
+            self.ids[v] = len(self.valores)
+            self.valores.append(v)
+        self._leido += fin
+        return self
+
+    def ids_de(self, valores) -> np.ndarray:
+        """Ids de `valores`, agregando al archivo los que no estaban (llamar con el bloqueo tomado)."""
+        self.leer()
+        nuevos = [v for v in dict.fromkeys(valores) if v not in self.ids]
+        if nuevos:
+            with open(self.ruta, "ab") as f:
+                f.write(b"".join(json.dumps(list(v) if isinstance(v, tuple) else v, ensure_ascii=False)
+                                 .encode("utf-8") + b"\n" for v in nuevos))
+            self.leer()
+        return np.array([self.ids[v] for v in valores], dtype=np.int32)
+
+class _Segmento:
+    """Los cambios de una carga; las columnas se mapean al primer uso."""
+
+    def __init__(self, carpeta: Path, meta: dict):
+        self.carpeta = carpeta
+        self.meta = meta
+        self.ts = meta["ts"]
+        self._columnas = None
+
+    def col(self, nombre) -> np.ndarray:
+        if self._columnas is None:
+            modo = "r" if self.meta["filas"] else None  # mmap no acepta un archivo sin datos
+            self._columnas = {c: np.load(self.carpeta / f"{c}.npy", mmap_mode=modo) for c in COLUMNAS}
+        return self._columnas[nombre]
+
+    def de_producto(self, producto) -> dict:
+        prod = self.col("producto")
+        a, b = np.searchsorted(prod, [producto, producto + 1])
+        return {c: np.asarray(self.col(c)[a:b]) for c in ("tienda", "precio", "anterior")}
+
+class HistorialPrecios:
+    """Historial de precios en `carpeta` (ver el encabezado del módulo).
+
+    Los nombres de tienda y producto se guardan una sola vez; una tienda es (nombre, latitud,
+    longitud), igual que en catalogo.Catalogo. El segmento guarda además el precio anterior de cada
+    cambio: una serie hacia atrás parte de los vigentes (`ultimo/`) y deshace solo los segmentos de
+    la ventana, sin releer el historial entero.
+    """
+
+    def __init__(self, carpeta):
+        self.carpeta = Path(carpeta)
+        self.tiendas = _Diccionario(self.carpeta / "tiendas.jsonl")
+        self.productos = _Diccionario(self.carpeta / "productos.jsonl")
+        self._segmentos = {}   # carpeta → _Segmento (la meta de cada uno se lee una vez)
+        self._particiones = {}  # fecha=... → mtime con el que se listó
+
+    def cargas(self) -> list:
+        """Segmentos registrados, en orden de carga. Solo se relistan las particiones que cambiaron."""
+        try:
+            particiones = [e for e in os.scandir(self.carpeta) if e.name.startswith("fecha=") and e.is_dir()]
+        except FileNotFoundError:
+            particiones = []
+        for e in particiones:
+            mtime = e.stat().st_mtime_ns
+            if self._particiones.get(e.name) == mtime:
+                continue
+            self._particiones[e.name] = mtime
+            for m in Path(e.path).glob("*/meta.json"):
+                if m.parent not in self._segmentos and not m.parent.name.startswith("."):
+                    self._segmentos[m.parent] = _Segmento(m.parent, json.loads(m.read_text(encoding="utf-8")))
+        return sorted(self._segmentos.values(), key=lambda s: (s.ts, s.carpeta.name))
+
+    @contextmanager
+    def _bloqueo(self):
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+        with open(self.carpeta / ".bloqueo", "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    # ===========================
+    # ESCRITURA
+    # ===========================
+    def registrar(self, catalogo, fuente_sha256=None, ts=None):
+        """Agrega la carga de `catalogo` (catalogo.Catalogo) como segmento nuevo y devuelve su meta.
+        None si `fuente_sha256` ya es la última carga registrada (varios procesos cargan la misma)."""
+        with self._bloqueo():
+            self._particiones.clear()  # relistar todo: el mtime de una carpeta puede no distinguir dos escrituras seguidas
+            cargas = self.cargas()
+            if fuente_sha256 and cargas and cargas[-1].meta["fuente_sha256"] == fuente_sha256:
+                return None
+            clave, precio = self._vigentes_catalogo(catalogo)
+            clave_ant, precio_ant = self._ultimo(cargas)
+            todas = np.union1d(clave_ant, clave)
+            antes, ahora = _alinear(clave_ant, precio_ant, todas), _alinear(clave, precio, todas)
+            cambio = ~((antes == ahora) | (np.isnan(antes) & np.isnan(ahora)))
+            seg = self._escribir_segmento(time.time() if ts is None else ts, fuente_sha256,
+                                          todas[cambio], ahora[cambio], antes[cambio], len(clave))
+            self._escribir_ultimo(clave, precio, seg)
+            self._segmentos[seg.carpeta] = seg
+            return seg.meta
+
+    def _vigentes_catalogo(self, catalogo):
+        """(claves ordenadas, precios) del catálogo con ids del historial. Quedan afuera las filas
+        sin tienda con coordenadas o sin precio; con (tienda, producto) repetidos gana la última."""
+        t = catalogo.tiendas
+        ids_t = self.tiendas.ids_de(list(zip(t["Ferreteria"].tolist(), t["latitud"].tolist(), t["longitud"].tolist())))
+        ids_p = self.productos.ids_de([str(p) for p in catalogo.productos])
+        tienda = catalogo.precios["tienda"].to_numpy()
+        producto = catalogo.precios["producto"].to_numpy()
+        precio = catalogo.precios["Precio"].to_numpy(dtype=float)
+        ok = (tienda >= 0) & ~np.isnan(precio)
+        clave = _clave(ids_p[producto[ok]], ids_t[tienda[ok]])[::-1]
+        clave, pos = np.unique(clave, return_index=True)
+        return clave, precio[ok][::-1][pos]
+
+    def _escribir_segmento(self, ts, fuente_sha256, clave, precio, anterior, vigentes) -> _Segmento:
+        local = time.localtime(ts)
+        particion = self.carpeta / time.strftime("fecha=%Y-%m-%d", local)
+        nombre = time.strftime("%Y%m%dT%H%M%S", local) + f"{int(ts * 1000) % 1000:03d}-{(fuente_sha256 or 'sinsha')[:12]}"
+        tmp = particion / f".{nombre}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True); tmp.mkdir(parents=True)
+        datos = {"producto": clave >> 32, "tienda": clave & 0xFFFFFFFF, "precio": precio, "anterior": anterior}
+        for c, dtype in COLUMNAS.items():
+            np.save(tmp / f"{c}.npy", np.asarray(datos[c], dtype=dtype))
+        meta = {
+            "version": HISTORIAL_VERSION, "ts": ts, "fuente_sha256": fuente_sha256, "filas": len(clave),
+            "vigentes": vigentes, "nuevos": int(np.isnan(anterior).sum()), "retirados": int(np.isnan(precio).sum()),
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        tmp.rename(particion / nombre)
+        return _Segmento(particion / nombre, meta)
+
+    def _escribir_ultimo(self, clave, precio, seg: _Segmento):
+        destino = self.carpeta / "ultimo"
+        tmp = self.carpeta / f".ultimo.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True); tmp.mkdir()
+        np.save(tmp / "clave.npy", clave)
+        np.save(tmp / "precio.npy", precio)
+        (tmp / "meta.json").write_text(json.dumps({"carga": seg.carpeta.relative_to(self.carpeta).as_posix()}), encoding="utf-8")
+        viejo = self.carpeta / f".ultimo.old{os.getpid()}"
+        if destino.exists(): destino.rename(viejo)
+        tmp.rename(destino)
+        shutil.rmtree(viejo, ignore_errors=True)
+
+    def _ultimo(self, cargas):
+        """(claves ordenadas, precios) vigentes tras la última carga de `cargas`."""
+        if not cargas:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        try:
+            meta = json.loads((self.carpeta / "ultimo" / "meta.json").read_text(encoding="utf-8"))
+            if meta["carga"] == cargas[-1].carpeta.relative_to(self.carpeta).as_posix():
+                return (np.load(self.carpeta / "ultimo" / "clave.npy", mmap_mode="r"),
+                        np.load(self.carpeta / "ultimo" / "precio.npy", mmap_mode="r"))
+        except (OSError, ValueError, KeyError):
+            pass
+        # no está o quedó atrás (se cortó una escritura): la última aparición de cada clave
+        clave = np.concatenate([_clave(s.col("producto"), s.col("tienda")) for s in cargas])[::-1]
+        precio = np.concatenate([s.col("precio") for s in cargas])[::-1]
+        clave, pos = np.unique(clave, return_index=True)
+        precio = precio[pos]
+        vigente = ~np.isnan(precio)
+        return clave[vigente], precio[vigente]
+
+    # ===========================
+    # CONSULTAS
+    # ===========================
+    def serie(self, producto, lat=None, lon=None, radio_km=None, dias=90) -> pd.DataFrame:
+        """Precio de `producto` en cada tienda que lo tuvo en los últimos `dias` (solo las que están a
+        <= radio_km de (lat, lon), si se pasan): una fila por tienda y carga de la ventana, con lo
+        vigente después de esa carga, más lo vigente al entrar a la ventana (ts = su inicio).
+        Columnas COLUMNAS_SERIE (fecha en UTC) y `distancia` si se filtró por radio."""
+        cargas = self.cargas()
+        p = self.productos.leer().ids.get(str(producto))
+        columnas = COLUMNAS_SERIE + (["distancia"] if radio_km is not None else [])
+        if p is None or not cargas:
+            return pd.DataFrame(columns=columnas)
+        desde = time.time() - dias * 86400
+        ventana = [s for s in cargas if s.ts >= desde]
+        clave, precio = self._ultimo(cargas)
+        a, b = np.searchsorted(clave, [p << 32, (p + 1) << 32])
+        tienda_u, precio_u = np.asarray(clave[a:b] & 0xFFFFFFFF), np.asarray(precio[a:b])
+        trozos = [s.de_producto(p) for s in ventana]
+
+        ids = np.unique(np.concatenate([tienda_u] + [t["tienda"] for t in trozos]).astype(np.int64))
+        self.tiendas.leer()
+        lats = np.array([self.tiendas.valores[i][1] for i in ids], dtype=float)
+        lons = np.array([self.tiendas.valores[i][2] for i in ids], dtype=float)
+        if radio_km is not None:
+            d = distancias_km(lat, lon, lats, lons, radio_km)
+            dentro = d <= radio_km
+            ids, lats, lons, d = ids[dentro], lats[dentro], lons[dentro], d[dentro]
+
+        def posiciones(tiendas):
+            pos = np.minimum(np.searchsorted(ids, tiendas), max(len(ids) - 1, 0))
+            ok = (ids[pos] == tiendas) if len(ids) else np.zeros(len(tiendas), dtype=bool)
+            return pos[ok], ok
+
+        estado = np.full(len(ids), np.nan)
+        pos, ok = posiciones(tienda_u)
+        estado[pos] = precio_u[ok]
+        ts, estados = [], []
+        for s, t in zip(reversed(ventana), reversed(trozos)):
+            ts.append(s.ts); estados.append(estado.copy())
+            pos, ok = posiciones(t["tienda"])
+            estado[pos] = t["anterior"][ok]  # deshace la carga
+        if len(ventana) < len(cargas):
+            ts.append(desde); estados.append(estado)
+        ts, estados = ts[::-1], estados[::-1]
+
+        n = len(ids)
+        out = pd.DataFrame({
+            "ts": np.repeat(ts, n), "tienda": np.tile(ids, len(ts)),
+            "Ferreteria": np.tile(np.array([self.tiendas.valores[i][0] for i in ids], dtype=object), len(ts)),
+            "latitud": np.tile(lats, len(ts)), "longitud": np.tile(lons, len(ts)),
+            "Precio": np.concatenate(estados) if estados else np.empty(0),
+        })
+        out.insert(1, "fecha", pd.to_datetime(out["ts"], unit="s"))
+        if radio_km is not None:
+            out["distancia"] = np.tile(d, len(ts))
+        return out[out["Precio"].notna()].reset_index(drop=True)[columnas]
+
+    def cambios(self, cargas=1, n=20) -> pd.DataFrame:
+        """Los `n` mayores cambios de precio (relativos, en valor absoluto) en las últimas `cargas`
+        cargas: por tienda y producto, el precio antes de la primera y después de la última. No
+        incluye altas ni bajas. Columnas COLUMNAS_CAMBIOS (n=None: todos)."""
+        segs = self.cargas()[-cargas:] if cargas > 0 else []
+        if not segs:
+            return pd.DataFrame(columns=COLUMNAS_CAMBIOS)
+        clave = np.concatenate([_clave(s.col("producto"), s.col("tienda")) for s in segs])
+        orden = np.argsort(clave, kind="stable")  # estable: cada clave queda en orden de carga
+        clave = clave[orden]
+        precio = np.concatenate([s.col("precio") for s in segs])[orden]
+        anterior = np.concatenate([s.col("anterior") for s in segs])[orden]
+        clave, ini, cuantos = np.unique(clave, return_index=True, return_counts=True)
+        antes, ahora = anterior[ini], precio[ini + cuantos - 1]
+        ok = ~np.isnan(antes) & ~np.isnan(ahora) & (antes != ahora)
+        clave, antes, ahora = clave[ok], antes[ok], ahora[ok]
+        cambio = ahora - antes
+        rel = np.divide(cambio, antes, out=np.full(len(cambio), np.inf), where=antes != 0)
+        orden = np.argsort(-np.abs(rel), kind="stable")[:n]
+        tienda, producto = (clave[orden] & 0xFFFFFFFF), (clave[orden] >> 32)
+        self.tiendas.leer(); self.productos.leer()
+        return pd.DataFrame({
+            "tienda": tienda, "Ferreteria": [self.tiendas.valores[i][0] for i in tienda],
+            "Producto": [self.productos.valores[i] for i in producto],
+            "anterior": antes[orden], "Precio": ahora[orden], "cambio": cambio[orden], "cambio_rel": rel[orden],
+        }, columns=COLUMNAS_CAMBIOS)
+
+    def cambios_por_tienda(self, cargas=1) -> pd.DataFrame:
+        """Por tienda, sus cambios de precio en las últimas `cargas` cargas: cuántos, cuántas subas
+        (también como parte de sus productos vigentes) y el cambio relativo mediano. Ordenadas por
+        parte que subió: una tienda que remarcó todo aparece arriba."""
+        c = self.cambios(cargas, n=None)
+        vigentes = pd.Series(self._ultimo(self.cargas())[0] & 0xFFFFFFFF).value_counts()
+        out = (c.assign(sube=c["cambio"] > 0)
+                .groupby(["tienda", "Ferreteria"], sort=False)
+                .agg(cambiados=("cambio", "size"), subieron=("sube", "sum"), mediana_rel=("cambio_rel", "median"))
+                .reset_index())
+        out.insert(2, "productos", out["tienda"].map(vigentes).fillna(0).astype(int))
+        out["parte_subio"] = out["subieron"] / out["productos"].clip(lower=1)
+        return out.sort_values(["parte_subio", "mediana_rel"], ascending=False, ignore_index=True)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Historial de precios entre cargas del catálogo.")
+    ap.add_argument("--historial", default=os.environ.get("DINO_HISTORIAL", "historial"))
+    sub = ap.add_subparsers(dest="orden", required=True)
+    r = sub.add_parser("registrar", help="agrega la versión actual de la fuente")
+    r.add_argument("catalogo", nargs="?", default=os.environ.get("DINO_CATALOGO", "dinoe.xlsx"))
+    s = sub.add_parser("serie", help="precio de un producto en el tiempo")
+    s.add_argument("producto")
+    s.add_argument("--lat", type=float)
+    s.add_argument("--lon", type=float)
+    s.add_argument("--radio", type=float)
+    s.add_argument("--dias", type=float, default=90)
+    c = sub.add_parser("cambios", help="mayores cambios de las últimas cargas")
+    c.add_argument("--cargas", type=int, default=1)
+    c.add_argument("-n", type=int, default=20)
+    c.add_argument("--por-tienda", action="store_true")
+    a = ap.parse_args(argv)
+
+    h = HistorialPrecios(a.historial)
+    with pd.option_context("display.width", 200, "display.max_columns", 20, "display.max_rows", 200):
+        if a.orden == "registrar":
+            from catalogo import cargar_catalogo, hash_archivo
+            meta = h.registrar(cargar_catalogo(a.catalogo), hash_archivo(a.catalogo))
+            print(meta if meta is not None else "Esa versión del catálogo ya es la última registrada.")
+        elif a.orden == "serie":
+            radio = a.radio if a.lat is not None and a.lon is not None else None
+            df = h.serie(a.producto, a.lat, a.lon, radio, a.dias)
+            print(df.pivot_table(index="fecha", columns="Ferreteria", values="Precio") if len(df) else "Sin datos.")
+        elif a.por_tienda:
+            print(h.cambios_por_tienda(a.cargas).head(a.n))
+        else:
+            print(h.cambios(a.cargas, a.n))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# lote.py
+# Cotizaciones en lote: un archivo de carritos + ubicaciones → ZIP con un PDF por cotización.
+#   python lote.py carritos.csv --salida cotizaciones.zip [--catalogo dinoe.xlsx] [--radio 3] [--top 1] [--procesos 4]
+#
+# carritos.csv (formato largo): cotizacion,lat,lon,producto,cantidad[,radio_km]
+# carritos.jsonl: {"cotizacion": "...", "lat": .., "lon": .., "radio_km": .., "carrito": {"producto": cantidad}}
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from pathlib import Path
+
+import pandas as pd
+
+from catalogo import CatalogoError
+from motor import Cotizador
+from proforma import pdf_proforma_bytes
+
+EN_VUELO_POR_PROCESO = 4  # PDFs pedidos al pool y aún no escritos, por proceso
+
+def _cantidad(v):
+    """Cantidad entera y positiva (acepta 2.0 del CSV), o None si no lo es."""
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return int(f) if math.isfinite(f) and f == int(f) and f > 0 else None
+
+def _coordenada(v):
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return f if math.isfinite(f) else None
+
+def leer_carritos(path, radio_defecto, avisos=None):
+    """Lista de {"cotizacion", "lat", "lon", "radio_km", "carrito"} en el orden del archivo.
+
+    Una línea inválida (cantidad vacía o no entera, producto vacío, coordenadas que no son números,
+    JSON roto) no corta el lote: se salta y se anota en `avisos` con su número de línea.
+    """
+    avisos = avisos if avisos is not None else []
+    if Path(path).suffix.lower() in (".jsonl", ".json"):
+        out, k = [], 0
+        with open(path, encoding="utf-8") as f:
+            for linea, l in enumerate(f, 1):
+                if not l.strip():
+                    continue
+                k += 1
+                try:
+                    r = json.loads(l)
+                    lat, lon = _coordenada(r["lat"]), _coordenada(r["lon"])
+                    carrito = {p: _cantidad(c) for p, c in r["carrito"].items()}
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    avisos.append(f"línea {linea}: no se pudo leer ({e!r})"); continue
+                malos = [p for p, c in carrito.items() if c is None or not str(p).strip()]
+                if lat is None or lon is None or malos or not carrito:
+                    avisos.append(f"línea {linea}: coordenadas, producto o cantidad inválidos"
+                                  + (f" ({', '.join(map(str, malos))})" if malos else "")); continue
+                r.update(lat=lat, lon=lon, carrito=carrito)
+                r.setdefault("cotizacion", str(k))
+                r.setdefault("radio_km", radio_defecto)
+                out.append(r)
+        return out
+    df = pd.read_csv(path, dtype={"cotizacion": str})
+    if "radio_km" not in df:
+        df["radio_km"] = radio_defecto
+    df["linea"] = df.index + 2  # la 1 es el encabezado
+    out = []
+    for cot, g in df.groupby("cotizacion", sort=False):
+        lat, lon = _coordenada(g["lat"].iloc[0]), _coordenada(g["lon"].iloc[0])
+        if lat is None or lon is None:
+            avisos.append(f"línea {g['linea'].iloc[0]}: cotización {cot} sin coordenadas válidas")
+            continue
+        carrito = {}
+        for p, c, linea in zip(g["producto"], g["cantidad"], g["linea"]):
+            n = _cantidad(c)
+            if n is None or pd.isna(p) or not str(p).strip():
+                avisos.append(f"línea {linea}: producto o cantidad inválidos ({p!r}, {c!r})")
+                continue
+            carrito[p] = n
+        if not carrito:
+            continue
+        out.append({
+            "cotizacion": cot, "lat": lat, "lon": lon,
+            "radio_km": float(g["radio_km"].fillna(radio_defecto).iloc[0]),
+            "carrito": carrito,
+        })
+    return out
+
+def _archivo(cotizacion, puesto, ferre, usados):
+    """Nombre del PDF en el ZIP; con el puesto en el ranking, porque hay tiendas con el mismo nombre.
+    Si aun así se repite (ids de carrito que quedan iguales al limpiarlos), lleva un sufijo."""
+    base = nombre = re.sub(r"[^\w\-]+", "_", f"{cotizacion}_{puesto}_{ferre}").strip("_")
+    n = 1
+    while nombre in usados:
+        n += 1
+        nombre = f"{base}_{n}"
+    usados.add(nombre)
+    return f"cotizacion_{nombre}.pdf"
+
+def _render(tarea):
+    """Corre en un proceso del pool: (archivo, bytes del PDF, segundos)."""
+    archivo, ferre, ubic = tarea
+    t0 = time.perf_counter()
+    pdf = pdf_proforma_bytes(ferre, ubic).getvalue()
+    return archivo, pdf, time.perf_counter() - t0
+
+def _a_medida(pool, fn, tareas, en_vuelo):
+    """Resultados de fn(tarea) según terminan, con a lo sumo `en_vuelo` pendientes a la vez."""
+    pendientes = set()
+    for tarea in tareas:
+        pendientes.add(pool.submit(fn, tarea))
+        if len(pendientes) >= en_vuelo:
+            listos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            yield from (f.result() for f in listos)
+    for f in as_completed(pendientes):
+        yield f.result()
+
+def cotizar_lote(carritos, motor: Cotizador, top=1):
+    """Genera (tareas de render, filas del resumen) para todos los carritos."""
+    tareas, resumen, usados = [], [], set()
+    for c in carritos:
+        ranking = motor.cotizar(c["lat"], c["lon"], c["radio_km"], c["carrito"], top=top)
+        if not ranking:
+            resumen.append({"cotizacion": c["cotizacion"], "puesto": "", "ferreteria": "", "total": "",
+                            "dist_km": "", "faltantes": "", "archivo": "", "estado": "sin ferreterías en el radio"})
+        for puesto, f in enumerate(ranking, 1):
+            archivo = _archivo(c["cotizacion"], puesto, f["ferreteria"], usados)
+            tareas.append((archivo, f, {"lat": c["lat"], "lon": c["lon"]}))
+            resumen.append({"cotizacion": c["cotizacion"], "puesto": puesto, "ferreteria": f["ferreteria"],
+                            "total": round(f["total"], 2), "dist_km": round(f["dist"], 3),
+                            "faltantes": "; ".join(map(str, f["faltantes"])), "archivo": archivo, "estado": "ok"})
+    return tareas, resumen
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Cotizaciones en lote a un ZIP de PDFs.")
+    ap.add_argument("carritos")
+    ap.add_argument("--salida", default="cotizaciones.zip")
+    ap.add_argument("--catalogo", default=os.environ.get("DINO_CATALOGO", "dinoe.xlsx"))
+    ap.add_argument("--radio", type=float, default=3.0, help="radio por defecto en km")
+    ap.add_argument("--top", type=int, default=1, help="cotizaciones por carrito (mejores tiendas)")
+    ap.add_argument("--procesos", type=int, default=os.cpu_count())
+    a = ap.parse_args(argv)
+
+    tiempos = {}
+    t0 = time.perf_counter()
+    try:
+        motor = Cotizador.desde_archivo(a.catalogo)
+    except CatalogoError as e:
+        print(f"Error de catálogo: {e}", file=sys.stderr)
+        return 1
+    tiempos["carga"] = time.perf_counter() - t0
+
+    t = time.perf_counter()
+    avisos = []
+    carritos = leer_carritos(a.carritos, a.radio, avisos)
+    tiempos["lectura_carritos"] = time.perf_counter() - t
+    for aviso in avisos:
+        print(f"{a.carritos}: {aviso} (se omite)", file=sys.stderr)
+
+    t = time.perf_counter()
+    tareas, resumen = cotizar_lote(carritos, motor, a.top)
+    tiempos["busqueda_y_precios"] = time.perf_counter() - t
+
+    # Los PDFs se escriben al ZIP a medida que llegan y se piden de a pocos: nunca están todos en memoria.
+    t = time.perf_counter()
+    render_cpu = 0.0
+    with zipfile.ZipFile(a.salida, "w", compression=zipfile.ZIP_DEFLATED) as zf, \
+         ProcessPoolExecutor(max_workers=a.procesos) as pool:
+        for archivo, pdf, seg in _a_medida(pool, _render, tareas, EN_VUELO_POR_PROCESO * a.procesos):
+            zf.writestr(archivo, pdf)
+            render_cpu += seg
+        texto = io.StringIO()
+        w = csv.DictWriter(texto, fieldnames=list(resumen[0]) if resumen else ["cotizacion"])
+        w.writeheader(); w.writerows(resumen)
+        zf.writestr("resumen.csv", texto.getvalue())
+    tiempos["render_y_escritura"] = time.perf_counter() - t
+    tiempos["render_cpu_suma"] = render_cpu
+    total = time.perf_counter() - t0
+
+    n = len(tareas)
+    print(f"{len(carritos)} carritos → {n} cotizaciones en {a.salida}")
+    for etapa, seg in tiempos.items():
+        print(f"  {etapa:<20} {seg:8.3f} s")
+    print(f"  {'total':<20} {total:8.3f} s  ({n / total if total else 0:,.1f} cotizaciones/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
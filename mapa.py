@@ -0,0 +1,82 @@
+# mapa.py
+# Capa de tiendas del mapa precalculada: un único payload JSON que se arma una vez por versión de datos.
+import json
+
+import folium
+from folium.plugins import MarkerCluster
+from folium.template import Template
+
+from catalogo import fichas_asociado
+
+def popup_tienda(nombre, lat, lon, info: dict) -> str:
+    info_html = ""
+    if info:
+        info_html = f"""
+            <div style='margin-top:6px;'>
+                <div><b>Asociado:</b> {info.get('Nombre del Asociado','')}</div>
+                <div><b>Dir:</b> {info.get('Dirección tienda','')}</div>
+                <div><b>Cta:</b> {info.get('Cta de abono para la venta','')}</div>
+                <div><b>Contacto:</b> {info.get('Persona de contacto','')} — {info.get('Número de Contacto','')}</div>
+                <div><b>Yape/Plin:</b> {info.get('Número o Código Yape / Plin','')}</div>
+            </div>
+        """
+    return f"""
+        <div style='min-width:220px;padding:6px;'>
+            <b>{nombre}</b><br>
+            <small>Lat: {lat:.5f}, Lon: {lon:.5f}</small>
+            {info_html}
+        </div>
+    """
+
+def datos_capa_tiendas(indice) -> str:
+    """JSON [[lat, lon, popup_html], ...] de todas las tiendas del índice, listo para incrustar en la página."""
+    filas = [
+        [lat, lon, popup_tienda(nombre, lat, lon, info)]
+        for nombre, lat, lon, info in zip(indice.tiendas["Ferreteria"].tolist(), indice.lats.tolist(),
+                                          indice.lons.tolist(), fichas_asociado(indice.tiendas))
+    ]
+    return json.dumps(filas, ensure_ascii=False).replace("</", "<\\/")
+
+def callback_marcador(logo_url=None) -> str:
+    if logo_url:
+        icono = f"L.icon({{iconUrl: {json.dumps(logo_url)}, iconSize: [28, 28]}})"
+    else:
+        icono = ("L.AwesomeMarkers.icon({icon: 'shopping-cart', iconColor: 'white', "
+                 "markerColor: 'blue', prefix: 'glyphicon', extraClasses: 'fa-rotate-0'})")
+    return f"""function (row) {{
+        var marker = L.marker(new L.LatLng(row[0], row[1]), {{icon: {icono}}});
+        marker.bindPopup(row[2], {{maxWidth: 320}});
+        return marker;
+    }}"""
+
+class CapaTiendas(MarkerCluster):
+    """Como FastMarkerCluster, pero con los datos ya serializados: agregarla a un mapa no recorre las tiendas."""
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var callback = {{ this.callback }};
+                var data = {{ this.datos_json }};
+                var cluster = L.markerClusterGroup({{ this.options|tojavascript }});
+                for (var i = 0; i < data.length; i++) {
+                    callback(data[i]).addTo(cluster);
+                }
+                cluster.addTo({{ this._parent.get_name() }});
+                return cluster;
+            })();
+        {% endmacro %}"""
+    )
+
+    def __init__(self, datos_json: str, callback: str, **kwargs):
+        super().__init__(**kwargs)
+        self._name = "CapaTiendas"
+        self.datos_json = datos_json
+        self.callback = callback
+
+def mapa_base(lat, lon, zoom, direccion=None):
+    """Mapa centrado en el usuario con su marcador (la parte por sesión, barata de rehacer)."""
+    m = folium.Map(location=[lat, lon], zoom_start=zoom, tiles="CartoDB positron")
+    folium.Marker([lat, lon], popup=direccion or "Tu ubicación",
+                  icon=folium.Icon(color="red", icon="home")).add_to(m)
+    return m
@@ -0,0 +1,236 @@
+# metricas.py
+# Instrumentación liviana de la ruta caliente: tramos con nombre (context manager o decorador) que
+# acumulan tiempos y contadores por proceso, el desglose de cada corrida del script o request, y
+# su exportación como texto de Prometheus (/metrics) o en un log JSON rotativo.
+#   with tramo("cotizar.radio"): ...      @medido("pdf")      contar("geo_cache", resultado="acierto")
+#   with corrida("app.resultados") as c: ...   → c.tramos: [{"tramo", "seg", "nivel"}, ...]
+# DINO_METRICAS_LOG=ruta.jsonl deja una línea por corrida (rota a los 10 MB, guarda 5 copias).
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LIMITES_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIJO = "dino"
+LOG_MAX_MB = 10
+LOG_COPIAS = 5
+TIPO_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+def _etiquetas(pares) -> str:
+    if not pares:
+        return ""
+    esc = (lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pares) + "}"
+
+class Metricas:
+    """Acumuladores de un proceso: histograma de duración por tramo y contadores con etiquetas.
+
+    Seguro entre hilos; observar cuesta un lock y una búsqueda binaria sobre los límites.
+    """
+
+    def __init__(self, limites=LIMITES_S):
+        self.limites = tuple(limites)
+        self._lock = threading.Lock()
+        self._tramos = {}       # nombre → {"cubetas": [n por límite..., n > último], "suma", "errores"}
+        self._contadores = {}   # (nombre, ((etiqueta, valor), ...)) → total
+
+    def observar(self, nombre, seg, error=False):
+        with self._lock:
+            h = self._tramos.get(nombre)
+            if h is None:
+                h = self._tramos[nombre] = {"cubetas": [0] * (len(self.limites) + 1), "suma": 0.0, "errores": 0}
+            h["cubetas"][bisect_left(self.limites, seg)] += 1
+            h["suma"] += seg
+            h["errores"] += bool(error)
+
+    def contar(self, nombre, n=1, **etiquetas):
+        clave = (nombre, tuple(sorted((k, str(v)) for k, v in etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + n
+
+    def resumen(self) -> dict:
+        """{"tramos": {nombre: {"n", "seg_total", "errores"}}, "contadores": {"nombre{k=v}": total}}."""
+        with self._lock:
+            tramos = {k: {"n": sum(h["cubetas"]), "seg_total": h["suma"], "errores": h["errores"]}
+                      for k, h in self._tramos.items()}
+            contadores = {n + _etiquetas(e): v for (n, e), v in self._contadores.items()}
+        return {"tramos": tramos, "contadores": contadores}
+
+    def texto_prometheus(self) -> str:
+        with self._lock:
+            tramos = {k: (list(h["cubetas"]), h["suma"], h["errores"]) for k, h in sorted(self._tramos.items())}
+            contadores = sorted(self._contadores.items())
+        h = f"{PREFIJO}_tramo_segundos"
+        lineas = [f"# HELP {h} Duración de los tramos instrumentados.", f"# TYPE {h} histogram"]
+        for nombre, (cubetas, suma, _) in tramos.items():
+            acumulado = 0
+            for le, n in zip([*map(repr, self.limites), "+Inf"], cubetas):
+                acumulado += n
+                lineas.append(f"{h}_bucket{_etiquetas([('tramo', nombre), ('le', le)])} {acumulado}")
+            lineas.append(f"{h}_sum{_etiquetas([('tramo', nombre)])} {suma!r}")
+            lineas.append(f"{h}_count{_etiquetas([('tramo', nombre)])} {acumulado}")
+        e = f"{PREFIJO}_tramo_errores_total"
+        lineas += [f"# HELP {e} Tramos que terminaron con una excepción.", f"# TYPE {e} counter"]
+        lineas += [f"{e}{_etiquetas([('tramo', nombre)])} {err}" for nombre, (_, _, err) in tramos.items()]
+        vistos = set()
+        for (nombre, etiquetas), v in contadores:
+            m = f"{PREFIJO}_{nombre}_total"
+            if m not in vistos:
+                vistos.add(m)
+                lineas.append(f"# TYPE {m} counter")
+            lineas.append(f"{m}{_etiquetas(etiquetas)} {v}")
+        return "\n".join(lineas) + "\n"
+
+METRICAS = Metricas()  # las del proceso: todo lo instrumentado reporta acá
+
+# ===========================
+# CORRIDAS Y TRAMOS
+# ===========================
+class Corrida:
+    """Desglose de una corrida del script o de un request: cada tramo abierto mientras está
+    vigente (en el mismo hilo o contexto), en orden de apertura y con su nivel de anidamiento."""
+
+    def __init__(self, nombre, **datos):
+        self.nombre = nombre
+        self.datos = datos
+        self.inicio = time.time()
+        self.seg = None
+        self.tramos = []
+        self._nivel = 0
+
+    def _abrir(self, nombre) -> int:
+        self.tramos.append({"tramo": nombre, "seg": None, "nivel": self._nivel})
+        self._nivel += 1
+        return len(self.tramos) - 1
+
+    def _cerrar(self, pos, seg):
+        self._nivel -= 1
+        self.tramos[pos]["seg"] = seg
+
+    def como_dict(self) -> dict:
+        return {"ts": round(self.inicio, 3), "corrida": self.nombre, "seg": self.seg, **self.datos,
+                "tramos": self.tramos}
+
+_vigente = contextvars.ContextVar("corrida_vigente", default=None)
+
+@contextmanager
+def tramo(nombre, metricas=None):
+    """Mide el bloque: suma al histograma del tramo y, si hay una corrida vigente, a su desglose.
+    Solo cuenta como error una Exception (no el st.stop/st.rerun de Streamlit)."""
+    c = _vigente.get()
+    pos = c._abrir(nombre) if c is not None else None
+    error = False
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        seg = time.perf_counter() - t0
+        (metricas or METRICAS).observar(nombre, seg, error)
+        if c is not None:
+            c._cerrar(pos, seg)
+
+def medido(nombre=None):
+    """Decorador: cada llamada es un tramo (por defecto con el nombre de la función)."""
+    def deco(fn):
+        n = nombre or fn.__name__
+        @functools.wraps(fn)
+        def envuelta(*args, **kwargs):
+            with tramo(n):
+                return fn(*args, **kwargs)
+        return envuelta
+    return deco
+
+def contar(nombre, n=1, **etiquetas):
+    METRICAS.contar(nombre, n, **etiquetas)
+
+@contextmanager
+def corrida(nombre, metricas=None, **datos):
+    """Abre el desglose de una corrida/request; al salir queda en el log JSON si está configurado."""
+    c = Corrida(nombre, **datos)
+    token = _vigente.set(c)
+    error = False
+    t0 = time.perf_counter()
+    try:
+        yield c
+    except Exception:
+        error = True
+        raise
+    finally:
+        c.seg = time.perf_counter() - t0
+        _vigente.reset(token)
+        (metricas or METRICAS).observar(nombre, c.seg, error)
+        log = _log()
+        if log is not None:
+            log.info(json.dumps(c.como_dict(), ensure_ascii=False, default=str))
+
+def corrida_vigente():
+    return _vigente.get()
+
+# ===========================
+# EXPORTACIÓN
+# ===========================
+_log_lock = threading.Lock()
+_log_listo = False
+_logger = logging.getLogger("dino.metricas")
+
+def configurar_log(ruta, max_mb=LOG_MAX_MB, copias=LOG_COPIAS):
+    """Una línea JSON por corrida en `ruta`, rotando el archivo a los `max_mb`."""
+    global _log_listo
+    with _log_lock:
+        for h in list(_logger.handlers):
+            _logger.removeHandler(h)
+            h.close()
+        manejador = logging.handlers.RotatingFileHandler(ruta, maxBytes=int(max_mb * 2**20),
+                                                         backupCount=copias, encoding="utf-8")
+        manejador.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(manejador)
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        _log_listo = True
+
+def _log():
+    global _log_listo
+    if not _log_listo:
+        ruta = os.environ.get("DINO_METRICAS_LOG")
+        if ruta:
+            configurar_log(ruta)
+        _log_listo = True
+    return _logger if _logger.handlers else None
+
+class _ManejadorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        cuerpo = self.server.metricas.texto_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", TIPO_PROMETHEUS)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, fmt, *args):
+        pass
+
+def servir_metricas(puerto, host="127.0.0.1", metricas=None):
+    """GET /metrics en un hilo aparte (para procesos sin servidor HTTP propio, como Streamlit).
+    None si el puerto está ocupado, p. ej. por otro proceso de la app."""
+    try:
+        srv = ThreadingHTTPServer((host, puerto), _ManejadorMetricas)
+    except OSError as e:
+        print(f"No se pudo exponer /metrics en {host}:{puerto}: {e}")
+        return None
+    srv.daemon_threads = True
+    srv.metricas = metricas or METRICAS
+    threading.Thread(target=srv.serve_forever, name="metricas", daemon=True).start()
+    return srv
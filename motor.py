@@ -0,0 +1,300 @@
+# motor.py
+# Motor de cotización sin interfaz: catálogo normalizado + índice de tiendas + matriz de precios +
+# índice de búsqueda de productos, cargados una vez.
+# Lo usan la app de Streamlit, el lote (lote.py) y la API HTTP (api.py). Si hay un publicador
+# (compartido.py) con la misma versión del catálogo, las tablas se mapean desde memoria compartida.
+# Con DINO_GRAFO (grafo vial compilado con rutas.py) también se puede cotizar por distancia por calles.
+# Con DINO_HISTORIAL (carpeta) cada carga nueva del catálogo se suma al historial de precios (historial.py).
+import functools
+import os
+import threading
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from busqueda import IndiceCatalogo
+from catalogo import Catalogo, cargar_catalogo, hash_archivo
+from compartido import adjuntar
+from geo import DistanciasOrdenadas, IndiceTiendas, TeselasTiendas
+from historial import HistorialPrecios
+from metricas import contar, tramo
+from precios import MatrizPrecios, fichas_tiendas, ordenar_tiendas, resumen_tiendas
+from proforma import proforma_cacheada
+from reparto import resumen_reparto
+from rutas import GrafoVial, RutasTiendas
+
+RADIO_MAX_KM = 15        # tope del slider de radio en resultados
+RECALCULO_CADA = 200     # cambios de carrito antes de rehacer los subtotales desde cero (deriva de floats)
+ESPERA_PUBLICACION_S = 30  # al recargar un catálogo compartido, cuánto esperar a que el publicador saque la versión nueva
+GRAFO_PATH = os.environ.get("DINO_GRAFO")
+HISTORIAL_PATH = os.environ.get("DINO_HISTORIAL")
+
+@functools.lru_cache(maxsize=2)
+def grafo_vial(path):
+    """El grafo vial, una vez por proceso (no cambia con las recargas del catálogo); None si no se puede leer."""
+    try:
+        return GrafoVial.cargar(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Grafo vial no disponible ({path}): {e}")
+        return None
+
+def registrar_historial(catalogo, version):
+    """Suma la carga al historial de precios; si falla, el catálogo se sirve igual."""
+    try:
+        with tramo("historial.registrar"):
+            HistorialPrecios(HISTORIAL_PATH).registrar(catalogo, version)
+    except Exception as e:
+        print(f"No se pudo registrar la carga en el historial ({HISTORIAL_PATH}): {e}")
+
+class Cotizador:
+    """Todo lo que hace falta para cotizar un carrito alrededor de un punto.
+
+    Es de solo lectura después de construido: un mismo objeto se comparte entre hilos
+    (sesiones de Streamlit, requests de la API) sin bloqueos.
+    """
+
+    def __init__(self, catalogo: Catalogo, version=None, compartido=None, grafo=None):
+        self.version = version      # sha256 de la fuente, si vino de un archivo
+        self.compartido = compartido  # CatalogoCompartido del que salen las tablas (mantiene el mapeo)
+        self.catalogo = catalogo
+        self.avisos = catalogo.avisos
+        with tramo("motor.indices"):
+            teselas = catalogo.teselas
+            if teselas is None or teselas.radio_km < RADIO_MAX_KM:
+                with tramo("teselas.construir"):
+                    teselas = TeselasTiendas.desde_tiendas(catalogo.tiendas, radio_km=RADIO_MAX_KM)
+            self.indice = IndiceTiendas(catalogo.tiendas, catalogo.inicio, teselas=teselas)
+            matriz = compartido.matriz(self.indice) if compartido is not None else None
+            self.matriz = matriz if matriz is not None else MatrizPrecios.desde_catalogo(catalogo)
+            self.busqueda = IndiceCatalogo.desde_catalogo(catalogo)
+        with tramo("rutas.ajuste"):
+            self.rutas = RutasTiendas(grafo, self.indice) if grafo is not None else None
+
+    @classmethod
+    def desde_archivo(cls, path, version=None, espera_s=0.0):
+        """Carga el catálogo: del publicador en memoria compartida si tiene esta versión (esperándolo
+        hasta `espera_s`), si no del snapshot (si está al día) o la fuente. Propaga CatalogoError."""
+        version = version or hash_archivo(path)
+        grafo = grafo_vial(GRAFO_PATH) if GRAFO_PATH else None
+        compartido = adjuntar(version, espera_s)
+        if compartido is not None:
+            motor = cls(compartido.catalogo(), version=version, compartido=compartido, grafo=grafo)
+        else:
+            motor = cls(cargar_catalogo(path), version=version, grafo=grafo)
+        if HISTORIAL_PATH:
+            registrar_historial(motor.catalogo, version)
+        return motor
+
+    def en_radio(self, lat, lon, radio_km):
+        """(ids, distancias_km) de las tiendas dentro del radio, de la más cercana a la más lejana."""
+        return self.indice.en_radio(lat, lon, radio_km)
+
+    def en_radio_vial(self, lat, lon, radio_km):
+        """(ids, km por calle, minutos) de las tiendas a <= radio_km por calle, de la más cercana a la
+        más lejana; None si no hay grafo vial o el punto queda fuera de él."""
+        if self.rutas is None:
+            return None
+        with tramo("cotizar.radio_vial"):
+            return self.rutas.en_radio(lat, lon, radio_km)
+
+    def filas_en_radio(self, lat, lon, radio_km):
+        """Precios de las tiendas en el radio, con los nombres de tienda y producto y `distancia`."""
+        ids, dist = self.en_radio(lat, lon, radio_km)
+        filas, n = self.indice.filas_de(ids)
+        df = self.catalogo.precios.take(filas).reset_index(drop=True)
+        df.insert(1, "Ferreteria", self.indice.tiendas["Ferreteria"].to_numpy()[df["tienda"].to_numpy()])
+        df.insert(3, "Producto", pd.Categorical.from_codes(df["producto"].to_numpy(), categories=self.catalogo.productos))
+        df["distancia"] = np.repeat(dist, n)
+        return df
+
+    def resumen(self, ids, dist, carrito: dict, top=None):
+        return resumen_tiendas(self.indice, self.matriz, ids, dist, carrito, top=top)
+
+    def cotizar(self, lat, lon, radio_km, carrito: dict, top=None, vial=False):
+        """Tiendas del radio que venden algo del carrito, de la más barata a la más cara.
+
+        Con `vial`, radio y desempate son por distancia por calles y cada tienda trae `minutos`
+        estimados en auto; si no hay grafo o el punto queda fuera, se usa la línea recta.
+        """
+        r = self.en_radio_vial(lat, lon, radio_km) if vial else None
+        if r is not None:
+            ids, km, minutos = r
+            if not len(ids) or not carrito:
+                return []
+            with tramo("cotizar.precios"):
+                tiendas = self.matriz.cotizar(ids, km, carrito, top=top)
+                ranking = fichas_tiendas(self.indice, self.matriz, tiendas, dict(zip(ids.tolist(), km.tolist())), carrito)
+            minutos_de = dict(zip(ids.tolist(), minutos.tolist()))
+            for t, f in zip(tiendas.tolist(), ranking):
+                f["minutos"] = minutos_de[t]
+            return ranking[:top] if top is not None else ranking
+        with tramo("cotizar.radio"):
+            ids, dist = self.en_radio(lat, lon, radio_km)
+        with tramo("cotizar.precios"):
+            ranking = self.resumen(ids, dist, carrito, top=top)
+        return ranking[:top] if top is not None else ranking
+
+    def repartir(self, lat, lon, radio_km, carrito: dict, k=2, costo_visita=0.0, costo_km=0.0, vial=False):
+        """La combinación más barata de a lo sumo `k` tiendas del radio (ver reparto.repartir);
+        con `vial`, radio y costo_km por distancia por calles."""
+        r = self.en_radio_vial(lat, lon, radio_km) if vial else None
+        if r is not None:
+            ids, dist = r[0], r[1]
+        else:
+            with tramo("cotizar.radio"):
+                ids, dist = self.en_radio(lat, lon, radio_km)
+        with tramo("reparto"):
+            return resumen_reparto(self.indice, self.matriz, ids, dist, carrito, k, costo_visita, costo_km)
+
+    def pdf(self, ferre: dict, ubic_usuario: dict) -> bytes:
+        return proforma_cacheada(ferre, ubic_usuario)
+
+    def __len__(self):
+        return len(self.indice)
+
+class GestorCatalogo:
+    """Versión vigente del catálogo, con recarga en caliente.
+
+    Un hilo revisa la fuente cada `intervalo_s`: si cambian mtime/tamaño (y siguen iguales en la
+    revisión siguiente, para no leer un archivo a medio copiar) y el sha256 es otro, arma un
+    Cotizador nuevo en ese mismo hilo y lo publica con una sola asignación. Quien ya tomó
+    `actual()` sigue con su versión completa; nadie espera la recarga. Si la recarga falla se
+    sigue sirviendo la versión anterior y el error queda en `ultimo_error`. Si la versión vigente
+    vino de memoria compartida, la nueva se espera del publicador en vez de cargarla aparte.
+
+    `cargar(path, version)` arma la versión (por defecto Cotizador.desde_archivo); solo en ese
+    último caso recibe además `espera_s`.
+    """
+
+    def __init__(self, path, intervalo_s=5.0, cargar=None, vigilar=True):
+        self.path = str(path)
+        self.intervalo_s = intervalo_s
+        self._cargar = cargar or Cotizador.desde_archivo
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._firma = self._firma_archivo()
+        self._pendiente = None
+        self._motor = self._cargar(self.path, hash_archivo(self.path))  # primera carga: síncrona
+        self.version = 1
+        self.ultimo_error = None
+        if vigilar:
+            threading.Thread(target=self._vigilar, name="catalogo-recarga", daemon=True).start()
+
+    def actual(self) -> Cotizador:
+        return self._motor
+
+    def _firma_archivo(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def revisar(self) -> bool:
+        """Recarga si la fuente cambió y ya está quieta. True si publicó una versión nueva."""
+        firma = self._firma_archivo()
+        if firma is None or firma == self._firma:
+            self._pendiente = None
+            return False
+        if firma != self._pendiente:
+            self._pendiente = firma  # recién cambió: se confirma en la próxima revisión
+            return False
+        return self.recargar(firma)
+
+    def recargar(self, firma=None) -> bool:
+        firma = firma or self._firma_archivo()
+        with self._lock:
+            try:
+                sha = hash_archivo(self.path)
+                if sha == self._motor.version:
+                    self._firma, self._pendiente = firma, None
+                    return False
+                extra = {}
+                if getattr(self._motor, "compartido", None) is not None:
+                    extra["espera_s"] = ESPERA_PUBLICACION_S  # la versión nueva la saca el publicador
+                with tramo("catalogo.recarga"):
+                    nuevo = self._cargar(self.path, sha, **extra)
+            except Exception as e:
+                contar("recargas_catalogo", resultado="error")
+                self.ultimo_error = e
+                self._firma, self._pendiente = firma, None  # no reintentar hasta el próximo cambio
+                print(f"Recarga del catálogo fallida: {e}")
+                traceback.print_exc()
+                return False
+            self._motor = nuevo
+            self._firma, self._pendiente = firma, None
+            self.version += 1
+            contar("recargas_catalogo", resultado="ok")
+            self.ultimo_error = None
+            return True
+
+    def _vigilar(self):
+        while not self._parar.wait(self.intervalo_s):
+            try:
+                self.revisar()
+            except Exception as e:
+                self.ultimo_error = e
+
+    def detener(self):
+        self._parar.set()
+
+class ResultadosSesion:
+    """Cache de resultados de una sesión, atado a la última ubicación consultada.
+
+    Guarda las tiendas hasta `radio_max` ordenadas por distancia (cambiar el radio es un corte
+    por búsqueda binaria) y el subtotal del carrito en cada una (cambiar una cantidad suma
+    precio × diferencia en vez de recotizar todo). Moverse de ubicación lo rehace.
+    """
+
+    def __init__(self, motor: Cotizador, radio_max=RADIO_MAX_KM):
+        self.motor = motor
+        self.radio_max = radio_max
+        self._ubic = None
+
+    def _ubicar(self, lat, lon):
+        if self._ubic == (lat, lon):
+            return
+        self._ubic = (lat, lon)
+        self._cerca = DistanciasOrdenadas(self.motor.indice, lat, lon, self.radio_max)
+        self._reiniciar_carrito()
+
+    def _reiniciar_carrito(self):
+        self._carrito = {}
+        self._totales = np.zeros(len(self._cerca))
+        self._vende = np.zeros(len(self._cerca), dtype=np.int64)  # productos del carrito que tiene cada tienda
+        self._cambios = 0
+
+    def _actualizar_carrito(self, carrito: dict):
+        nuevo = {p: c for p, c in carrito.items() if c > 0}
+        if self._cambios >= RECALCULO_CADA:
+            self._reiniciar_carrito()
+        prods = [p for p in nuevo.keys() | self._carrito.keys() if nuevo.get(p, 0) != self._carrito.get(p, 0)]
+        if not prods:
+            return
+        matriz = self.motor.matriz
+        antes = np.array([self._carrito.get(p, 0) for p in prods], dtype=float)
+        despues = np.array([nuevo.get(p, 0) for p in prods], dtype=float)
+        cols = np.array([matriz.producto_id.get(p, -1) for p in prods], dtype=np.int64)
+        sub = matriz._sub(self._cerca.ids, cols)
+        hay = ~np.isnan(sub)
+        self._totales += np.where(hay, sub, 0.0) @ (despues - antes)
+        self._vende += hay.astype(np.int64) @ ((despues > 0).astype(np.int64) - (antes > 0).astype(np.int64))
+        self._carrito = nuevo
+        self._cambios += len(prods)
+
+    def resumen(self, lat, lon, radio_km, carrito: dict, top=None):
+        """Lo mismo que `motor.cotizar(lat, lon, radio_km, carrito, top)`, reutilizando lo calculado."""
+        if radio_km > self.radio_max:
+            return self.motor.cotizar(lat, lon, radio_km, carrito, top=top)
+        with tramo("cotizar.radio"):
+            self._ubicar(lat, lon)
+            ids, dist, pos = self._cerca.corte(radio_km)
+        with tramo("cotizar.precios"):
+            self._actualizar_carrito(carrito)
+            if not self._carrito:
+                return []
+            tiendas = ordenar_tiendas(ids, dist, self._totales[pos], self._vende[pos] > 0, top)
+            ranking = fichas_tiendas(self.motor.indice, self.motor.matriz, tiendas,
+                                     dict(zip(ids.tolist(), dist.tolist())), carrito)
+        return ranking[:top] if top is not None else ranking
@@ -0,0 +1,100 @@
+# precios.py
+# Matriz tienda × producto para cotizar un carrito contra muchas tiendas a la vez.
+import numpy as np
+
+from catalogo import fichas_asociado
+
+class MatrizPrecios:
+    """Precios densos (NaN = la tienda no vende el producto), filas alineadas con los ids de IndiceTiendas."""
+
+    def __init__(self, precios: np.ndarray, productos: list):
+        self.precios = precios
+        self.productos = productos
+        self.producto_id = {p: j for j, p in enumerate(productos)}
+
+    @classmethod
+    def desde_catalogo(cls, catalogo):
+        p = catalogo.precios
+        tienda = p["tienda"].to_numpy()
+        ok = tienda >= 0
+        m = np.full((len(catalogo.tiendas), len(catalogo.productos)), np.nan)
+        # con (tienda, producto) repetidos gana la última fila, igual que dict(zip(...))
+        m[tienda[ok], p["producto"].to_numpy()[ok]] = p["Precio"].to_numpy(dtype=float)[ok]
+        return cls(m, catalogo.productos)
+
+    def _items(self, carrito: dict):
+        items = [(p, c) for p, c in carrito.items() if c > 0]
+        cols = np.array([self.producto_id.get(p, -1) for p, _ in items], dtype=np.int64)
+        cant = np.array([c for _, c in items], dtype=float)
+        return items, cols, cant
+
+    def _sub(self, ids, cols):
+        sub = self.precios[np.ix_(ids, np.maximum(cols, 0))]
+        sub[:, cols < 0] = np.nan
+        return sub
+
+    def cotizar(self, ids, dist, carrito: dict, top=None):
+        """Ids (de `ids`) de las tiendas que venden algo del carrito, ordenados por (total, distancia).
+
+        El total de todas las tiendas es un único producto matriz-vector; con `top` solo se
+        ordenan las `top` más baratas (argpartition) más las empatadas con la última.
+        """
+        ids = np.asarray(ids, dtype=np.int64); dist = np.asarray(dist, dtype=float)
+        items, cols, cant = self._items(carrito)
+        if not items or not len(ids):
+            return ids[:0]
+        sub = self._sub(ids, cols)
+        hay = ~np.isnan(sub)
+        totales = np.where(hay, sub, 0.0) @ cant
+        return ordenar_tiendas(ids, dist, totales, hay.any(axis=1), top)
+
+    def detalle(self, tienda, carrito: dict):
+        """(detalle, faltantes, total) de una tienda, en el orden del carrito."""
+        items, cols, _ = self._items(carrito)
+        fila = self._sub(np.array([tienda]), cols)[0]
+        detalle, faltantes, total = [], [], 0.0
+        for (prod, cant), pu in zip(items, fila):
+            if np.isnan(pu):
+                faltantes.append(prod)
+                continue
+            pu = float(pu); pt = pu * cant
+            total += pt
+            detalle.append({"producto": prod, "cantidad": cant, "pu": pu, "pt": pt})
+        return detalle, faltantes, total
+
+def ordenar_tiendas(ids, dist, totales, vende, top=None):
+    """Ids de las tiendas que venden algo, por (total, distancia); con `top`, solo las `top` más
+    baratas (argpartition) más las empatadas con la última. Los totales se comparan redondeados:
+    dos tiendas con el mismo importe empatan aunque la suma en float difiera en el último bit."""
+    totales = np.round(totales, 6)
+    cand = np.flatnonzero(vende)
+    if top is not None and len(cand) > top:
+        k = np.argpartition(totales[cand], top - 1)[:top]
+        corte = totales[cand[k]].max()
+        cand = cand[totales[cand] <= corte]
+    orden = np.lexsort((dist[cand], totales[cand]))
+    return ids[cand[orden]]
+
+def resumen_tiendas(indice, matriz: MatrizPrecios, ids, dist, carrito: dict, top=None):
+    """Cotización por tienda (dicts que consumen la UI y el PDF), de la más barata a la más cara."""
+    if not len(ids) or not carrito: return []
+    return fichas_tiendas(indice, matriz, matriz.cotizar(ids, dist, carrito, top=top),
+                          dict(zip(np.asarray(ids).tolist(), np.asarray(dist, dtype=float).tolist())), carrito)
+
+def ficha_tienda(indice, t, dist, total, detalle, faltantes) -> dict:
+    """El dict de una tienda en el formato de `resumen_tiendas`."""
+    t = int(t)
+    return {
+        "ferreteria": indice.tiendas["Ferreteria"].iat[t],
+        "lat": float(indice.lats[t]), "lon": float(indice.lons[t]), "dist": dist,
+        "total": total, "detalle": detalle, "faltantes": faltantes,
+        "asociado_info": fichas_asociado(indice.tiendas.iloc[[t]])[0],
+    }
+
+def fichas_tiendas(indice, matriz: MatrizPrecios, tiendas, dist_de: dict, carrito: dict):
+    """Un dict por tienda de `tiendas` (en ese orden) con su detalle, faltantes y ficha del asociado."""
+    out = []
+    for t in tiendas:
+        detalle, faltantes, total = matriz.detalle(t, carrito)
+        out.append(ficha_tienda(indice, t, dist_de[int(t)], total, detalle, faltantes))
+    return out
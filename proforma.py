@@ -0,0 +1,167 @@
+# proforma.py
+# PDF de cotización por ferretería. El logo se lee del disco una vez por proceso y se dibuja como
+# form XObject (una sola copia en el PDF aunque haya varias páginas); los PDFs se memorizan por contenido.
+# reportlab se importa recién al generar el primer PDF: `mon` y el cache no lo necesitan.
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from metricas import contar, medido
+
+LOGO_PATH = str(Path(__file__).with_name("LOGO DINO EXPRESS.jpg"))
+MAX_PDFS_CACHE = 256
+FORMATO_EMISION = "%d/%m/%Y %H:%M"  # lo que se imprime como fecha: va en la clave del cache
+
+def mon(v):
+    try:
+        return f"S/ {float(v):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    except:
+        return f"S/ {v}"
+
+@lru_cache(maxsize=4)
+def _logo_bytes(path):
+    """Bytes del logo (leídos una vez por proceso), o None si no se puede leer."""
+    try:
+        return Path(path).read_bytes()
+    except OSError:
+        return None
+
+def _logo(path):
+    """ImageReader del logo para un documento, o None. Cada PDF usa el suyo: leer la imagen mueve
+    la posición del buffer y los PDFs se generan desde varios hilos."""
+    from reportlab.lib.utils import ImageReader
+    datos = _logo_bytes(path)
+    if datos is None:
+        return None
+    try:
+        return ImageReader(io.BytesIO(datos))
+    except Exception:
+        return None
+
+# ===========================
+# PDF: Cotización
+# ===========================
+@medido("pdf")
+def pdf_proforma_bytes(ferre: dict, ubic_usuario: dict, logo_path=LOGO_PATH, emitido=None):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.pdfgen import canvas
+
+    info = ferre.get("asociado_info", {}) or {}
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    W, H = A4
+
+    x_logo = 2*cm
+    logo_h = 2.4*cm
+    logo = _logo(logo_path)
+    if logo is not None:
+        iw, ih = logo.getSize()
+        c.beginForm("logo")
+        c.drawImage(logo, x_logo, H - logo_h - 1.4*cm, width=iw * logo_h / ih, height=logo_h, mask='auto')
+        c.endForm()
+
+    def encabezado():
+        if logo is not None:
+            c.doForm("logo")
+        c.setFillColor(colors.black); c.setFont("Helvetica", 10)
+
+    encabezado()
+    c.drawString(2*cm, H - (logo_h + 2.2*cm), f"Fecha: {emitido or datetime.now().strftime(FORMATO_EMISION)}")
+    c.drawString(2*cm, H - (logo_h + 2.7*cm), f"Ferretería: {ferre['ferreteria']}")
+    c.setStrokeColor(colors.HexColor("#cccccc")); c.setLineWidth(0.8)
+    c.line(2*cm, H - (logo_h + 3.2*cm), 19*cm, H - (logo_h + 3.2*cm))
+
+    y = H - (logo_h + 4.3*cm)
+    c.setFont("Helvetica-Bold", 12); c.drawString(2*cm, y, "Información del Asociado")
+    y -= 0.35*cm; c.setLineWidth(0.6); c.setStrokeColor(colors.HexColor("#e0e0e0")); c.line(2*cm, y, 19*cm, y)
+    y -= 0.4*cm; c.setFont("Helvetica", 10)
+
+    def line(txt):
+        nonlocal y
+        if y < 3.0*cm:
+            c.showPage()
+            encabezado()
+            y = H - (logo_h + 2.0*cm)
+        c.drawString(2*cm, y, txt); y -= 0.46*cm
+
+    if info:
+        line(f"Nombre del Asociado: {info.get('Nombre del Asociado','')}")
+        line(f"Dirección tienda: {info.get('Dirección tienda','')}")
+        line(f"Cta de abono para la venta: {info.get('Cta de abono para la venta','')}")
+        line(f"Persona de contacto: {info.get('Persona de contacto','')}")
+        line(f"Número de Contacto: {info.get('Número de Contacto','')}")
+        line(f"Número o Código Yape/Plin: {info.get('Número o Código Yape / Plin','')}")
+    else:
+        line("No se encontró la ficha del asociado para esta ferretería.")
+
+    y -= 0.2*cm
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(2*cm, y, "Producto")
+    c.drawString(10.2*cm, y, "Cant.")
+    c.drawString(12.2*cm, y, "P. Unit.")
+    c.drawString(15.1*cm, y, "Importe")
+    c.line(2*cm, y-0.2*cm, 19*cm, y-0.2*cm)
+
+    c.setFont("Helvetica", 10); y -= 0.6*cm
+    for item in ferre["detalle"]:
+        if y < 3.0*cm:
+            c.showPage()
+            encabezado()
+            y = H - (logo_h + 2.0*cm)
+            c.setFont("Helvetica-Bold", 10)
+            c.drawString(2*cm, y, "Producto")
+            c.drawString(10.2*cm, y, "Cant.")
+            c.drawString(12.2*cm, y, "P. Unit.")
+            c.drawString(15.1*cm, y, "Importe")
+            c.line(2*cm, y-0.2*cm, 19*cm, y-0.2*cm)
+            c.setFont("Helvetica", 10); y -= 0.6*cm
+
+        prod = str(item["producto"])[:48]
+        c.drawString(2*cm, y, prod)
+        c.drawRightString(12.0*cm, y, f"{int(item['cantidad'])}")
+        c.drawRightString(15.0*cm, y, mon(item["pu"]))
+        c.drawRightString(19.0*cm, y, mon(item["pt"]))
+        y -= 0.5*cm
+
+    c.line(13.8*cm, y-0.2*cm, 19*cm, y-0.2*cm)
+    c.setFont("Helvetica-Bold", 12)
+    c.drawRightString(15.0*cm, y-0.8*cm, "TOTAL")
+    c.drawRightString(19.0*cm, y-0.8*cm, mon(ferre["total"]))
+    c.setFont("Helvetica-Oblique", 9)
+    c.drawString(2*cm, 2.2*cm, "Documento no válido como comprobante de pago. Precios referenciales de la ferretería seleccionada.")
+    c.showPage(); c.save(); buf.seek(0)
+    return buf
+
+# ===========================
+# CACHE POR CONTENIDO
+# ===========================
+_pdfs = OrderedDict()
+_pdfs_lock = threading.Lock()
+
+def clave_proforma(ferre: dict, emitido: str) -> str:
+    """Hash de lo que se imprime: tienda, ficha, líneas, precios, total y la fecha y hora de emisión."""
+    contenido = [ferre["ferreteria"], ferre.get("asociado_info") or {}, ferre["detalle"], ferre["total"], emitido]
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True, default=str).encode()).hexdigest()
+
+def proforma_cacheada(ferre: dict, ubic_usuario: dict, logo_path=LOGO_PATH) -> bytes:
+    emitido = datetime.now().strftime(FORMATO_EMISION)  # al minuto, como sale en el PDF
+    clave = clave_proforma(ferre, emitido)
+    with _pdfs_lock:
+        if clave in _pdfs:
+            _pdfs.move_to_end(clave)
+            contar("pdf_cache", resultado="acierto")
+            return _pdfs[clave]
+    contar("pdf_cache", resultado="fallo")
+    pdf = pdf_proforma_bytes(ferre, ubic_usuario, logo_path, emitido).getvalue()
+    with _pdfs_lock:
+        _pdfs[clave] = pdf
+        while len(_pdfs) > MAX_PDFS_CACHE:
+            _pdfs.popitem(last=False)
+    return pdf
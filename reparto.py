@@ -0,0 +1,153 @@
+# reparto.py
+# Repartir un carrito entre varias ferreterías: la combinación de a lo sumo K tiendas del radio que
+# compra todo (o lo máximo posible) al menor costo, con un costo opcional por visita y por km.
+from itertools import combinations, islice
+from math import comb
+
+import numpy as np
+
+from precios import MatrizPrecios, ficha_tienda
+
+MAX_COMBINACIONES = 100_000  # ~0.1 s de búsqueda exacta; por encima, heurística (voraz + intercambios)
+LOTE_COMBINACIONES = 20_000
+SEMILLAS_VORAZ = 8  # arranques distintos de la heurística (las mejores tiendas solas)
+
+def _poda_dominadas(costos, penal):
+    """Índices de las tiendas no dominadas. Una tienda dominada (otra cuesta <= en cada producto y
+    en penalización) nunca hace falta: reemplazarla por la que la domina no empeora ninguna solución."""
+    n = len(costos)
+    vivas = np.ones(n, dtype=bool)
+    orden = np.lexsort((np.arange(n), penal, costos.sum(axis=1)))
+    for a in orden:
+        if not vivas[a]:
+            continue
+        domina = (costos[a] <= costos).all(axis=1) & (penal[a] <= penal)
+        domina[a] = False
+        vivas &= ~domina
+    return np.flatnonzero(vivas)
+
+def _exacto(costos, penal, k):
+    mejor, mejor_sel = np.inf, None
+    n = len(costos)
+    for r in range(1, min(k, n) + 1):
+        combos = combinations(range(n), r)
+        while True:
+            lote = np.array(list(islice(combos, LOTE_COMBINACIONES)), dtype=np.int64).reshape(-1, r)
+            if not len(lote):
+                break
+            valor = costos[lote].min(axis=1).sum(axis=1) + penal[lote].sum(axis=1)
+            i = int(np.argmin(valor))
+            if valor[i] < mejor - 1e-9:
+                mejor, mejor_sel = float(valor[i]), lote[i].tolist()
+    return mejor_sel
+
+def _valor(costos, penal, sel):
+    return float(costos[sel].min(axis=0).sum() + penal[sel].sum()) if sel else np.inf
+
+def _voraz(costos, penal, k, semillas=SEMILLAS_VORAZ):
+    """Mejor resultado de `_voraz_desde` arrancando por cada una de las `semillas` mejores tiendas solas."""
+    solas = costos.sum(axis=1) + penal
+    mejor, mejor_sel = np.inf, None
+    for s in np.argsort(solas, kind="stable")[:semillas]:
+        sel = _voraz_desde(costos, penal, k, [int(s)])
+        v = _valor(costos, penal, sel)
+        if v < mejor - 1e-9:
+            mejor, mejor_sel = v, sel
+    return mejor_sel
+
+def _voraz_desde(costos, penal, k, sel, max_rondas=50):
+    """Agrega la tienda que más baja el costo hasta K; después intercambia/quita mientras mejore."""
+    sel = list(sel)
+    actual = costos[sel].min(axis=0)
+    for _ in range(k - len(sel)):
+        valores = np.minimum(costos, actual).sum(axis=1) + penal + penal[sel].sum()
+        valores[sel] = np.inf
+        j = int(np.argmin(valores))
+        if sel and valores[j] >= _valor(costos, penal, sel) - 1e-9:
+            break
+        sel.append(j)
+        actual = np.minimum(actual, costos[j])
+    obj = _valor(costos, penal, sel)
+    for _ in range(max_rondas):
+        mejoro = False
+        for pos in range(len(sel)):
+            resto = sel[:pos] + sel[pos + 1:]
+            base = costos[resto].min(axis=0) if resto else np.full(costos.shape[1], np.inf)
+            valores = np.minimum(costos, base).sum(axis=1) + penal + penal[resto].sum()
+            valores[resto] = np.inf
+            j = int(np.argmin(valores))
+            sin = _valor(costos, penal, resto)
+            if sin < obj - 1e-9 and sin <= valores[j]:
+                sel, obj, mejoro = resto, sin, True
+                break
+            if valores[j] < obj - 1e-9:
+                sel = resto[:pos] + [j] + resto[pos:]
+                obj, mejoro = float(valores[j]), True
+        if not mejoro:
+            break
+    return sel
+
+def repartir(matriz: MatrizPrecios, ids, dist, carrito: dict, k=2, costo_visita=0.0, costo_km=0.0,
+             max_combinaciones=MAX_COMBINACIONES):
+    """Mejor combinación de a lo sumo `k` tiendas de `ids` para comprar el carrito.
+
+    Minimiza primero los productos que quedan sin comprar y después el costo: importe de cada
+    producto en la tienda más barata de la combinación + (costo_visita + costo_km·distancia) por
+    tienda. Con pocas combinaciones (tras podar tiendas dominadas) la búsqueda es exhaustiva;
+    si no, voraz con intercambios.
+
+    Devuelve dict con "tiendas" (ids, en orden de distancia), "asignacion" (producto → id de tienda),
+    "faltantes", "importe", "penalizacion" y "exacto"; o None si ninguna tienda vende nada del carrito.
+    """
+    ids = np.asarray(ids, dtype=np.int64); dist = np.asarray(dist, dtype=float)
+    items, cols, cant = matriz._items(carrito)
+    if not items or not len(ids) or k < 1:
+        return None
+    precios = matriz._sub(ids, cols)
+    vendible = ~np.isnan(precios).all(axis=0)
+    if not vendible.any():
+        return None
+    costos = precios[:, vendible] * cant[vendible]
+    # sin el producto cuesta más que cualquier carrito completo: se minimizan primero los faltantes
+    penal = costo_visita + costo_km * dist
+    grande = np.nansum(np.nanmax(costos, axis=0)) + penal.sum() + 1.0
+    costos = np.where(np.isnan(costos), grande, costos)
+
+    vivas = _poda_dominadas(costos, penal)
+    n_combos = sum(comb(len(vivas), r) for r in range(1, min(k, len(vivas)) + 1))
+    exacto = n_combos <= max_combinaciones
+    sel = (_exacto if exacto else _voraz)(costos[vivas], penal[vivas], k)
+    sel = sorted(vivas[sel].tolist())  # ids vienen ordenados por distancia
+
+    elegida = np.array(sel)[costos[sel].argmin(axis=0)]
+    items_vendibles = [it for it, v in zip(items, vendible) if v]
+    asignacion, faltantes, importe = {}, [p for (p, _), v in zip(items, vendible) if not v], 0.0
+    for (prod, c), fila, col in zip(items_vendibles, elegida, np.flatnonzero(vendible)):
+        pu = precios[fila, col]
+        if np.isnan(pu):
+            faltantes.append(prod)
+            continue
+        asignacion[prod] = int(ids[fila])
+        importe += float(pu) * c
+    return {
+        "tiendas": [int(ids[i]) for i in sel],
+        "asignacion": asignacion,
+        "faltantes": faltantes,
+        "importe": importe,
+        "penalizacion": float(penal[sel].sum()),
+        "exacto": exacto,
+    }
+
+def resumen_reparto(indice, matriz: MatrizPrecios, ids, dist, carrito: dict, k=2, costo_visita=0.0, costo_km=0.0):
+    """El reparto en el formato de `resumen_tiendas`: una entrada por tienda con su parte del carrito."""
+    r = repartir(matriz, ids, dist, carrito, k, costo_visita, costo_km)
+    if r is None:
+        return None
+    dist_de = dict(zip(np.asarray(ids).tolist(), np.asarray(dist, dtype=float).tolist()))
+    tiendas = []
+    for t in r["tiendas"]:
+        parte = {p: carrito[p] for p, tt in r["asignacion"].items() if tt == t}
+        detalle, _, total = matriz.detalle(t, parte)
+        tiendas.append(ficha_tienda(indice, t, dist_de[t], total, detalle, []))
+    return {"tiendas": tiendas, "total": r["importe"], "penalizacion": r["penalizacion"],
+            "faltantes": r["faltantes"], "exacto": r["exacto"]}
@@ -0,0 +1,283 @@
+# rutas.py
+# Distancia por calles desde la ubicación del usuario a las tiendas, sobre un grafo vial local.
+# El grafo se compila una vez desde un extracto de OpenStreetMap (XML .osm) a un .npz en formato
+# CSR (por nodo, el rango de sus aristas salientes) con metros y segundos estimados por arista.
+#   python rutas.py lima.osm [--salida lima.grafo.npz]
+# La app lo usa si DINO_GRAFO apunta al .npz (ver motor.py).
+import argparse
+import threading
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from collections import OrderedDict
+from heapq import heappop, heappush
+from pathlib import Path
+
+import numpy as np
+
+from geo import haversine_km
+from metricas import contar, tramo
+
+GRAFO_VERSION = 1
+CELDA_DEG = 0.005          # rejilla para ubicar el nodo más cercano (~550 m)
+MAX_AJUSTE_M = 500         # más lejos que esto de toda calle, el punto queda fuera del grafo
+VELOCIDAD_AJUSTE_KMH = 20  # el tramo recto punto ↔ nodo se cuenta a esta velocidad
+MAX_CACHE_ORIGENES = 512
+
+# km/h cuando la vía no trae maxspeed; los *_link usan la de su vía
+VELOCIDADES_KMH = {
+    "motorway": 80, "trunk": 60, "primary": 50, "secondary": 40, "tertiary": 35,
+    "unclassified": 30, "residential": 25, "living_street": 10, "service": 15, "road": 25,
+}
+
+# ===========================
+# COMPILACIÓN (OSM → CSR)
+# ===========================
+def _velocidad(tags) -> float:
+    tipo = tags.get("highway", "").removesuffix("_link")
+    try:
+        return float(tags.get("maxspeed", "").split()[0])
+    except (ValueError, IndexError):
+        return VELOCIDADES_KMH[tipo]
+
+def _sentido(tags) -> int:
+    """1 solo ida, -1 solo vuelta, 0 doble sentido."""
+    v = tags.get("oneway", "")
+    if v in ("yes", "true", "1"):
+        return 1
+    if v == "-1":
+        return -1
+    return 1 if tags.get("junction") == "roundabout" or tags.get("highway") == "motorway" else 0
+
+def leer_osm(path):
+    """(ids, lats, lons) de los nodos y las vías transitables en auto como (refs, velocidad, sentido)."""
+    ids, lats, lons = array("q"), array("d"), array("d")
+    refs, cortes, vel, sentido = array("q"), array("q", [0]), array("d"), array("b")
+    nds, tags = [], {}
+    eventos = ET.iterparse(path, events=("start", "end"))
+    _, raiz = next(eventos)
+    for evento, el in eventos:
+        if evento == "start":
+            continue
+        if el.tag == "node":
+            ids.append(int(el.get("id"))); lats.append(float(el.get("lat"))); lons.append(float(el.get("lon")))
+        elif el.tag == "nd":
+            nds.append(int(el.get("ref")))
+        elif el.tag == "tag":
+            tags[el.get("k")] = el.get("v")
+        elif el.tag in ("way", "relation"):
+            if el.tag == "way" and tags.get("highway", "").removesuffix("_link") in VELOCIDADES_KMH \
+                    and tags.get("access") not in ("no", "private") and len(nds) > 1:
+                refs.extend(nds); cortes.append(len(refs))
+                vel.append(_velocidad(tags)); sentido.append(_sentido(tags))
+        if el.tag in ("node", "way", "relation"):
+            nds, tags = [], {}  # los <tag> de un nodo (barrera, POI) no pasan a la vía siguiente
+            raiz.clear()  # lo ya leído no se acumula en memoria
+    return (np.frombuffer(ids, dtype=np.int64), np.frombuffer(lats), np.frombuffer(lons),
+            np.frombuffer(refs, dtype=np.int64), np.frombuffer(cortes, dtype=np.int64),
+            np.frombuffer(vel), np.frombuffer(sentido, dtype=np.int8))
+
+def _componente_mayor(n, u, v) -> np.ndarray:
+    """Máscara de los nodos de la mayor componente conexa (sin mirar el sentido): unir y comprimir
+    etiquetas hasta que no cambien, todo vectorizado."""
+    etiqueta = np.arange(n)
+    while True:
+        m = np.minimum(etiqueta[u], etiqueta[v])
+        nueva = etiqueta.copy()
+        np.minimum.at(nueva, etiqueta[u], m)
+        np.minimum.at(nueva, etiqueta[v], m)
+        while True:  # saltos de puntero: cada nodo apunta a la raíz de su árbol
+            saltada = nueva[nueva]
+            if np.array_equal(saltada, nueva):
+                break
+            nueva = saltada
+        if np.array_equal(nueva, etiqueta):
+            break
+        etiqueta = nueva
+    raices, cuenta = np.unique(etiqueta, return_counts=True)
+    return etiqueta == raices[np.argmax(cuenta)]
+
+def compilar_grafo(osm_path, destino=None) -> Path:
+    """Grafo dirigido de la mayor componente de calles del extracto, en CSR, guardado como .npz."""
+    destino = Path(destino) if destino else Path(osm_path).with_suffix(".grafo.npz")
+    ids, lats, lons, refs, cortes, vel, sentido = leer_osm(osm_path)
+    orden = np.argsort(ids)
+    ids = ids[orden]
+    pos = np.searchsorted(ids, refs)
+    if (pos >= len(ids)).any() or (ids[np.minimum(pos, len(ids) - 1)] != refs).any():
+        raise ValueError("El extracto tiene vías con nodos que no incluye (recortar con completeWays)")
+    nodo = orden[pos]  # índice en lats/lons de cada ref
+
+    # tramo i → i+1 dentro de cada vía
+    ultimo = np.zeros(len(refs), dtype=bool); ultimo[cortes[1:] - 1] = True
+    a, b = nodo[:-1][~ultimo[:-1]], nodo[1:][~ultimo[:-1]]
+    via = np.repeat(np.arange(len(vel)), np.diff(cortes) - 1)
+    metros = haversine_km(lats[a], lons[a], lats[b], lons[b]) * 1000  # elemento a elemento
+    segundos = metros / (vel[via] / 3.6)
+    ida, vuelta = sentido[via] >= 0, sentido[via] <= 0
+    u = np.concatenate([a[ida], b[vuelta]]); v = np.concatenate([b[ida], a[vuelta]])
+    metros = np.concatenate([metros[ida], metros[vuelta]])
+    segundos = np.concatenate([segundos[ida], segundos[vuelta]])
+
+    # solo nodos con aristas, renumerados; y de ellos, la componente más grande
+    usados, inversa = np.unique(np.concatenate([u, v]), return_inverse=True)
+    u, v = inversa[:len(u)], inversa[len(u):]
+    mayor = _componente_mayor(len(usados), u, v)
+    nuevo = np.cumsum(mayor) - 1
+    queda = mayor[u]
+    u, v, metros, segundos = nuevo[u[queda]], nuevo[v[queda]], metros[queda], segundos[queda]
+    usados = usados[mayor]
+
+    orden = np.lexsort((v, u))
+    u, v, metros, segundos = u[orden], v[orden], metros[orden], segundos[orden]
+    indptr = np.zeros(len(usados) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(u, minlength=len(usados)), out=indptr[1:])
+    np.savez(destino, version=np.int64(GRAFO_VERSION), lat=lats[usados], lon=lons[usados], indptr=indptr,
+             destino=v.astype(np.int32), metros=metros.astype(np.float32), segundos=segundos.astype(np.float32))
+    return destino
+
+# ===========================
+# CONSULTAS
+# ===========================
+class GrafoVial:
+    """Grafo compilado en memoria: aristas salientes del nodo u en destino[indptr[u]:indptr[u+1]]."""
+
+    def __init__(self, lat, lon, indptr, destino, metros, segundos):
+        self.lat, self.lon = lat.astype(float), lon.astype(float)
+        self.indptr, self.destino, self.metros, self.segundos = indptr, destino, metros, segundos
+        claves = self._clave(np.floor(self.lat / CELDA_DEG), np.floor(self.lon / CELDA_DEG))
+        self._orden = np.argsort(claves, kind="stable")
+        self._celdas, self._celda_inicio = np.unique(claves[self._orden], return_index=True)
+        self._celda_inicio = np.append(self._celda_inicio, len(self._orden))
+
+    @classmethod
+    def cargar(cls, path):
+        with np.load(path) as z:
+            if int(z["version"]) != GRAFO_VERSION:
+                raise ValueError(f"{path}: grafo de otra versión, recompilar con `python rutas.py`")
+            return cls(z["lat"], z["lon"], z["indptr"], z["destino"], z["metros"], z["segundos"])
+
+    def __len__(self):
+        return len(self.lat)
+
+    @staticmethod
+    def _clave(i, j):
+        return (np.asarray(i, dtype=np.int64) << 32) + (np.asarray(j, dtype=np.int64) & 0xFFFFFFFF)
+
+    def nodo_cercano(self, lat, lon):
+        """(nodo, metros) del nodo más cercano a (lat, lon), o (-1, inf) si no hay calle a MAX_AJUSTE_M."""
+        i, j = np.floor(lat / CELDA_DEG), np.floor(lon / CELDA_DEG)
+        claves = self._clave(*(g.ravel() for g in np.meshgrid([i - 1, i, i + 1], [j - 1, j, j + 1], indexing="ij")))
+        pos = np.searchsorted(self._celdas, claves)
+        pos = pos[(pos < len(self._celdas)) & (self._celdas[np.minimum(pos, len(self._celdas) - 1)] == claves)]
+        if not len(pos):
+            return -1, np.inf
+        cand = np.concatenate([self._orden[self._celda_inicio[p]:self._celda_inicio[p + 1]] for p in pos])
+        d = haversine_km(lat, lon, self.lat[cand], self.lon[cand]) * 1000
+        k = int(np.argmin(d))
+        return (int(cand[k]), float(d[k])) if d[k] <= MAX_AJUSTE_M else (-1, np.inf)
+
+    def dijkstra(self, origen, cota_m, objetivos=None) -> dict:
+        """nodo → (metros, segundos) por el camino más corto desde `origen`, para los nodos a <= cota_m.
+
+        Con `objetivos` (conjunto de nodos) termina apenas los asentó a todos: una sola pasada para
+        todas las tiendas candidatas. Los segundos son los del camino más corto en metros.
+        """
+        indptr, destino, metros, segundos = self.indptr, self.destino, self.metros, self.segundos
+        mejor = {origen: 0.0}
+        seg = {origen: 0.0}
+        listos = {}
+        faltan = set(objetivos) if objetivos is not None else None
+        cola = [(0.0, origen)]
+        while cola:
+            d, u = heappop(cola)
+            if u in listos:
+                continue
+            listos[u] = (d, seg[u])
+            if faltan is not None:
+                faltan.discard(u)
+                if not faltan:
+                    break
+            a, b = indptr[u], indptr[u + 1]
+            for v, m, s in zip(destino[a:b].tolist(), metros[a:b].tolist(), segundos[a:b].tolist()):
+                nd = d + m
+                if nd <= cota_m and nd < mejor.get(v, np.inf):
+                    mejor[v] = nd
+                    seg[v] = seg[u] + s
+                    heappush(cola, (nd, v))
+        return listos
+
+class RutasTiendas:
+    """Distancia por calles a las tiendas de un IndiceTiendas, con cache por nodo de origen.
+
+    Cada tienda se ajusta una vez a su nodo más cercano. Una consulta ajusta el origen, corre un
+    Dijkstra acotado hasta asentar los nodos de todas las candidatas y guarda el resultado bajo el
+    nodo de origen: otra consulta que cae en el mismo nodo (misma cuadra) con un radio que no
+    supera la cota ya calculada no vuelve a recorrer el grafo. Los tramos rectos punto ↔ nodo se
+    suman a la distancia. Seguro entre hilos.
+    """
+
+    def __init__(self, grafo: GrafoVial, indice, max_cache=MAX_CACHE_ORIGENES):
+        self.grafo = grafo
+        self.indice = indice
+        ajustes = [grafo.nodo_cercano(la, lo) for la, lo in zip(indice.lats.tolist(), indice.lons.tolist())]
+        self.nodo = np.array([n for n, _ in ajustes], dtype=np.int64)    # -1 = fuera del grafo
+        self.ajuste_m = np.array([m for _, m in ajustes], dtype=float)
+        self._cache = OrderedDict()  # nodo de origen → (cota_m, ids, metros, segundos)
+        self._lock = threading.Lock()
+        self.max_cache = max_cache
+
+    def _desde_nodo(self, origen, cota_m):
+        with self._lock:
+            c = self._cache.get(origen)
+            if c is not None and c[0] >= cota_m:
+                self._cache.move_to_end(origen)
+                contar("rutas_cache", resultado="acierto")
+                return c[1:]
+        contar("rutas_cache", resultado="fallo")
+        g = self.grafo
+        # candidatas: tiendas en el grafo a <= cota en línea recta del nodo (por calle nunca es menos)
+        ids, _ = self.indice.en_radio(g.lat[origen], g.lon[origen], cota_m / 1000)
+        ids = ids[self.nodo[ids] >= 0]
+        with tramo("rutas.dijkstra"):
+            listos = g.dijkstra(origen, cota_m, set(self.nodo[ids].tolist()))
+        par = [listos.get(n, (np.inf, np.inf)) for n in self.nodo[ids].tolist()]
+        metros = np.array([m for m, _ in par], dtype=float) + self.ajuste_m[ids]
+        segundos = np.array([s for _, s in par], dtype=float) + self.ajuste_m[ids] / (VELOCIDAD_AJUSTE_KMH / 3.6)
+        r = (ids, metros, segundos)
+        with self._lock:
+            self._cache[origen] = (cota_m, *r)
+            self._cache.move_to_end(origen)
+            while len(self._cache) > self.max_cache:
+                self._cache.popitem(last=False)
+        return r
+
+    def en_radio(self, lat, lon, radio_km):
+        """(ids, km, minutos) de las tiendas a <= radio_km por calle, de la más cercana a la más lejana;
+        None si el punto está fuera del grafo."""
+        origen, ajuste = self.grafo.nodo_cercano(lat, lon)
+        if origen < 0:
+            return None
+        # la cota cubre también el tramo recto del usuario a su nodo; se redondea hacia arriba para
+        # que radios parecidos desde la misma cuadra compartan la entrada del cache
+        cota_m = np.ceil((radio_km * 1000 + ajuste) / 500) * 500
+        ids, metros, segundos = self._desde_nodo(origen, cota_m)
+        km = (metros + ajuste) / 1000
+        minutos = (segundos + ajuste / (VELOCIDAD_AJUSTE_KMH / 3.6)) / 60
+        dentro = km <= radio_km
+        ids, km, minutos = ids[dentro], km[dentro], minutos[dentro]
+        orden = np.argsort(km, kind="stable")
+        return ids[orden], km[orden], minutos[orden]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compila un extracto de OpenStreetMap (.osm) al grafo vial de la app.")
+    ap.add_argument("osm")
+    ap.add_argument("--salida")
+    a = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    destino = compilar_grafo(a.osm, a.salida)
+    g = GrafoVial.cargar(destino)
+    print(f"{destino}: {len(g):,} nodos, {len(g.destino):,} aristas ({time.perf_counter() - t0:.1f} s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# tests/conftest.py
+# Los módulos de la app viven en la raíz del repo (sin paquete): se agrega al sys.path.
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+
+def texto_catalogo_csv(precios: dict) -> str:
+    """CSV WKT (formato de catalogo.leer_csv_wkt) con {(tienda, producto): precio}; la tienda i en un
+    punto fijo cerca de Lima."""
+    filas = ["Nombre Cliente,Producto,Precio,WKT"]
+    tiendas = sorted({t for t, _ in precios})
+    for (t, p), v in precios.items():
+        i = tiendas.index(t)
+        filas.append(f'{t},{p},{v},"POINT ({-77.03 + i / 100:.4f} {-12.06 - i / 100:.4f})"')
+    return "\n".join(filas) + "\n"
+
+@pytest.fixture
+def catalogo_csv(tmp_path, monkeypatch):
+    """Función que escribe el CSV en tmp_path/catalogo.csv y devuelve la ruta. El catálogo compartido
+    (memoria compartida) también va a tmp_path, para no adjuntarse a uno de otro proceso."""
+    monkeypatch.setenv("DINO_COMPARTIDO_DIR", str(tmp_path))
+    ruta = tmp_path / "catalogo.csv"
+
+    def escribir(precios: dict) -> Path:
+        ruta.write_text(texto_catalogo_csv(precios), encoding="utf-8")
+        return ruta
+    return escribir
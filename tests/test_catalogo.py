@@ -0,0 +1,140 @@
+# tests/test_catalogo.py
+# parse_pares / normalizar_serie / normalize_name contra la implementación original por fila
+# (parse_pair y normalize_name de la app antes de vectorizar), sobre dinoe.xlsx y casos borde.
+import math
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalogo import leer_libro, normalize_name, normalizar_serie, parse_pares, quitar_tildes
+
+DINOE = Path(__file__).resolve().parents[1] / "dinoe.xlsx"
+
+# ===========================
+# REFERENCIA (versión por fila original)
+# ===========================
+def normalize_name_ref(s: str) -> str:
+    if pd.isna(s):
+        return ""
+    s = str(s).strip()
+    s = "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+    s = " ".join(s.split())
+    return s.upper()
+
+def parse_pair_ref(s):
+    if pd.isna(s): return pd.NA, pd.NA
+    t = str(s).strip().replace(" ", "")
+    parts = t.split(",")
+    if len(parts) >= 2:
+        lat_s, lon_s = parts[0], parts[1]
+        lat_s = lat_s.replace(".", "X").replace(",", ".").replace("X", ".")
+        lon_s = lon_s.replace(".", "X").replace(",", ".").replace("X", ".")
+        try: return float(lat_s), float(lon_s)
+        except: return pd.NA, pd.NA
+    return pd.NA, pd.NA
+
+def _par_o_nada(par):
+    """La referencia como la deja el lector: el par solo cuenta si trae los dos números."""
+    lat, lon = par
+    if pd.isna(lat) or pd.isna(lon):
+        return (math.nan, math.nan)
+    return (float(lat), float(lon))
+
+def _coords_ref(df):
+    tmp = df.copy()
+    tmp[["latitud", "longitud"]] = tmp["Coordenadas"].apply(lambda s: pd.Series(parse_pair_ref(s)))
+    tmp["__JOIN_KEY__"] = tmp["Nombre del Asociado"].apply(normalize_name_ref)
+    out = tmp[["Nombre del Asociado", "latitud", "longitud", "__JOIN_KEY__"]].dropna(subset=["latitud", "longitud"])
+    return out.astype({"latitud": float, "longitud": float})
+
+def _info_lookup_ref(info_df):
+    return {
+        normalize_name_ref(r["Nombre del Asociado"]): {
+            "Nombre del Asociado": r.get("Nombre del Asociado", ""),
+            "Dirección tienda": r.get("Dirección tienda", ""),
+            "Cta de abono para la venta": r.get("Cta de abono para la venta", ""),
+            "Persona de contacto": r.get("Persona de contacto", ""),
+            "Número de Contacto": str(r.get("Número de Contacto", "")),
+            "Número o Código Yape / Plin": str(r.get("Número o Código Yape / Plin", "")),
+        }
+        for _, r in info_df.iterrows()
+    }
+
+# ===========================
+# dinoe.xlsx
+# ===========================
+@pytest.fixture(scope="module")
+def libro():
+    return leer_libro(DINOE)
+
+@pytest.fixture(scope="module")
+def hojas():
+    xls = pd.ExcelFile(DINOE)
+    return {sh: pd.read_excel(xls, sh) for sh in xls.sheet_names}
+
+def test_coordenadas_igual_que_la_referencia(libro, hojas):
+    _, _, coords_df, _, _, _ = libro
+    crudo = hojas["coordenadas"][["Nombre del Asociado", "Coordenadas"]]
+    pd.testing.assert_frame_equal(coords_df, _coords_ref(crudo))
+
+def test_claves_de_union_igual_que_la_referencia(libro):
+    _, precios_df, coords_df, info_df, _, _ = libro
+    for df, col in ((precios_df, "Ferreteria"), (coords_df, "Nombre del Asociado"), (info_df, "Nombre del Asociado")):
+        esperado = df[col].apply(normalize_name_ref)
+        assert df["__JOIN_KEY__"].tolist() == esperado.tolist()
+
+def test_info_lookup_igual_que_la_referencia(libro):
+    _, _, _, info_df, info_lookup, _ = libro
+    assert info_lookup == _info_lookup_ref(info_df)
+
+def test_base_igual_que_la_referencia(libro, hojas):
+    base, precios_df, _, _, _, _ = libro
+    coords = _coords_ref(hojas["coordenadas"][["Nombre del Asociado", "Coordenadas"]])
+    ref = precios_df.merge(coords[["__JOIN_KEY__", "latitud", "longitud"]], on="__JOIN_KEY__", how="left") \
+        .drop(columns=["__JOIN_KEY__"])
+    pd.testing.assert_frame_equal(base, ref)
+
+# ===========================
+# CASOS BORDE
+# ===========================
+PARES = [
+    "-12.0464,-77.0428", " -12.0464 , -77.0428 ", "\t-8.1,-79.03\t", "-12,05", "1,2,3",
+    "1.5e1,-7.7e1", "+12.5,-77", "a,b", "12.5", "", "   ", ",", "1,", ",2", "nan,1", "1,nan",
+    "-12.0464;-77.0428", "−12.05,−77.04", "12..5,1", None, np.nan, pd.NA, 12.5,
+]
+
+def test_parse_pares_casos_borde():
+    s = pd.Series(PARES, dtype=object)
+    out = parse_pares(s)
+    esperado = [_par_o_nada(parse_pair_ref(v)) for v in PARES]
+    for v, (lat, lon), (elat, elon) in zip(PARES, zip(out["latitud"], out["longitud"]), esperado):
+        assert (lat == elat or (math.isnan(lat) and math.isnan(elat))), (v, lat, elat)
+        assert (lon == elon or (math.isnan(lon) and math.isnan(elon))), (v, lon, elon)
+    assert out["latitud"].dtype == float and out["longitud"].dtype == float
+    assert out.index.equals(s.index)
+
+NOMBRES = [
+    "Ferretería Ñandú", "  ferreteria   el   PERNO  ", "ÁÉÍÓÚ áéíóú ü Ç", "é", "Ǆemal ǅ", "ά Ωμέγα",
+    "straße Œuvre ø", "ＦＥＲＲＥ", "Ferre Sur", "", "   ", None, np.nan, pd.NA, 123, 4.5,
+    "Maestro Home S.A.C.", "Sodimac – Lima", "漢字", "ẞ ḩ ǖ",
+]
+
+@pytest.mark.parametrize("valor", NOMBRES, ids=repr)
+def test_normalize_name_casos_borde(valor):
+    assert normalize_name(valor) == normalize_name_ref(valor)
+
+def test_normalizar_serie_igual_que_apply():
+    s = pd.Series(NOMBRES * 3, dtype=object, index=range(100, 100 + 3 * len(NOMBRES)), name="Ferreteria")
+    esperado = s.apply(normalize_name_ref)
+    pd.testing.assert_series_equal(normalizar_serie(s), esperado)
+
+def test_quitar_tildes_igual_que_nfd():
+    # toda la tabla precalculada (Latin-1 + Latin Extended) y algo de fuera de ella
+    texto = "".join(chr(i) for i in range(0x20, 0x250)) + "ǘǹ ḱ ἀ ώ"
+    nfd = "".join(c for c in unicodedata.normalize("NFD", texto) if unicodedata.category(c) != "Mn")
+    assert quitar_tildes(texto) == nfd
+    for c in texto:
+        assert quitar_tildes(c) == "".join(x for x in unicodedata.normalize("NFD", c) if unicodedata.category(x) != "Mn")
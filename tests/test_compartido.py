@@ -0,0 +1,70 @@
+# tests/test_compartido.py
+# Catálogo en memoria compartida: publicar → adjuntar da el mismo catálogo; otra versión da None.
+import numpy as np
+import pandas as pd
+import pytest
+
+import compartido
+from catalogo import TABLAS, cargar_catalogo, hash_archivo
+from compartido import adjuntar, publicar, ruta_compartida
+from motor import Cotizador
+from precios import MatrizPrecios
+
+PRECIOS = {("FERRE A", "Cemento"): 30.5, ("FERRE B", "Cemento"): 29.0, ("FERRE B", "Arena"): 10.0,
+           ("Ferretería Ñandú", "Clavos 3\""): 6.2}
+
+def _comparable(df):
+    """El publicador pasa el texto a categóricas (códigos compartidos) y el None de las fichas a NaN."""
+    df = df.copy()
+    for c in df.columns:
+        if not (pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c])):
+            df[c] = df[c].astype(object).where(df[c].notna(), np.nan)
+    return df
+
+@pytest.fixture
+def fuente(catalogo_csv):
+    return catalogo_csv(PRECIOS)
+
+def test_publicar_y_adjuntar_ida_y_vuelta(fuente, tmp_path):
+    version = hash_archivo(fuente)
+    ruta = publicar(fuente)
+    assert ruta == ruta_compartida(version) and ruta.parent == tmp_path
+    cc = adjuntar(version)
+    assert cc is not None and cc.version == version
+    cat, original = cc.catalogo(), cargar_catalogo(fuente)
+    for n in TABLAS:
+        pd.testing.assert_frame_equal(_comparable(getattr(cat, n)), _comparable(getattr(original, n)))
+    assert list(cat.productos) == list(original.productos)
+    np.testing.assert_array_equal(cat.teselas.arreglos()["tiendas"], original.teselas.arreglos()["tiendas"])
+
+    motor = Cotizador(cat, version=version, compartido=cc)
+    np.testing.assert_array_equal(motor.matriz.precios, MatrizPrecios.desde_catalogo(original).precios)
+    assert not motor.matriz.precios.flags.writeable  # vista sobre el mapeo, no una copia
+    carrito = {"Cemento": 2, "Arena": 1}
+    assert motor.cotizar(-12.06, -77.03, 5, carrito) == Cotizador(original).cotizar(-12.06, -77.03, 5, carrito)
+
+def test_desde_archivo_se_adjunta_si_hay_publicador(fuente):
+    assert Cotizador.desde_archivo(fuente).compartido is None
+    publicar(fuente)
+    assert Cotizador.desde_archivo(fuente).compartido is not None
+
+def test_otra_version_da_none(fuente, monkeypatch):
+    version = hash_archivo(fuente)
+    assert adjuntar(version) is None  # nada publicado
+    ruta = publicar(fuente)
+    assert adjuntar("0" * 64) is None  # otra fuente
+    # el mismo archivo bajo el nombre de otra versión: el manifest no coincide
+    ajeno = "f" * 64
+    ruta.rename(ruta_compartida(ajeno))
+    assert adjuntar(ajeno) is None
+    ruta_compartida(ajeno).rename(ruta)
+    monkeypatch.setattr(compartido, "COMPARTIDO_VERSION", compartido.COMPARTIDO_VERSION + 1)
+    assert adjuntar(version) is None  # formato de otra versión del código
+
+def test_archivo_vacio_o_ajeno_da_none(fuente):
+    version = hash_archivo(fuente)
+    ruta = ruta_compartida(version)
+    ruta.write_bytes(b"")
+    assert adjuntar(version) is None
+    ruta.write_bytes(b"no es un catalogo" * 8)
+    assert adjuntar(version) is None
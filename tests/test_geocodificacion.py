@@ -0,0 +1,153 @@
+# tests/test_geocodificacion.py
+# Cache SQLite y límite de requests de geocodificacion.py con un geocodificador de mentira (sin red).
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from geopy.exc import GeocoderServiceError
+
+import geocodificacion
+from geocodificacion import CacheGeocodificacion, ResolvedorGeocodificacion
+
+class GeocoderFalso:
+    """Responde de una tabla; anota cada llamada real y cuándo ocurrió."""
+
+    def __init__(self, directas=None, inversas=None, error=None):
+        self.directas = directas or {}
+        self.inversas = inversas or {}
+        self.error = error
+        self.llamadas = []
+
+    def geocode(self, query, timeout=None):
+        self.llamadas.append(("geocode", query, time.time()))
+        if self.error is not None:
+            raise self.error
+        r = self.directas.get(query)
+        return SimpleNamespace(latitude=r[0], longitude=r[1], address=r[2]) if r else None
+
+    def reverse(self, punto, timeout=None):
+        self.llamadas.append(("reverse", punto, time.time()))
+        if self.error is not None:
+            raise self.error
+        direccion = self.inversas.get(punto)
+        return SimpleNamespace(address=direccion) if direccion else None
+
+class Reloj:
+    def __init__(self, t=1_000_000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+@pytest.fixture
+def reloj(monkeypatch):
+    r = Reloj()
+    monkeypatch.setattr(geocodificacion.time, "time", r)
+    return r
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheGeocodificacion(tmp_path / "geocache.sqlite3")
+
+def resolvedor(cache, geocoder):
+    return ResolvedorGeocodificacion(geocoder=geocoder, cache=cache, intervalo_s=0)
+
+# ===========================
+# CACHE
+# ===========================
+def test_busqueda_normalizada_acierta_en_cache(cache):
+    g = GeocoderFalso({"Av. Larco 123": (-12.12, -77.03, "Av. Larco 123, Miraflores")})
+    r = resolvedor(cache, g)
+    primero = r.buscar("Av. Larco 123")
+    assert primero == {"lat": -12.12, "lon": -77.03, "direccion": "Av. Larco 123, Miraflores"}
+    # mayúsculas, tildes y espacios de más dan la misma clave: no vuelve al geocodificador
+    for q in ("  AV. LARCO   123 ", "av. larco 123", "Áv. Lárco 123"):
+        assert r.buscar(q) == primero
+    assert len(g.llamadas) == 1
+
+def test_inversa_redondea_la_clave(cache):
+    g = GeocoderFalso(inversas={(-12.04641, -77.04281): "Jr. de la Unión, Lima"})
+    r = resolvedor(cache, g)
+    assert r.inverso(-12.04641, -77.04281)["direccion"] == "Jr. de la Unión, Lima"
+    # a ~1 m: misma clave con 4 decimales, devuelve la dirección guardada con sus propias coordenadas
+    cerca = r.inverso(-12.04643, -77.04279)
+    assert cerca == {"lat": -12.04643, "lon": -77.04279, "direccion": "Jr. de la Unión, Lima"}
+    assert len(g.llamadas) == 1
+    assert cache.clave_inversa(-12.04641, -77.04281) == cache.clave_inversa(-12.04643, -77.04279) == "r:-12.0464,-77.0428"
+    assert cache.clave_inversa(-12.0466, -77.0428) != cache.clave_inversa(-12.0464, -77.0428)
+
+def test_vence_el_ttl(tmp_path, reloj):
+    cache = CacheGeocodificacion(tmp_path / "g.sqlite3", ttl_s=100, ttl_negativo_s=10)
+    cache.guardar("q:A", {"direccion": "a"})
+    reloj.t += 99
+    assert cache.obtener("q:A") == (True, {"direccion": "a"})
+    reloj.t += 2
+    assert cache.obtener("q:A") == (False, None)
+
+def test_resultado_negativo_con_su_propio_ttl(tmp_path, reloj):
+    cache = CacheGeocodificacion(tmp_path / "g.sqlite3", ttl_s=100, ttl_negativo_s=10)
+    g = GeocoderFalso()
+    r = resolvedor(cache, g)
+    assert r.buscar("no existe") is None
+    n = len(g.llamadas)  # la consulta y sus variantes con ", Lima, Perú" / ", Perú"
+    assert cache.obtener(cache.clave_busqueda("no existe")) == (True, None)
+    reloj.t += 9
+    assert r.buscar("no existe") is None and len(g.llamadas) == n
+    reloj.t += 2
+    assert r.buscar("no existe") is None and len(g.llamadas) == 2 * n
+
+def test_desalojo_lru(tmp_path, reloj):
+    cache = CacheGeocodificacion(tmp_path / "g.sqlite3", max_entradas=3)
+    for k in "abc":
+        reloj.t += 1
+        cache.guardar(k, {"direccion": k})
+    reloj.t += 1
+    assert cache.obtener("a")[0]  # "a" pasa a ser la más reciente: la menos usada es "b"
+    reloj.t += 1
+    cache.guardar("d", {"direccion": "d"})
+    assert [cache.obtener(k)[0] for k in "abcd"] == [True, False, True, True]
+    n = cache._con().execute("SELECT COUNT(*) FROM geocache").fetchone()[0]
+    assert n == 3
+
+@pytest.mark.parametrize("error", [GeocoderServiceError("caído"), RuntimeError("red")], ids=["servicio", "otro"])
+def test_excepciones_no_se_cachean(cache, error):
+    g = GeocoderFalso({"Av. Brasil 500": (-12.07, -77.05, "Av. Brasil 500")}, error=error)
+    r = resolvedor(cache, g)
+    assert r.buscar("Av. Brasil 500") is None  # cualquier error del geocodificador, no solo del servicio
+    assert cache.obtener(cache.clave_busqueda("Av. Brasil 500")) == (False, None)
+    # la inversa cae a las coordenadas, pero tampoco guarda nada
+    assert r.inverso(-12.07, -77.05)["direccion"] == "-12.070000, -77.050000"
+    assert cache.obtener(cache.clave_inversa(-12.07, -77.05)) == (False, None)
+    # cuando el servicio vuelve, se consulta de nuevo
+    g.error = None
+    assert r.buscar("Av. Brasil 500")["direccion"] == "Av. Brasil 500"
+
+# ===========================
+# LÍMITE DE REQUESTS
+# ===========================
+def test_reservar_turno_espacia_los_turnos(cache, reloj):
+    assert cache.reservar_turno(1.0) == 0
+    assert cache.reservar_turno(1.0) == pytest.approx(1.0)
+    assert cache.reservar_turno(1.0) == pytest.approx(2.0)
+    reloj.t += 10  # pasado el último turno, el próximo es inmediato
+    assert cache.reservar_turno(1.0) == 0
+
+def test_llamadas_reales_respetan_el_intervalo_entre_procesos(tmp_path):
+    """Dos resolvedores con su propia conexión al mismo archivo (como dos procesos), en paralelo."""
+    intervalo = 0.2
+    ruta = tmp_path / "compartido.sqlite3"
+    g = GeocoderFalso()
+    resolvedores = [ResolvedorGeocodificacion(geocoder=g, cache=CacheGeocodificacion(ruta), intervalo_s=intervalo)
+                    for _ in range(2)]
+
+    def pedir(r, i):
+        for j in range(2):
+            r.inverso(-12.0 - i / 100, -77.0 - j / 100)
+
+    hilos = [threading.Thread(target=pedir, args=(r, i)) for i, r in enumerate(resolvedores)]
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+    tiempos = sorted(t for _, _, t in g.llamadas)
+    assert len(tiempos) == 4
+    assert min(b - a for a, b in zip(tiempos, tiempos[1:])) >= intervalo - 0.02
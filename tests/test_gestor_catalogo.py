@@ -0,0 +1,80 @@
+# tests/test_gestor_catalogo.py
+# Recarga en caliente de GestorCatalogo sobre un CSV temporal (sin el hilo: revisar() a mano).
+import os
+
+import pytest
+
+from motor import Cotizador, GestorCatalogo
+
+V1 = {("FERRE A", "Cemento"): 30.5, ("FERRE B", "Cemento"): 29.0, ("FERRE B", "Arena"): 10.0}
+V2 = {**V1, ("FERRE A", "Cemento"): 27.9}
+
+class CargaContada:
+    def __init__(self):
+        self.llamadas = 0
+
+    def __call__(self, path, version=None, espera_s=0.0):
+        self.llamadas += 1
+        return Cotizador.desde_archivo(path, version, espera_s)
+
+def tocar(ruta, segundos):
+    """mtime explícito: dos escrituras seguidas pueden caer en el mismo tick del reloj del FS."""
+    t = os.stat(ruta).st_mtime_ns + int(segundos * 1e9)
+    os.utime(ruta, ns=(t, t))
+
+def precio(motor, tienda, producto):
+    ranking = motor.cotizar(-12.06, -77.03, 5, {producto: 1})
+    return next(f["total"] for f in ranking if f["ferreteria"] == tienda)
+
+@pytest.fixture
+def gestor(catalogo_csv):
+    ruta = catalogo_csv(V1)
+    carga = CargaContada()
+    g = GestorCatalogo(ruta, cargar=carga, vigilar=False)
+    yield g, ruta, carga, catalogo_csv
+    g.detener()
+
+def test_cambio_se_publica_con_un_swap_atomico(gestor):
+    g, ruta, carga, escribir = gestor
+    viejo = g.actual()
+    assert precio(viejo, "FERRE A", "Cemento") == 30.5
+    escribir(V2); tocar(ruta, 1)
+    assert g.revisar() is False  # recién cambió: se espera una revisión más
+    assert g.actual() is viejo and carga.llamadas == 1
+    assert g.revisar() is True
+    nuevo = g.actual()
+    assert nuevo is not viejo and g.version == 2 and g.ultimo_error is None
+    assert precio(nuevo, "FERRE A", "Cemento") == 27.9
+    assert precio(viejo, "FERRE A", "Cemento") == 30.5  # quien tenía el anterior lo sigue viendo entero
+    assert g.revisar() is False and g.actual() is nuevo
+
+def test_mismo_sha_no_recarga(gestor):
+    g, ruta, carga, _ = gestor
+    viejo = g.actual()
+    tocar(ruta, 1)  # touch: otra fecha, mismo contenido
+    assert g.revisar() is False
+    assert g.revisar() is False
+    assert g.actual() is viejo and g.version == 1 and carga.llamadas == 1
+    assert g.revisar() is False and carga.llamadas == 1  # la firma nueva ya quedó registrada
+
+def test_archivo_a_medio_escribir_no_se_toma(gestor):
+    g, ruta, carga, escribir = gestor
+    viejo = g.actual()
+    escribir(V2)
+    final = ruta.read_bytes()
+    for i, corte in enumerate((len(final) // 3, 2 * len(final) // 3), 1):  # la copia sigue creciendo
+        ruta.write_bytes(final[:corte]); tocar(ruta, i)
+        assert g.revisar() is False
+        assert g.actual() is viejo and carga.llamadas == 1
+    ruta.write_bytes(final); tocar(ruta, 3)
+    assert g.revisar() is False  # terminó de copiarse: se confirma en la próxima
+    assert g.revisar() is True
+    assert precio(g.actual(), "FERRE A", "Cemento") == 27.9
+
+def test_recarga_fallida_sigue_con_la_version_anterior(gestor):
+    g, ruta, carga, _ = gestor
+    viejo = g.actual()
+    ruta.write_text("esto no es un catálogo\n", encoding="utf-8"); tocar(ruta, 1)
+    assert g.revisar() is False
+    assert g.revisar() is False
+    assert g.actual() is viejo and g.version == 1 and g.ultimo_error is not None
@@ -0,0 +1,81 @@
+# tests/test_historial.py
+# Historial de precios: tres cargas con una suba, una baja, un alta y un producto retirado.
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+from catalogo import Catalogo
+from historial import HistorialPrecios
+
+TIENDAS = {"FERRE A": (-12.06, -77.03), "FERRE B": (-12.07, -77.02)}  # a ~1,5 km
+V1 = {("FERRE A", "Cemento"): 30.0, ("FERRE A", "Arena"): 10.0, ("FERRE B", "Cemento"): 29.0}
+V2 = {("FERRE A", "Cemento"): 32.0, ("FERRE A", "Arena"): 10.0, ("FERRE B", "Cemento"): 29.0,
+      ("FERRE B", "Clavos"): 5.0}                                   # sube A/Cemento, alta B/Clavos
+V3 = {("FERRE A", "Cemento"): 32.0, ("FERRE B", "Cemento"): 27.0,
+      ("FERRE B", "Clavos"): 5.0}                                   # baja B/Cemento, se retira A/Arena
+
+def catalogo(precios):
+    return Catalogo.desde_base(pd.DataFrame(
+        [{"Ferreteria": t, "Producto": p, "Precio": v, "latitud": TIENDAS[t][0], "longitud": TIENDAS[t][1]}
+         for (t, p), v in precios.items()]))
+
+@pytest.fixture
+def historial(tmp_path):
+    h = HistorialPrecios(tmp_path / "historial")
+    ahora = time.time()
+    metas = [h.registrar(catalogo(v), f"sha{i}", ts=ahora - (3 - i) * 86400) for i, v in enumerate((V1, V2, V3))]
+    return h, metas, [ahora - 3 * 86400, ahora - 2 * 86400, ahora - 86400]
+
+def filas(df):
+    return [(ts, f, p) for ts, f, p in zip(df["ts"], df["Ferreteria"], df["Precio"])]
+
+def test_segmentos_guardan_solo_los_cambios(historial):
+    h, metas, _ = historial
+    assert [(m["filas"], m["nuevos"], m["retirados"], m["vigentes"]) for m in metas] == [
+        (3, 3, 0, 3),   # primera carga: todo es nuevo
+        (2, 1, 0, 4),   # suba de A/Cemento y alta de B/Clavos
+        (2, 0, 1, 3),   # baja de B/Cemento y A/Arena retirado
+    ]
+    assert h.registrar(catalogo(V3), "sha2") is None  # la misma fuente otra vez no se registra
+    assert len(h.cargas()) == 3
+
+def test_serie(historial):
+    h, _, (t1, t2, t3) = historial
+    assert filas(h.serie("Cemento")) == [(t1, "FERRE A", 30.0), (t1, "FERRE B", 29.0), (t2, "FERRE A", 32.0),
+                                        (t2, "FERRE B", 29.0), (t3, "FERRE A", 32.0), (t3, "FERRE B", 27.0)]
+    assert filas(h.serie("Arena")) == [(t1, "FERRE A", 10.0), (t2, "FERRE A", 10.0)]  # retirado en la 3
+    assert filas(h.serie("Clavos")) == [(t2, "FERRE B", 5.0), (t3, "FERRE B", 5.0)]
+    assert h.serie("No existe").empty
+
+def test_serie_con_ventana_y_radio(historial):
+    h, _, (_, _, t3) = historial
+    s = h.serie("Cemento", dias=1.5)  # solo la última carga, más lo vigente al entrar a la ventana
+    assert [(f, p) for _, f, p in filas(s)] == [("FERRE A", 32.0), ("FERRE B", 29.0), ("FERRE A", 32.0), ("FERRE B", 27.0)]
+    assert s["ts"].iloc[0] == pytest.approx(time.time() - 1.5 * 86400, abs=60) and s["ts"].iloc[-1] == t3
+    cerca = h.serie("Cemento", *TIENDAS["FERRE A"], radio_km=0.5)
+    assert set(cerca["Ferreteria"]) == {"FERRE A"} and (cerca["distancia"] < 0.5).all()
+
+def test_cambios(historial):
+    h, _, _ = historial
+    ultima = h.cambios(cargas=1)
+    assert ultima[["Ferreteria", "Producto", "anterior", "Precio"]].values.tolist() == [["FERRE B", "Cemento", 29.0, 27.0]]
+    dos = h.cambios(cargas=2)  # B/Cemento -6,9 % antes que A/Cemento +6,7 %; altas y bajas no cuentan
+    assert dos[["Ferreteria", "Producto", "anterior", "Precio"]].values.tolist() == [
+        ["FERRE B", "Cemento", 29.0, 27.0], ["FERRE A", "Cemento", 30.0, 32.0]]
+    assert dos["cambio"].tolist() == [-2.0, 2.0]
+    assert h.cambios(cargas=3).empty  # desde antes de la primera carga todo es un alta
+    por_tienda = h.cambios_por_tienda(cargas=2)
+    assert por_tienda[["Ferreteria", "cambiados", "subieron", "productos"]].values.tolist() == [
+        ["FERRE A", 1, 1, 1], ["FERRE B", 1, 0, 2]]
+
+def test_reabrir_y_rehacer_los_vigentes(historial):
+    h, _, _ = historial
+    antes = h.serie("Cemento")
+    shutil.rmtree(h.carpeta / "ultimo")  # p. ej. una escritura cortada: se rehace desde los segmentos
+    otro = HistorialPrecios(h.carpeta)
+    pd.testing.assert_frame_equal(otro.serie("Cemento"), antes)
+    meta = otro.registrar(catalogo(V1), "sha3")  # vuelta a V1 sobre los vigentes rehechos
+    assert (meta["filas"], meta["nuevos"], meta["retirados"]) == (4, 1, 1)  # 2 precios, vuelve Arena, sale Clavos
+    assert otro.cambios(cargas=1)["Precio"].tolist() == [29.0, 30.0]
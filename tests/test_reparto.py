@@ -0,0 +1,79 @@
+# tests/test_reparto.py
+# repartir contra fuerza bruta (todas las combinaciones de hasta K tiendas) en matrices chicas al azar.
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from precios import MatrizPrecios
+from reparto import repartir
+
+def fuerza_bruta(precios, ids, dist, carrito, k, costo_visita, costo_km):
+    """(faltantes, costo) óptimo: primero la menor cantidad de productos sin comprar, después el costo."""
+    prods = [p for p, c in carrito.items() if c > 0]
+    mejor = None
+    for r in range(1, min(k, len(ids)) + 1):
+        for sel in combinations(range(len(ids)), r):
+            faltan, costo = 0, sum(costo_visita + costo_km * dist[i] for i in sel)
+            for p in prods:
+                col = precios.productos.index(p) if p in precios.productos else None
+                pu = [precios.precios[ids[i], col] for i in sel] if col is not None else []
+                pu = [v for v in pu if not np.isnan(v)]
+                if pu:
+                    costo += min(pu) * carrito[p]
+                else:
+                    faltan += 1
+            if mejor is None or (faltan, costo) < (mejor[0], mejor[1] - 1e-9):
+                mejor = (faltan, costo)
+    return mejor
+
+def caso(rng):
+    n_total, m = int(rng.integers(1, 8)), int(rng.integers(1, 6))
+    productos = [f"P{j}" for j in range(m)]
+    precios = np.round(rng.uniform(1, 50, (n_total, m)), 2)
+    precios[rng.random((n_total, m)) < 0.35] = np.nan
+    if m > 1 and rng.random() < 0.3:
+        precios[:, rng.integers(m)] = np.nan  # un producto que nadie vende
+    matriz = MatrizPrecios(precios, productos)
+    n = int(rng.integers(1, n_total + 1))
+    ids = rng.choice(n_total, n, replace=False)
+    dist = np.sort(rng.uniform(0, 5, n))
+    carrito = {p: int(rng.integers(0, 4)) for p in productos if rng.random() < 0.8}
+    if rng.random() < 0.2:
+        carrito["NO EXISTE"] = 1
+    return matriz, ids, dist, carrito
+
+@pytest.mark.parametrize("semilla", range(200))
+def test_exacto_igual_que_fuerza_bruta(semilla):
+    rng = np.random.default_rng(semilla)
+    matriz, ids, dist, carrito = caso(rng)
+    k = int(rng.integers(1, len(ids) + 3))  # a veces K > tiendas
+    costo_visita, costo_km = float(rng.choice([0, 3])), float(rng.choice([0, 1.5]))
+    r = repartir(matriz, ids, dist, carrito, k, costo_visita, costo_km)
+    bf = fuerza_bruta(matriz, ids, dist, carrito, k, costo_visita, costo_km)
+    vendible = any(c > 0 and p in matriz.producto_id and not np.isnan(matriz.precios[ids, matriz.producto_id[p]]).all()
+                   for p, c in carrito.items())
+    if not vendible:
+        assert r is None
+        return
+    assert r["exacto"]
+    assert len(r["tiendas"]) <= k
+    assert (len(r["faltantes"]), r["importe"] + r["penalizacion"]) == (bf[0], pytest.approx(bf[1]))
+    # la asignación es consistente con lo que se cobra
+    assert set(r["asignacion"].values()) <= set(r["tiendas"])
+    importe = sum(matriz.precios[t, matriz.producto_id[p]] * carrito[p] for p, t in r["asignacion"].items())
+    assert r["importe"] == pytest.approx(importe)
+
+@pytest.mark.parametrize("semilla", range(50))
+def test_voraz_nunca_mejor_que_el_optimo(semilla):
+    rng = np.random.default_rng(1000 + semilla)
+    matriz, ids, dist, carrito = caso(rng)
+    k = int(rng.integers(1, len(ids) + 3))
+    r = repartir(matriz, ids, dist, carrito, k, 2.0, 1.0, max_combinaciones=0)
+    if r is None:
+        return
+    bf = fuerza_bruta(matriz, ids, dist, carrito, k, 2.0, 1.0)
+    assert not r["exacto"] and len(r["tiendas"]) <= k
+    assert (len(r["faltantes"]), r["importe"] + r["penalizacion"] + 1e-6) >= bf
+    if k == 1:  # con una sola tienda el intercambio recorre todas: llega al óptimo
+        assert (len(r["faltantes"]), r["importe"] + r["penalizacion"]) == (bf[0], pytest.approx(bf[1]))
@@ -0,0 +1,65 @@
+# tests/test_resultados_sesion.py
+# ResultadosSesion (resultados incrementales) contra un Cotizador.cotizar desde cero en cada paso.
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalogo import Catalogo
+import motor as motor_mod
+from motor import RADIO_MAX_KM, Cotizador, ResultadosSesion
+
+def catalogo_chico(semilla=0, n_tiendas=80, n_productos=30):
+    rng = np.random.default_rng(semilla)
+    lats = -12.06 + rng.normal(0, 0.06, n_tiendas)
+    lons = -77.03 + rng.normal(0, 0.06, n_tiendas)
+    tienda, prod = np.nonzero(rng.random((n_tiendas, n_productos)) < 0.5)
+    return Catalogo.desde_base(pd.DataFrame({
+        "Ferreteria": [f"FERRETERIA {i % 60:02d}" for i in tienda],  # nombres repetidos en dos puntos
+        "Producto": [f"Producto {j:02d}" for j in prod],
+        "Precio": np.round(rng.uniform(5, 80, len(tienda)), 2),
+        "latitud": lats[tienda],
+        "longitud": lons[tienda],
+    }))
+
+def igual_ranking(a, b):
+    assert [f["ferreteria"] for f in a] == [f["ferreteria"] for f in b]
+    for x, y in zip(a, b):
+        assert x["dist"] == pytest.approx(y["dist"])
+        assert x["total"] == pytest.approx(y["total"])
+        assert x["faltantes"] == y["faltantes"]
+        assert x["detalle"] == y["detalle"]
+
+@pytest.mark.parametrize("semilla", range(2))
+def test_incremental_igual_que_desde_cero(semilla, monkeypatch):
+    monkeypatch.setattr(motor_mod, "RECALCULO_CADA", 25)  # que el recálculo desde cero pase varias veces
+    rng = np.random.default_rng(semilla)
+    motor = Cotizador(catalogo_chico(semilla))
+    sesion = ResultadosSesion(motor)
+    productos = list(motor.catalogo.productos) + ["NO EXISTE"]
+    puntos = [(-12.06, -77.03), (-12.10, -77.00), (-11.98, -77.08)]
+    lat, lon = puntos[0]
+    radio, carrito, cambios = 3.0, {}, 0
+    for paso in range(100):
+        accion = rng.random()
+        if accion < 0.1:
+            lat, lon = puntos[rng.integers(len(puntos))]
+        elif accion < 0.25:
+            radio = float(rng.choice([0.0, 0.5, 2.0, 5.0, RADIO_MAX_KM, RADIO_MAX_KM + 5]))
+        else:
+            p = productos[rng.integers(len(productos))]
+            carrito = {**carrito, p: int(rng.integers(0, 5))}  # 0 = lo saca del carrito
+            cambios += 1
+        top = None if paso % 4 == 0 else 3
+        igual_ranking(sesion.resumen(lat, lon, radio, carrito, top=top),
+                      motor.cotizar(lat, lon, radio, carrito, top=top))
+    assert cambios > 2 * motor_mod.RECALCULO_CADA
+
+def test_cambio_de_ubicacion_rehace_el_corte():
+    motor = Cotizador(catalogo_chico())
+    sesion = ResultadosSesion(motor)
+    carrito = {motor.catalogo.productos[0]: 2, motor.catalogo.productos[1]: 1}
+    a = sesion.resumen(-12.06, -77.03, 4.0, carrito)
+    b = sesion.resumen(-12.12, -76.98, 4.0, carrito)
+    igual_ranking(a, motor.cotizar(-12.06, -77.03, 4.0, carrito))
+    igual_ranking(b, motor.cotizar(-12.12, -76.98, 4.0, carrito))
+    assert [f["ferreteria"] for f in a] != [f["ferreteria"] for f in b]
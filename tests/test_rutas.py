@@ -0,0 +1,35 @@
+# tests/test_rutas.py
+# leer_osm / compilar_grafo sobre un extracto .osm mínimo escrito en el test.
+import numpy as np
+
+from rutas import GrafoVial, compilar_grafo, leer_osm
+
+OSM = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="-12.0500" lon="-77.0400"/>
+  <node id="2" lat="-12.0505" lon="-77.0400"/>
+  <node id="3" lat="-12.0510" lon="-77.0400">
+    <tag k="barrier" v="gate"/>
+    <tag k="access" v="private"/>
+    <tag k="highway" v="motorway"/>
+  </node>
+  <way id="10">
+    <nd ref="1"/><nd ref="2"/><nd ref="3"/>
+    <tag k="highway" v="residential"/>
+  </way>
+</osm>
+"""
+
+def test_tags_de_un_nodo_no_pasan_a_la_via(tmp_path):
+    osm = tmp_path / "mini.osm"
+    osm.write_text(OSM, encoding="utf-8")
+    ids, _, _, refs, cortes, vel, sentido = leer_osm(osm)
+    assert ids.tolist() == [1, 2, 3]
+    assert refs.tolist() == [1, 2, 3] and cortes.tolist() == [0, 3]
+    assert sentido.tolist() == [0]  # residencial de doble sentido, no la autopista del nodo
+    assert vel.tolist() == [25.0]
+
+    grafo = GrafoVial.cargar(compilar_grafo(osm, tmp_path / "mini.grafo.npz"))
+    assert len(grafo) == 3
+    assert len(grafo.destino) == 4  # 2 tramos x 2 sentidos
+    assert np.diff(grafo.indptr).tolist() == [1, 2, 1]
@@ -0,0 +1,66 @@
+# tests/test_snapshot.py
+# Snapshot columnar del catálogo: ida y vuelta contra la fuente y caída a la fuente si quedó viejo.
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import catalogo
+from catalogo import TABLAS, abrir_snapshot, cargar_catalogo, compilar, leer_fuente, ruta_snapshot
+
+DINOE = Path(__file__).resolve().parents[1] / "dinoe.xlsx"
+PRECIOS = {("FERRE A", "Cemento"): 30.5, ("FERRE B", "Cemento"): 29.0, ("Ferretería Ñandú", "Arena"): 10.0}
+
+def _comparable(df):
+    """Copia (las columnas del snapshot son memmap, no ndarray) con un solo marcador de faltante en
+    las columnas de texto: el snapshot guarda códigos y no distingue None de NaN."""
+    df = df.copy()
+    for c in df.columns[df.dtypes == object]:
+        df[c] = df[c].where(df[c].notna(), np.nan)
+    return df
+
+def igual_catalogo(a, b):
+    for n in TABLAS:
+        pd.testing.assert_frame_equal(_comparable(getattr(a, n)), _comparable(getattr(b, n)))
+    assert list(a.productos) == list(b.productos)
+    assert a.avisos == b.avisos
+
+@pytest.fixture(params=["xlsx", "csv"])
+def fuente(request, tmp_path, catalogo_csv):
+    if request.param == "xlsx":
+        return Path(shutil.copy(DINOE, tmp_path / "dinoe.xlsx"))
+    return catalogo_csv(PRECIOS)
+
+def test_ida_y_vuelta_igual_que_la_fuente(fuente):
+    destino = compilar(fuente)
+    assert destino == ruta_snapshot(fuente) and (destino / "manifest.json").exists()
+    cat = abrir_snapshot(fuente)
+    assert cat is not None
+    igual_catalogo(cat, leer_fuente(fuente))
+
+def test_fuente_cambiada_cae_a_la_fuente(tmp_path, catalogo_csv):
+    fuente = catalogo_csv(PRECIOS)
+    compilar(fuente)
+    viejo = abrir_snapshot(fuente)
+    catalogo_csv({**PRECIOS, ("FERRE A", "Cemento"): 27.9})
+    assert abrir_snapshot(fuente) is None  # otro sha256: el snapshot no corresponde
+    cat = cargar_catalogo(fuente)
+    igual_catalogo(cat, leer_fuente(fuente))
+    assert not cat.precios["Precio"].equals(viejo.precios["Precio"])
+    igual_catalogo(abrir_snapshot(fuente), cat)  # y cargar_catalogo lo regeneró
+
+def test_snapshot_de_otra_version_no_se_usa(catalogo_csv, monkeypatch):
+    fuente = catalogo_csv(PRECIOS)
+    compilar(fuente)
+    monkeypatch.setattr(catalogo, "SNAPSHOT_VERSION", catalogo.SNAPSHOT_VERSION + 1)
+    assert abrir_snapshot(fuente) is None
+
+def test_manifest_roto_no_se_usa(catalogo_csv):
+    fuente = catalogo_csv(PRECIOS)
+    ruta_snapshot(fuente).mkdir()
+    (ruta_snapshot(fuente) / "manifest.json").write_text("{", encoding="utf-8")
+    assert abrir_snapshot(fuente) is None
+    igual_catalogo(cargar_catalogo(fuente), leer_fuente(fuente))
+    assert abrir_snapshot(fuente) is not None  # cargar_catalogo lo reemplazó por uno válido